@@ -0,0 +1,254 @@
+"""
+Benchmarks for the Student Grade Analyzer.
+
+report: the report statistics, original per-student Python functions versus
+the columnar GradeStore. For each size the script generates a seeded roster,
+checks that both implementations agree, and prints the best of several
+timings for:
+- legacy: the original compute_average-based report and top-performer loop
+- store (from roster): building a GradeStore from a Roster + one vectorized pass
+- store (columnar): the vectorized pass alone, on data already held as arrays
+
+roster: adding N students one by one, each checked for duplicates first,
+with the original linear find_student scan (O(N^2) overall) versus the
+Roster name index (O(N)).
+
+session: a session that enters grades in batches and asks for the report
+statistics and the top performer after every batch; recomputing every
+average from the grade lists versus the students' running statistics and
+the roster's heap.
+
+Needs NumPy, from the `benchmark` extra: pip install '.[benchmark]'
+
+Usage:
+    python benchmark.py report --students 1000 100000 1000000 --grades 10 --repeat 3
+    python benchmark.py roster --students 1000 4000 16000
+    python benchmark.py session --students 1000 10000 --batches 50
+"""
+import argparse
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from grade_store import GradeStore
+from main import compute_average
+from roster import Roster
+
+
+def legacy_report_stats(students: List[Dict]) -> Optional[Tuple[float, float, float, str]]:
+    """
+    The statistics of the original generate_full_report/find_top_student,
+    including their repeated compute_average calls (printing left out).
+    """
+    for student in students:
+        compute_average(student["grades"])
+    averages = [compute_average(s["grades"]) for s in students if compute_average(s["grades"]) is not None]
+    if not averages:
+        return None
+
+    top: Optional[Tuple[str, float]] = None
+    for student in students:
+        avg = compute_average(student["grades"])
+        if avg is None:
+            continue
+        if top is None or avg > top[1]:
+            top = (student["name"], avg)
+    return max(averages), min(averages), sum(averages) / len(averages), top[0]
+
+
+def legacy_find_student(students: List[Dict], name: str) -> Optional[Dict]:
+    """
+    The original find_student: a linear case-insensitive scan.
+    """
+    name_lower = name.strip().lower()
+    for student in students:
+        if student["name"].lower() == name_lower:
+            return student
+    return None
+
+
+def legacy_load(names: List[str]) -> List[Dict]:
+    """
+    Add students the way the original add_new_student did.
+    """
+    students: List[Dict] = []
+    for name in names:
+        if legacy_find_student(students, name) is None:
+            students.append({"name": name, "grades": []})
+    return students
+
+
+def roster_load(names: List[str]) -> Roster:
+    """
+    Add students through the Roster index.
+    """
+    roster = Roster()
+    for name in names:
+        if name not in roster:
+            roster.add(name)
+    return roster
+
+
+def to_roster(students: List[Dict]) -> Roster:
+    """
+    The same students as a Roster, grades included.
+    """
+    roster = Roster()
+    for record in students:
+        student = roster.add(record["name"])
+        for grade in record["grades"]:
+            roster.add_grade(student, grade)
+    return roster
+
+
+def running_report_stats(roster: Roster) -> Optional[Tuple[float, float, float, str]]:
+    """
+    The same statistics from the running per-student statistics and the heap.
+    """
+    averages = [student.average for student in roster if student.count]
+    if not averages:
+        return None
+    top = roster.top_students(1)[0]
+    return max(averages), min(averages), sum(averages) / len(averages), top.name
+
+
+def store_report_stats(store: GradeStore) -> Optional[Tuple[float, float, float, str]]:
+    """
+    The same statistics from one vectorized pass over a GradeStore.
+    """
+    summary = store.summary()
+    if summary is None:
+        return None
+    return summary.max_average, summary.min_average, summary.overall_average, store.names[summary.top_index]
+
+
+def generate_students(count: int, grades_per_student: int, seed: int) -> List[Dict]:
+    """
+    Seeded roster; every tenth student has no grades, the others 1..2x the given count.
+    """
+    rng = random.Random(seed)
+    students = []
+    for i in range(count):
+        n = 0 if i % 10 == 9 else rng.randint(1, 2 * grades_per_student)
+        students.append({"name": f"Student {i}", "grades": [rng.randint(0, 100) for _ in range(n)]})
+    return students
+
+
+def best_time(fn: Callable, repeat: int) -> float:
+    """
+    Best wall-clock time of `repeat` calls, in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_report(args: argparse.Namespace) -> None:
+    """
+    Time the report statistics for each roster size.
+    """
+    print(f"{'students':>10} {'grades':>11} {'legacy':>10} {'store (roster)':>14} {'store (columnar)':>17} {'speedup':>8}")
+    for count in args.students:
+        students = generate_students(count, args.grades, args.seed)
+        roster = to_roster(students)
+        store = GradeStore.from_students(roster)
+
+        legacy = legacy_report_stats(students)
+        vectorized = store_report_stats(store)
+        assert legacy[3] == vectorized[3] and np.allclose(legacy[:3], vectorized[:3]), (legacy, vectorized)
+
+        legacy_time = best_time(lambda: legacy_report_stats(students), args.repeat)
+        dicts_time = best_time(lambda: store_report_stats(GradeStore.from_students(roster)), args.repeat)
+        columnar_time = best_time(lambda: store_report_stats(store), args.repeat)
+        print(f"{count:>10,} {len(store.grades):>11,} {legacy_time * 1000:>8.1f}ms {dicts_time * 1000:>12.1f}ms "
+              f"{columnar_time * 1000:>15.1f}ms {legacy_time / columnar_time:>7.0f}x")
+
+
+def bench_roster(args: argparse.Namespace) -> None:
+    """
+    Time loading each number of students, duplicates included.
+    """
+    print(f"{'students':>10} {'legacy':>12} {'roster':>10} {'legacy/student':>15} {'roster/student':>15}")
+    for count in args.students:
+        # Every fifth name repeats an earlier one with different case, so duplicates are rejected
+        names = [f"Student {i}" if i % 5 else f"STUDENT {i // 2}" for i in range(count)]
+        assert [s["name"] for s in legacy_load(names)] == [s.name for s in roster_load(names)]
+
+        legacy_time = best_time(lambda: legacy_load(names), args.repeat)
+        roster_time = best_time(lambda: roster_load(names), args.repeat)
+        print(f"{count:>10,} {legacy_time * 1000:>10.1f}ms {roster_time * 1000:>8.1f}ms "
+              f"{legacy_time / count * 1e6:>13.2f}us {roster_time / count * 1e6:>13.2f}us")
+
+
+def bench_session(args: argparse.Namespace) -> None:
+    """
+    Time a session of grade batches, each followed by the report statistics.
+    """
+    print(f"{'students':>10} {'batches':>8} {'grades':>11} {'recompute':>12} {'running':>10} {'speedup':>8}")
+    for count in args.students:
+        students = generate_students(count, args.grades, args.seed)
+        # The grades of the session in entry order, split into batches
+        entries = [(i, grade) for i, student in enumerate(students) for grade in student["grades"]]
+        random.Random(args.seed).shuffle(entries)
+        size = -(-len(entries) // args.batches)
+        batches = [entries[start:start + size] for start in range(0, len(entries), size)]
+
+        def legacy_session() -> list:
+            records = [{"name": student["name"], "grades": []} for student in students]
+            results = []
+            for batch in batches:
+                for i, grade in batch:
+                    records[i]["grades"].append(grade)
+                results.append(legacy_report_stats(records))
+            return results
+
+        def running_session() -> list:
+            roster = Roster()
+            members = [roster.add(student["name"]) for student in students]
+            results = []
+            for batch in batches:
+                for i, grade in batch:
+                    roster.add_grade(members[i], grade)
+                results.append(running_report_stats(roster))
+            return results
+
+        assert legacy_session() == running_session()
+        legacy_time = best_time(legacy_session, args.repeat)
+        running_time = best_time(running_session, args.repeat)
+        print(f"{count:>10,} {len(batches):>8} {len(entries):>11,} {legacy_time * 1000:>10.1f}ms "
+              f"{running_time * 1000:>8.1f}ms {legacy_time / running_time:>7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    report = commands.add_parser("report", help="report statistics: legacy functions vs GradeStore")
+    report.add_argument("--students", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    report.add_argument("--grades", type=int, default=10, help="average grades per student")
+    report.set_defaults(run=bench_report)
+
+    roster = commands.add_parser("roster", help="loading students: linear find_student vs Roster")
+    roster.add_argument("--students", type=int, nargs="+", default=[1_000, 4_000, 16_000])
+    roster.set_defaults(run=bench_roster)
+
+    session = commands.add_parser("session", help="reports after every grade batch: recompute vs running statistics")
+    session.add_argument("--students", type=int, nargs="+", default=[1_000, 10_000])
+    session.add_argument("--grades", type=int, default=10, help="average grades per student")
+    session.add_argument("--batches", type=int, default=50, help="reports per session")
+    session.set_defaults(run=bench_session)
+
+    for command in (report, roster, session):
+        command.add_argument("--repeat", type=int, default=3)
+        command.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
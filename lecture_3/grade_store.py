@@ -0,0 +1,107 @@
+"""
+Columnar grade storage for the Student Grade Analyzer.
+
+All grades live in one NumPy array, ordered by student; `offsets[i]` and
+`offsets[i + 1]` delimit the grades of student i. Per-student sums come from
+a single np.add.reduceat over that array, so averages, the report summary
+and the top performer are computed in one vectorized pass instead of a
+Python loop per student.
+
+The analyzer itself reports from a Roster's running statistics; GradeStore
+is an offline alternative, built from complete grade lists for the
+benchmarks in benchmark.py. It cannot be built from a Roster(keep_grades=False),
+whose students keep statistics only. NumPy comes with the `benchmark`
+extra (pip install '.[benchmark]'); main.py does not need it.
+"""
+from dataclasses import dataclass
+from typing import Collection, Optional, Sequence
+
+import numpy as np
+
+from roster import Student
+
+
+@dataclass
+class GradeSummary:
+    """Report statistics over the students who have at least one grade."""
+
+    max_average: float
+    min_average: float
+    overall_average: float
+    top_index: int
+
+
+class GradeStore:
+    """
+    Names plus a flat grade array with per-student offsets.
+
+    The store is a read-optimized snapshot: build it from the students list
+    (or directly from arrays) when a report is needed.
+    """
+
+    def __init__(self, names: Sequence[str], grades: np.ndarray, offsets: np.ndarray):
+        if len(offsets) != len(names) + 1:
+            raise ValueError("offsets must have one entry more than names")
+        self.names = names
+        # Grades are 0..100; int16 keeps a million-grade array at 2 MB
+        self.grades = np.asarray(grades, dtype=np.int16)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    @classmethod
+    def from_students(cls, students: Collection[Student]) -> "GradeStore":
+        """
+        Build a store from the analyzer's students (a Roster or a list of Student).
+        Raises ValueError for students that keep no grade values.
+        """
+        for student in students:
+            if student.grades is None:
+                raise ValueError(
+                    f"student {student.name!r} keeps statistics only; build the roster with keep_grades=True"
+                )
+        names = [student.name for student in students]
+        counts = np.fromiter((len(student.grades) for student in students), dtype=np.int64, count=len(students))
+        offsets = np.zeros(len(students) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        grades = np.fromiter(
+            (grade for student in students for grade in student.grades), dtype=np.int16, count=int(offsets[-1])
+        )
+        return cls(names, grades, offsets)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def counts(self) -> np.ndarray:
+        """
+        Number of grades of each student.
+        """
+        return np.diff(self.offsets)
+
+    def averages(self) -> np.ndarray:
+        """
+        Average grade of each student, NaN for students without grades.
+        """
+        counts = self.counts()
+        # reduceat needs every start index to be valid, so pad with one zero;
+        # a student without grades then sums a neighbour's grade, masked below
+        padded = np.append(self.grades.astype(np.int64), 0)
+        sums = np.add.reduceat(padded, self.offsets[:-1]) if len(self) else np.zeros(0, dtype=np.int64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    def summary(self, averages: Optional[np.ndarray] = None) -> Optional[GradeSummary]:
+        """
+        Max, min and overall (mean of student averages) average, plus the index
+        of the top performer (the first one on ties). None if nobody has grades.
+        """
+        if averages is None:
+            averages = self.averages()
+        graded = ~np.isnan(averages)
+        if not graded.any():
+            return None
+        values = averages[graded]
+        return GradeSummary(
+            max_average=float(values.max()),
+            min_average=float(values.min()),
+            overall_average=float(values.mean()),
+            top_index=int(np.nanargmax(averages)),
+        )
@@ -3,27 +3,31 @@ Student Grade Analyzer
 A concise, efficient, and well-commented implementation that follows the assignment spec.
 
 Features:
-- Maintain a list of students (each student is a dict with 'name' and 'grades').
+- Maintain a roster of students (name, grades and running grade statistics),
+  indexed by name so lookups do not scan the whole list.
 - Interactive menu with options to add student, add grades, generate report, find top performer, and exit.
+- Batch mode that streams a CSV or NDJSON file of (student, grade) records
+  and writes the same report, keeping only running statistics per student.
 - Robust input validation and error handling.
 - Clear, consistent output formatting suitable for automated graders.
 
 Usage:
-Run the script and follow on-screen prompts.
+Run the script and follow on-screen prompts, or process a file:
+    python main.py --batch grades.csv [--output report.txt]
+    python main.py --batch grades.ndjson.gz
+CSV rows are `student,grade` (an optional header row is skipped); NDJSON
+lines are objects like {"student": "Ann", "grade": 90}. Files ending in .gz
+are decompressed on the fly.
 """
-from typing import List, Dict, Optional, Tuple
+import argparse
+import csv
+import gzip
+import json
+import sys
+from contextlib import nullcontext
+from typing import IO, ContextManager, Iterable, Iterator, List, Optional, Tuple
 
-
-def find_student(students: List[Dict], name: str) -> Optional[Dict]:
-    """
-    Return the student dictionary matching `name` (case-insensitive),
-    or None if not found.
-    """
-    name_lower = name.strip().lower()
-    for student in students:
-        if student["name"].lower() == name_lower:
-            return student
-    return None
+from roster import Roster, Student
 
 
 def valid_grade_input(s: str) -> Optional[int]:
@@ -52,24 +56,24 @@ def valid_grade_input(s: str) -> Optional[int]:
     return None
 
 
-def add_new_student(students: List[Dict]) -> None:
+def add_new_student(students: Roster) -> None:
     """
-    Prompt user for a student name and add to students list if not present.
+    Prompt user for a student name and add to the roster if not present.
     """
     name = input("Enter student name: ").strip()
     if not name:
         print("No name entered. Student not added.")
         return
 
-    if find_student(students, name) is not None:
+    if name in students:
         print(f"Student '{name}' already exists.")
         return
 
-    students.append({"name": name, "grades": []})
+    students.add(name)
     print(f"Student '{name}' added.")
 
 
-def add_grades_for_student(students: List[Dict]) -> None:
+def add_grades_for_student(students: Roster) -> None:
     """
     Prompt for a student's name and then repeatedly prompt for grades.
     Accepts 'done' (case-insensitive) to finish grade entry.
@@ -80,7 +84,7 @@ def add_grades_for_student(students: List[Dict]) -> None:
         print("No name entered.")
         return
 
-    student = find_student(students, name)
+    student = students.find(name)
     if student is None:
         print(f"Student '{name}' not found.")
         return
@@ -94,8 +98,8 @@ def add_grades_for_student(students: List[Dict]) -> None:
         if grade is None:
             print("Invalid input. Please enter a number between 0 and 100.")
             continue
-        student["grades"].append(grade)
-        print(f"Added grade {grade} for {student['name']}.")
+        students.add_grade(student, grade)
+        print(f"Added grade {grade} for {student.name}.")
 
 
 def compute_average(grades: List[int]) -> Optional[float]:
@@ -108,54 +112,61 @@ def compute_average(grades: List[int]) -> Optional[float]:
     return sum(grades) / len(grades)
 
 
-def generate_full_report(students: List[Dict]) -> None:
+def report_lines(students: Iterable[Student]) -> Iterator[str]:
     """
-    Print a report listing each student's average (or N/A),
-    then print max average, min average, and overall average across students who have grades.
+    Yield the report, one printed line at a time: each student's average
+    (or N/A), then max average, min average, and overall average across
+    students who have grades.
+    Averages come from each student's running statistics, so the report is O(students).
     """
-    print("\n--- Student Report ---")
-    # Print each student's average
-    for student in students:
-        avg = compute_average(student["grades"])
+    # One pass over `students`, so a generator works too
+    rows = [(student.name, student.average) for student in students]
+
+    yield "\n--- Student Report ---"
+    # Each student's average
+    for name, avg in rows:
         if avg is None:
-            print(f"{student['name']}'s average grade is N/A.")
+            yield f"{name}'s average grade is N/A."
         else:
             # Format to one decimal place like in example
-            print(f"{student['name']}'s average grade is {avg:.1f}.")
+            yield f"{name}'s average grade is {avg:.1f}."
 
     # Gather only averages from students who have grades
-    averages = [compute_average(s["grades"]) for s in students if compute_average(s["grades"]) is not None]
+    averages = [avg for _, avg in rows if avg is not None]
 
     if not averages:
-        print("\nNo grades available to compute summary statistics.")
+        yield "\nNo grades available to compute summary statistics."
         return
 
     max_avg = max(averages)
     min_avg = min(averages)
     overall_avg = sum(averages) / len(averages)
 
-    print(f"\nMax Average: {max_avg:.1f}")
-    print(f"Min Average: {min_avg:.1f}")
-    print(f"Overall Average: {overall_avg:.1f}")
+    yield f"\nMax Average: {max_avg:.1f}"
+    yield f"Min Average: {min_avg:.1f}"
+    yield f"Overall Average: {overall_avg:.1f}"
 
 
-def find_top_student(students: List[Dict]) -> None:
+def generate_full_report(students: Iterable[Student]) -> None:
+    """
+    Print the report described in report_lines.
     """
-    Find and print the student with the highest average grade.
+    for line in report_lines(students):
+        print(line)
+
+
+def find_top_student(students: Roster) -> None:
+    """
+    Find and print the student with the highest average grade
+    (the first one entered if several share it), from the roster's heap.
     If no students have grades, print a clear message.
     """
-    top: Optional[Tuple[str, float]] = None  # (name, average)
-    for student in students:
-        avg = compute_average(student["grades"])
-        if avg is None:
-            continue
-        if top is None or avg > top[1]:
-            top = (student["name"], avg)
+    top = students.top_students(1)
 
-    if top is None:
+    if not top:
         print("There is no top student (no students added or no grades entered).")
     else:
-        print(f"The student with the highest average is {top[0]} with a grade of {top[1]:.1f}.")
+        print(f"The student with the highest average is {top[0].name} with a grade of {top[0].average:.1f}.")
 
 
 def print_menu() -> None:
@@ -175,7 +186,7 @@ def main() -> None:
     Main program loop. Uses an infinite loop that exits only when user chooses option 5.
     Uses try/except to handle unexpected user input without crashing.
     """
-    students: List[Dict] = []
+    students = Roster()
 
     while True:
         print_menu()
@@ -198,5 +209,134 @@ def main() -> None:
             print("Invalid choice. Please enter a number between 1 and 5.")
 
 
+def open_text(path: str) -> ContextManager[IO[str]]:
+    """
+    Open `path` for streaming text reads ('-' is stdin), decompressing .gz files.
+    Leaving the `with` block closes the file, but never stdin.
+    """
+    if path == "-":
+        return nullcontext(sys.stdin)
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def read_csv_records(lines: Iterable[str]) -> Iterator[List[str]]:
+    """
+    Yield the [student, grade] rows of a CSV file.
+    A first row whose grade column reads 'grade' is taken as a header.
+    """
+    rows = csv.reader(lines)
+    for row in rows:
+        if not (len(row) >= 2 and row[1].strip().lower() == "grade"):
+            yield row
+        break
+    # The rest at C speed
+    yield from rows
+
+
+def read_ndjson_records(lines: Iterable[str]) -> Iterator[List[str]]:
+    """
+    Yield [student, grade] from NDJSON objects with 'student' and 'grade'.
+    Lines that are not such objects, or whose student is not a string, are
+    yielded as empty records.
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            student = item.get("student")
+        except (ValueError, AttributeError):
+            yield []
+            continue
+        yield [student, str(item.get("grade", ""))] if isinstance(student, str) else []
+
+
+def valid_records(records: Iterable[List[str]], errors: IO[str], max_warnings: int = 20) -> Iterator[Tuple[str, int]]:
+    """
+    Yield (student, grade) for records of exactly a name and a grade accepted
+    by valid_grade_input; report the first few invalid ones on `errors`.
+    """
+    # Exports repeat the same few grade spellings ("90", "85.0", ...), so
+    # remember what valid_grade_input said about each (bounded for junk input)
+    parsed = {}
+    invalid = 0
+    for number, record in enumerate(records, start=1):
+        name, raw = record if len(record) == 2 else ("", "")
+        grade = parsed.get(raw, -1)
+        if grade == -1:
+            grade = valid_grade_input(raw)
+            if len(parsed) < 4096:
+                parsed[raw] = grade
+        if grade is None or not name or name.isspace():
+            invalid += 1
+            if invalid <= max_warnings:
+                print(f"Record {number}: invalid record {record!r} skipped.", file=errors)
+            continue
+        yield name, grade
+    if invalid:
+        print(f"{invalid} invalid record(s) skipped.", file=errors)
+
+
+def aggregate(grades: Iterable[Tuple[str, int]], students: Roster) -> Roster:
+    """
+    Add each (student, grade) to `students`, creating students on first sight.
+    Grades are first summed per spelling of the name in plain lists (the
+    hot loop), then merged into the roster's students in order of appearance.
+    """
+    # name -> [count, total, min, max]
+    totals = {}
+    for name, grade in grades:
+        acc = totals.get(name)
+        if acc is None:
+            totals[name] = [1, grade, grade, grade]
+            continue
+        acc[0] += 1
+        acc[1] += grade
+        if grade < acc[2]:
+            acc[2] = grade
+        elif grade > acc[3]:
+            acc[3] = grade
+    for name, (count, total, lowest, highest) in totals.items():
+        student = students.find(name) or students.add(name)
+        students.add_summary(student, count, total, lowest, highest)
+    return students
+
+
+def run_batch(path: str, file_format: Optional[str], output: IO[str], errors: IO[str] = sys.stderr) -> None:
+    """
+    Stream the records in `path` through validation and aggregation and
+    write the report. Memory is constant per student: grades are not kept.
+    """
+    if file_format is None:
+        stem = path[:-3] if path.endswith(".gz") else path
+        file_format = "ndjson" if stem.endswith((".ndjson", ".jsonl")) else "csv"
+    read = read_ndjson_records if file_format == "ndjson" else read_csv_records
+
+    with open_text(path) as lines:
+        students = aggregate(valid_records(read(lines), errors), Roster(keep_grades=False))
+    for line in report_lines(students):
+        output.write(line + "\n")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Command-line options; without --batch the interactive menu runs.
+    """
+    parser = argparse.ArgumentParser(description="Student Grade Analyzer")
+    parser.add_argument("--batch", metavar="FILE", help="process a CSV/NDJSON file of student,grade records ('-' = stdin)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="input format (default: from the file extension)")
+    parser.add_argument("--output", metavar="FILE", help="write the report here instead of stdout")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    if args.batch is None:
+        main()
+    elif args.output:
+        with open(args.output, "w", encoding="utf-8") as report:
+            run_batch(args.batch, args.format, report)
+    else:
+        run_batch(args.batch, args.format, sys.stdout)
@@ -0,0 +1,175 @@
+"""
+Students and the roster that indexes them.
+
+Each Student keeps running statistics (count, sum, min, max) that are
+updated as grades are appended, so its average is O(1) to read.
+
+The Roster keeps students in a dict keyed by the lowercased name; dicts
+preserve insertion order, so the same structure is both the lookup index
+and the ordered list of students the report walks. Next to it the roster
+keeps a heap of averages for top-performer queries. Entries are never
+updated in place: students whose grades changed get a fresh entry at the
+next query, and their old ones are skipped when they reach the top (lazy
+invalidation).
+"""
+import heapq
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+
+def name_key(name: str) -> str:
+    """
+    Lookup key for a student name: surrounding whitespace ignored, lowercased
+    (not casefolded, so "Straße" and "STRASSE" stay different students).
+    """
+    return name.strip().lower()
+
+
+class Student:
+    """
+    A student's name, grades and running grade statistics.
+    """
+
+    __slots__ = ("name", "grades", "position", "version", "count", "total", "min_grade", "max_grade")
+
+    def __init__(self, name: str, position: int = 0, keep_grades: bool = True):
+        self.name = name
+        # None when only the running statistics are kept (batch processing)
+        self.grades: Optional[List[int]] = [] if keep_grades else None
+        # Insertion order in the roster; breaks ties in favour of the earlier student
+        self.position = position
+        # Bumped on every grade, to recognise stale heap entries
+        self.version = 0
+        self.count = 0
+        self.total = 0
+        self.min_grade: Optional[int] = None
+        self.max_grade: Optional[int] = None
+
+    def add_grade(self, grade: int) -> None:
+        """
+        Append a grade and update the running statistics.
+        """
+        if self.grades is not None:
+            self.grades.append(grade)
+        self.version += 1
+        self.count += 1
+        self.total += grade
+        if self.min_grade is None or grade < self.min_grade:
+            self.min_grade = grade
+        if self.max_grade is None or grade > self.max_grade:
+            self.max_grade = grade
+
+    def add_summary(self, count: int, total: int, lowest: int, highest: int) -> None:
+        """
+        Merge the statistics of `count` grades without their values
+        (only for students that do not keep grades).
+        """
+        if self.grades is not None:
+            raise ValueError("add_summary would leave grades incomplete; add the grades one by one")
+        self.version += 1
+        self.count += count
+        self.total += total
+        if self.min_grade is None or lowest < self.min_grade:
+            self.min_grade = lowest
+        if self.max_grade is None or highest > self.max_grade:
+            self.max_grade = highest
+
+    @property
+    def average(self) -> Optional[float]:
+        """
+        Average grade, or None if the student has no grades.
+        """
+        if not self.count:
+            return None
+        return self.total / self.count
+
+
+# Heap entry: (-average, position, version, student); ordered by highest
+# average, then earliest student. Positions are unique per student and
+# versions per entry of one student, so the Student itself is never compared.
+HeapEntry = Tuple[float, int, int, Student]
+
+
+class Roster:
+    """
+    Ordered collection of students with O(1) lookup by name and
+    O(log n) top-performer queries.
+    """
+
+    def __init__(self, keep_grades: bool = True) -> None:
+        self._students: Dict[str, Student] = {}
+        # False keeps memory constant per student, however many grades arrive
+        self._keep_grades = keep_grades
+        self._heap: List[HeapEntry] = []
+        # Students graded since the last top-performer query
+        self._changed: Set[Student] = set()
+
+    def __len__(self) -> int:
+        return len(self._students)
+
+    def __iter__(self) -> Iterator[Student]:
+        return iter(self._students.values())
+
+    def __contains__(self, name: str) -> bool:
+        return name_key(name) in self._students
+
+    def find(self, name: str) -> Optional[Student]:
+        """
+        Return the student matching `name` (case-insensitive), or None if not found.
+        """
+        return self._students.get(name_key(name))
+
+    def add(self, name: str) -> Student:
+        """
+        Add a student without grades and return it.
+        Raise ValueError if a student with that name already exists.
+        """
+        key = name_key(name)
+        if key in self._students:
+            raise ValueError(f"Student '{name}' already exists.")
+        student = Student(name.strip(), len(self._students), self._keep_grades)
+        self._students[key] = student
+        return student
+
+    def add_grade(self, student: Student, grade: int) -> None:
+        """
+        Record a grade for a student of this roster. O(1); the student is
+        re-ranked at the next top-performer query.
+        """
+        student.add_grade(grade)
+        self._changed.add(student)
+
+    def add_summary(self, student: Student, count: int, total: int, lowest: int, highest: int) -> None:
+        """
+        Record pre-aggregated grades for a student of this roster. O(1).
+        """
+        student.add_summary(count, total, lowest, highest)
+        self._changed.add(student)
+
+    def _rerank(self) -> None:
+        """
+        Push a current heap entry for every changed student, O(log n) each.
+        """
+        for student in self._changed:
+            heapq.heappush(self._heap, (-student.average, student.position, student.version, student))
+        self._changed.clear()
+        # Stale entries pile up as grades arrive; rebuild once they outnumber live ones
+        if len(self._heap) > 2 * len(self._students) + 16:
+            self._heap = [entry for entry in self._heap if entry[2] == entry[3].version]
+            heapq.heapify(self._heap)
+
+    def top_students(self, k: int = 1) -> List[Student]:
+        """
+        The `k` students with the highest averages, best first (earlier
+        student first on ties). Students without grades are never included.
+        O(k log n) plus re-ranking the students graded since the last query:
+        live entries are popped and then pushed back.
+        """
+        self._rerank()
+        found: List[HeapEntry] = []
+        while self._heap and len(found) < k:
+            entry = heapq.heappop(self._heap)
+            if entry[2] == entry[3].version:
+                found.append(entry)
+        for entry in found:
+            heapq.heappush(self._heap, entry)
+        return [entry[3] for entry in found]
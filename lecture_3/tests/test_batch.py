@@ -0,0 +1,131 @@
+import gzip
+import io
+import os
+import sys
+
+import pytest
+
+# Add the lecture_3 directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import read_csv_records, read_ndjson_records, report_lines, run_batch, valid_records
+from roster import Roster
+
+
+def batch_report(path, file_format=None):
+    """Run batch mode on `path`; return the report and the error output."""
+    output, errors = io.StringIO(), io.StringIO()
+    run_batch(str(path), file_format, output, errors)
+    return output.getvalue(), errors.getvalue()
+
+
+class TestReadRecords:
+    """Test cases for the CSV and NDJSON record readers."""
+
+    def test_csv_header_is_skipped(self):
+        """Test a first row whose grade column reads 'grade' is dropped, and only that row."""
+        assert list(read_csv_records(["student,Grade\n", "Ann,90\n"])) == [["Ann", "90"]]
+        assert list(read_csv_records(["Ann,90\n", "Bob,grade\n"])) == [["Ann", "90"], ["Bob", "grade"]]
+
+    def test_ndjson_student_must_be_a_string(self):
+        """Test null, numeric and boolean students become empty (invalid) records."""
+        lines = [
+            '{"student": "Ann", "grade": 90}\n',
+            '{"student": null, "grade": 90}\n',
+            '{"student": 5, "grade": 90}\n',
+            '{"student": true, "grade": 90}\n',
+            "\n",
+            "[1, 2]\n",
+            "not json\n",
+        ]
+        assert list(read_ndjson_records(lines)) == [["Ann", "90"], [], [], [], [], []]
+
+
+class TestValidRecords:
+    """Test cases for record validation and the invalid-record report."""
+
+    def test_valid_and_invalid_records(self):
+        """Test records need exactly a name and a grade in [0, 100]; the rest are reported."""
+        records = [["Ann", "90"], ["Bob", "85.0"], ["Carl", "70", "extra"], ["", "80"], ["Dan", "101"], []]
+        errors = io.StringIO()
+        assert list(valid_records(records, errors)) == [("Ann", 90), ("Bob", 85)]
+        assert errors.getvalue().splitlines() == [
+            "Record 3: invalid record ['Carl', '70', 'extra'] skipped.",
+            "Record 4: invalid record ['', '80'] skipped.",
+            "Record 5: invalid record ['Dan', '101'] skipped.",
+            "Record 6: invalid record [] skipped.",
+            "4 invalid record(s) skipped.",
+        ]
+
+    def test_warnings_are_capped(self):
+        """Test only the first max_warnings invalid records are listed, but all are counted."""
+        errors = io.StringIO()
+        assert list(valid_records([["Ann", "x"]] * 5, errors, max_warnings=2)) == []
+        assert errors.getvalue().splitlines()[-1] == "5 invalid record(s) skipped."
+        assert len(errors.getvalue().splitlines()) == 3
+
+
+class TestRunBatch:
+    """Test cases for the batch mode pipeline."""
+
+    def test_csv_report(self, tmp_path):
+        """Test a CSV file gives the interactive report format."""
+        path = tmp_path / "grades.csv"
+        path.write_text("student,grade\nAnn,90\nBob,80\nAnn,70\n", encoding="utf-8")
+        report, errors = batch_report(path)
+        assert report.splitlines() == [
+            "",
+            "--- Student Report ---",
+            "Ann's average grade is 80.0.",
+            "Bob's average grade is 80.0.",
+            "",
+            "Max Average: 80.0",
+            "Min Average: 80.0",
+            "Overall Average: 80.0",
+        ]
+        assert errors == ""
+
+    def test_gzipped_ndjson(self, tmp_path):
+        """Test a .ndjson.gz file is decompressed and parsed as NDJSON from its extension."""
+        path = tmp_path / "grades.ndjson.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write('{"student": "Ann", "grade": 90}\n{"student": 7, "grade": 50}\n')
+        report, errors = batch_report(path)
+        assert "Ann's average grade is 90.0." in report
+        assert errors.splitlines()[-1] == "1 invalid record(s) skipped."
+
+    def test_stdin_stays_open(self, monkeypatch):
+        """Test reading '-' consumes stdin without closing it."""
+        stdin = io.StringIO("Ann,90\n")
+        monkeypatch.setattr(sys, "stdin", stdin)
+        report, _ = batch_report("-")
+        assert "Ann's average grade is 90.0." in report
+        assert not stdin.closed
+
+    @pytest.mark.parametrize("file_format", ["csv", "ndjson"])
+    def test_empty_input(self, tmp_path, file_format):
+        """Test an empty file reports that there is nothing to summarize."""
+        path = tmp_path / "empty.txt"
+        path.write_text("", encoding="utf-8")
+        report, _ = batch_report(path, file_format)
+        assert "No grades available to compute summary statistics." in report
+
+
+class TestReportLines:
+    """Test cases for the report generator."""
+
+    def test_generator_input_lists_every_student(self):
+        """Test a one-shot generator of students gives the same report as the roster itself."""
+        roster = Roster()
+        for name, grades in (("Ann", [90, 80]), ("Bob", []), ("Cid", [70])):
+            student = roster.add(name)
+            for grade in grades:
+                roster.add_grade(student, grade)
+
+        lines = list(report_lines(student for student in roster))
+        assert lines == list(report_lines(roster))
+        assert lines[1:4] == [
+            "Ann's average grade is 85.0.",
+            "Bob's average grade is N/A.",
+            "Cid's average grade is 70.0.",
+        ]
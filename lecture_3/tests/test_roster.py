@@ -0,0 +1,66 @@
+import os
+import sys
+from typing import Dict, List, Optional
+
+import pytest
+
+# Add the lecture_3 directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from roster import Roster
+
+NAMES = ["Alice", "Straße", "STRASSE", "İlker", "ΣΟΦΙΑ", "Ǆemal"]
+QUERIES = NAMES + ["alice", " ALICE ", "strasse", "straße", "i̇lker", "σοφια", "σοφιας", "ǆemal", "ǅemal", "Bob"]
+
+
+def find_student(students: List[Dict], name: str) -> Optional[Dict]:
+    """The linear lookup the Roster replaced, as main.py had it."""
+    name_lower = name.strip().lower()
+    for student in students:
+        if student["name"].lower() == name_lower:
+            return student
+    return None
+
+
+def add_both(roster: Roster, students: List[Dict], name: str) -> bool:
+    """Add `name` the old way and the Roster way; return whether each accepted it."""
+    old = find_student(students, name) is None
+    if old:
+        students.append({"name": name.strip(), "grades": []})
+    try:
+        roster.add(name)
+        new = True
+    except ValueError:
+        new = False
+    assert old == new, name
+    return new
+
+
+class TestRoster:
+    """Test cases for name lookups in the Roster."""
+
+    def test_duplicates_match_find_student(self):
+        """Test the Roster rejects exactly the names the linear find_student reported as duplicates."""
+        roster, students = Roster(), []
+        accepted = [name for name in NAMES + QUERIES if add_both(roster, students, name)]
+        assert "Straße" in accepted and "STRASSE" in accepted
+        assert [student.name for student in roster] == [student["name"] for student in students]
+
+    def test_lookups_match_find_student(self):
+        """Test find returns the student find_student returned, for every query."""
+        roster, students = Roster(), []
+        for name in NAMES:
+            add_both(roster, students, name)
+        for query in QUERIES:
+            expected = find_student(students, query)
+            found = roster.find(query)
+            assert (found and found.name) == (expected and expected["name"]), query
+            assert (query in roster) == (expected is not None)
+
+    def test_add_strips_and_rejects_case_variants(self):
+        """Test a name differing only in case or surrounding whitespace is a duplicate."""
+        roster = Roster()
+        roster.add("  Alice Johnson ")
+        with pytest.raises(ValueError):
+            roster.add("alice johnson")
+        assert roster.find("ALICE JOHNSON").name == "Alice Johnson"
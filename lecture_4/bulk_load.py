@@ -0,0 +1,286 @@
+"""
+Student Grades Manager — bulk loader.
+Builds a school database far larger than the sample in create_database.py,
+either from synthetic data (deterministic for a given seed) or from CSV
+exports of real students and grades.
+
+The load is tuned for throughput:
+- rows are streamed in fixed-size chunks, one transaction per chunk, so
+  memory stays flat however many rows there are;
+- indexes are created once after the load instead of being updated on every insert;
+- the grade stats triggers are dropped during the load; the stats tables
+  are then rebuilt in one pass and the triggers recreated. This also
+  happens when the load fails part way (e.g. on an invalid CSV row), so
+  the rows loaded until then are indexed and their stats are consistent;
+- bulk-load pragmas (in-memory journal, no fsync, large page cache) are
+  applied while ingesting and the previous settings restored afterwards.
+
+Usage:
+    python bulk_load.py --db big.db --students 1000000 --grades-per-student 10 --seed 42
+    python bulk_load.py --db export.db --students-csv students.csv --grades-csv grades.csv
+
+CSV files need a header row: `full_name,birth_year` (plus an optional `id`)
+for students and `student_id,subject,grade` for grades.
+"""
+
+import argparse
+import csv
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+from itertools import accumulate, islice, repeat
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from create_database import create_connection, create_indexes, create_tables
+from grade_stats import create_triggers, drop_triggers, rebuild_stats
+
+FIRST_NAMES = [
+    "Alice", "Brian", "Carla", "Daniel", "Eva", "Felix", "Grace", "Henry", "Isabella", "Jack",
+    "Karen", "Liam", "Maya", "Noah", "Olivia", "Pablo", "Quinn", "Rosa", "Samuel", "Tara",
+]
+LAST_NAMES = [
+    "Johnson", "Smith", "Reyes", "Kim", "Thompson", "Nguyen", "Patel", "Lopez", "Martinez", "Brown",
+    "Garcia", "Wilson", "Anderson", "Chen", "Taylor", "Moore", "Clark", "Lewis", "Walker", "Young",
+]
+SUBJECTS = ["Math", "English", "Science", "History", "Art", "Physical Education", "Music", "Geography"]
+# Grades 1..100 drawn with triangular weights peaking at 85 (zero below 40)
+GRADE_VALUES = list(range(1, 101))
+GRADE_WEIGHTS = list(accumulate(
+    0 if g < 40 else (g - 39) / 46 if g <= 85 else (101 - g) / 16 for g in GRADE_VALUES
+))
+
+# Settings applied for the duration of a load. The journal stays in memory
+# rather than OFF so that a failed chunk (e.g. a bad CSV grade) still rolls back.
+# Foreign keys are enforced so that a grade for an unknown student fails its
+# chunk instead of creating an orphan grade (and student_stats row).
+BULK_PRAGMAS = {
+    "journal_mode": "MEMORY",
+    "synchronous": "OFF",
+    "cache_size": -262144,  # KiB, i.e. 256 MB
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+STUDENT_INSERT = "INSERT INTO students (id, full_name, birth_year) VALUES (?, ?, ?);"
+GRADE_INSERT = "INSERT INTO grades (student_id, subject, grade) VALUES (?, ?, ?);"
+
+
+def generate_students(count: int, seed: int) -> Iterator[Tuple[int, str, int]]:
+    """
+    Yield synthetic students as (id, full_name, birth_year), ids 1..count.
+
+    Args:
+        count (int): Number of students.
+        seed (int): Random seed; the same seed always yields the same rows.
+    """
+    rng = random.Random(seed)
+    for student_id in range(1, count + 1):
+        yield student_id, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", rng.randint(2000, 2008)
+
+
+def generate_grades(student_count: int, grades_per_student: int, seed: int) -> Iterator[Tuple[int, str, int]]:
+    """
+    Yield synthetic grades as (student_id, subject, grade) for students 1..student_count.
+    Each student gets between 1 and 2 * grades_per_student - 1 grades
+    (grades_per_student on average), clustered around the mid-80s.
+
+    Args:
+        student_count (int): Number of students the grades refer to.
+        grades_per_student (int): Average number of grades per student.
+        seed (int): Random seed; the same seed always yields the same rows.
+    """
+    # A separate stream from the students', so either can be regenerated alone
+    rng = random.Random(seed + 1)
+    for student_id in range(1, student_count + 1):
+        n = rng.randint(1, max(1, 2 * grades_per_student - 1))
+        # One choices() call per column is several times faster than a draw per value
+        subjects = rng.choices(SUBJECTS, k=n)
+        grades = rng.choices(GRADE_VALUES, cum_weights=GRADE_WEIGHTS, k=n)
+        yield from zip(repeat(student_id, n), subjects, grades)
+
+
+def read_students_csv(path: str) -> Iterator[Tuple[Optional[int], str, int]]:
+    """
+    Yield (id, full_name, birth_year) rows from a students CSV export.
+    The id is None when the file has no `id` column, letting SQLite assign it.
+
+    Args:
+        path (str): Path to a CSV file with a header row.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            student_id = row.get("id")
+            yield (int(student_id) if student_id else None), row["full_name"], int(row["birth_year"])
+
+
+def read_grades_csv(path: str) -> Iterator[Tuple[int, str, int]]:
+    """
+    Yield (student_id, subject, grade) rows from a grades CSV export.
+
+    Args:
+        path (str): Path to a CSV file with a header row.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield int(row["student_id"]), row["subject"], int(row["grade"])
+
+
+@contextmanager
+def bulk_pragmas(conn: sqlite3.Connection, pragmas: Dict[str, object] = BULK_PRAGMAS) -> Iterator[None]:
+    """
+    Apply `pragmas` for the duration of the block and restore the previous values afterwards,
+    also when the load fails.
+
+    Args:
+        conn (sqlite3.Connection): Connection outside of any transaction.
+        pragmas (dict): Pragma name -> value to apply.
+    """
+    saved = {name: conn.execute(f"PRAGMA {name};").fetchone()[0] for name in pragmas}
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value};")
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            conn.execute(f"PRAGMA {name} = {value};")
+
+
+def insert_chunked(conn: sqlite3.Connection, sql: str, rows: Iterable[tuple], chunk_size: int) -> int:
+    """
+    Insert rows in transactions of `chunk_size` rows, never holding more than
+    one chunk in memory. A failing chunk is rolled back; earlier ones stay committed.
+
+    Args:
+        conn (sqlite3.Connection): Connection in autocommit mode (isolation_level None).
+        sql (str): Parameterized INSERT statement.
+        rows (iterable): Parameter tuples, consumed lazily.
+        chunk_size (int): Rows per transaction.
+    Returns:
+        int: Number of rows inserted.
+    """
+    rows = iter(rows)
+    total = 0
+    while True:
+        conn.execute("BEGIN;")
+        try:
+            inserted = conn.executemany(sql, islice(rows, chunk_size)).rowcount
+        except BaseException:
+            conn.execute("ROLLBACK;")
+            raise
+        conn.execute("COMMIT;")
+        total += max(inserted, 0)
+        if inserted < chunk_size:
+            return total
+
+
+def report(label: str, rows: int, seconds: float) -> None:
+    """
+    Print the row count and throughput of one load step.
+    """
+    rate = rows / seconds if seconds > 0 else float("inf")
+    print(f"{label:<10} {rows:>12,} rows in {seconds:8.2f} s ({rate:>12,.0f} rows/s)")
+
+
+def finish_load(conn: sqlite3.Connection) -> None:
+    """
+    Build the indexes and the grade stats, recreate the stats triggers and
+    refresh the planner statistics over the rows loaded so far.
+
+    Args:
+        conn (sqlite3.Connection): Connection the rows were loaded through.
+    """
+    step = time.perf_counter()
+    create_indexes(conn)
+    print(f"{'indexes':<10} built in {time.perf_counter() - step:8.2f} s")
+
+    step = time.perf_counter()
+    rebuild_stats(conn)
+    create_triggers(conn)
+    conn.execute("ANALYZE;")
+    print(f"{'stats':<10} built in {time.perf_counter() - step:8.2f} s")
+
+
+def load(
+    db_name: str,
+    students: Iterable[tuple],
+    grades: Iterable[tuple],
+    chunk_size: int = 50_000,
+) -> Tuple[int, int]:
+    """
+    Recreate the tables in `db_name`, stream in students and grades,
+    then build the indexes and grade stats and refresh the planner statistics.
+    If a chunk fails, its exception propagates after the rows of the earlier
+    chunks have been given indexes, stats and triggers all the same.
+
+    Args:
+        db_name (str): SQLite database file; existing tables are dropped.
+        students (iterable): (id, full_name, birth_year) rows; id may be None.
+        grades (iterable): (student_id, subject, grade) rows.
+        chunk_size (int): Rows per transaction.
+    Returns:
+        tuple: Number of students and of grades loaded.
+    """
+    conn = create_connection(db_name)
+    try:
+        create_tables(conn)
+        # One rebuild after the load beats firing the triggers once per grade
+        drop_triggers(conn)
+        # Transactions are managed by insert_chunked
+        conn.isolation_level = None
+        started = time.perf_counter()
+        with bulk_pragmas(conn):
+            try:
+                step = time.perf_counter()
+                student_count = insert_chunked(conn, STUDENT_INSERT, students, chunk_size)
+                report("students", student_count, time.perf_counter() - step)
+
+                step = time.perf_counter()
+                grade_count = insert_chunked(conn, GRADE_INSERT, grades, chunk_size)
+                report("grades", grade_count, time.perf_counter() - step)
+            finally:
+                finish_load(conn)
+        report("total", student_count + grade_count, time.perf_counter() - started)
+    finally:
+        conn.close()
+    return student_count, grade_count
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Command-line options: a synthetic size and seed, or CSV files to import.
+    """
+    parser = argparse.ArgumentParser(description="Bulk-load students and grades into a school database.")
+    parser.add_argument("--db", default="school_large.db", help="database file to (re)create")
+    parser.add_argument("--students", type=int, default=100_000, help="number of synthetic students")
+    parser.add_argument("--grades-per-student", type=int, default=10, help="average synthetic grades per student")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic data")
+    parser.add_argument("--students-csv", metavar="FILE", help="import students from this CSV instead")
+    parser.add_argument("--grades-csv", metavar="FILE", help="import grades from this CSV instead")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="rows per transaction")
+    args = parser.parse_args()
+    if (args.students_csv is None) != (args.grades_csv is None):
+        parser.error("--students-csv and --grades-csv must be given together")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be positive")
+    return args
+
+
+def main() -> None:
+    """
+    Main execution function: picks the data source and runs the load.
+    """
+    args = parse_args()
+    if args.students_csv:
+        print(f"Importing {args.students_csv} and {args.grades_csv} into {args.db} ...")
+        students = read_students_csv(args.students_csv)
+        grades = read_grades_csv(args.grades_csv)
+    else:
+        print(f"Generating {args.students:,} students (seed {args.seed}) into {args.db} ...")
+        students = generate_students(args.students, args.seed)
+        grades = generate_grades(args.students, args.grades_per_student, args.seed)
+    load(args.db, students, grades, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
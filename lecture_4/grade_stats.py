@@ -0,0 +1,220 @@
+"""
+Student Grades Manager — incrementally maintained grade statistics.
+student_stats and subject_stats hold the number, sum, minimum and maximum
+of the grades of each student and of each subject. Triggers on `grades`
+keep them current on every insert, update and delete, so averages and
+top-N reports read one row per student or subject instead of aggregating
+the whole grades table.
+
+Adding a grade only adjusts the counters. Removing one can only lower the
+count and sum; if it was the minimum or maximum, that bound is recomputed
+from the remaining grades of the student or subject (an index lookup).
+
+Usage:
+    python grade_stats.py check [--db school.db]    # diff the tables against the live aggregates
+    python grade_stats.py rebuild [--db school.db]  # recompute them from grades
+The rebuild also adds the tables to databases created without them, and
+always (re)creates the triggers.
+"""
+
+import argparse
+import sqlite3
+import sys
+from typing import List, Tuple
+
+# Table -> key column; both tables share the statistics columns
+STATS_TABLES = {"student_stats": "student_id", "subject_stats": "subject"}
+
+TABLE_DDL = {
+    "student_stats": """
+        CREATE TABLE student_stats (
+            student_id INTEGER PRIMARY KEY,
+            grade_count INTEGER NOT NULL,
+            grade_sum INTEGER NOT NULL,
+            min_grade INTEGER NOT NULL,
+            max_grade INTEGER NOT NULL
+        );
+    """,
+    "subject_stats": """
+        CREATE TABLE subject_stats (
+            subject TEXT PRIMARY KEY,
+            grade_count INTEGER NOT NULL,
+            grade_sum INTEGER NOT NULL,
+            min_grade INTEGER NOT NULL,
+            max_grade INTEGER NOT NULL
+        ) WITHOUT ROWID;
+    """,
+}
+
+# Statements adding grade {row}.grade to the stats of {row}.{key}
+ADD_GRADE = """
+    INSERT INTO {table} ({key}, grade_count, grade_sum, min_grade, max_grade)
+    VALUES ({row}.{key}, 1, {row}.grade, {row}.grade, {row}.grade)
+    ON CONFLICT ({key}) DO UPDATE SET
+        grade_count = grade_count + 1,
+        grade_sum = grade_sum + excluded.grade_sum,
+        min_grade = MIN(min_grade, excluded.min_grade),
+        max_grade = MAX(max_grade, excluded.max_grade);
+"""
+
+# Statements removing grade {row}.grade from the stats of {row}.{key}: the row
+# goes when its last grade does, otherwise the counters are adjusted. They run
+# after the grade left `grades`, so the subqueries see the remaining grades only.
+REMOVE_GRADE = """
+    DELETE FROM {table} WHERE {key} = {row}.{key} AND grade_count = 1;
+    UPDATE {table} SET
+        grade_count = grade_count - 1,
+        grade_sum = grade_sum - {row}.grade,
+        min_grade = CASE WHEN {row}.grade > min_grade THEN min_grade
+            ELSE (SELECT MIN(grade) FROM grades WHERE {key} = {row}.{key}) END,
+        max_grade = CASE WHEN {row}.grade < max_grade THEN max_grade
+            ELSE (SELECT MAX(grade) FROM grades WHERE {key} = {row}.{key}) END
+    WHERE {key} = {row}.{key};
+"""
+
+
+def _body(*steps: str) -> str:
+    """
+    Trigger body applying ADD_GRADE/REMOVE_GRADE templates (formatted with
+    `row`) to both stats tables.
+    """
+    return "".join(
+        step.format(table=table, key=key) for step in steps for table, key in STATS_TABLES.items()
+    )
+
+
+TRIGGER_DDL = {
+    "grades_stats_insert": "CREATE TRIGGER grades_stats_insert AFTER INSERT ON grades BEGIN"
+    + _body(ADD_GRADE.replace("{row}", "NEW")) + "END;",
+    "grades_stats_delete": "CREATE TRIGGER grades_stats_delete AFTER DELETE ON grades BEGIN"
+    + _body(REMOVE_GRADE.replace("{row}", "OLD")) + "END;",
+    # An update is the removal of the old grade plus the addition of the new one
+    "grades_stats_update": "CREATE TRIGGER grades_stats_update AFTER UPDATE OF student_id, subject, grade ON grades BEGIN"
+    + _body(REMOVE_GRADE.replace("{row}", "OLD"), ADD_GRADE.replace("{row}", "NEW")) + "END;",
+}
+
+# The aggregates the tables must match, computed from grades
+LIVE_STATS = """
+SELECT {key}, COUNT(*), SUM(grade), MIN(grade), MAX(grade)
+FROM grades
+GROUP BY {key}
+"""
+
+
+def create_stats(conn: sqlite3.Connection) -> None:
+    """
+    (Re)create the empty stats tables and their triggers.
+    Call on an empty grades table, or run rebuild_stats afterwards.
+
+    Args:
+        conn (sqlite3.Connection): Active database connection.
+    """
+    for table, ddl in TABLE_DDL.items():
+        conn.execute(f"DROP TABLE IF EXISTS {table};")
+        conn.execute(ddl)
+    create_triggers(conn)
+    conn.commit()
+
+
+def has_stats(conn: sqlite3.Connection) -> bool:
+    """
+    Whether the database has both stats tables and the triggers that keep
+    them current.
+
+    Args:
+        conn (sqlite3.Connection): Active database connection.
+    """
+    expected = [("table", table) for table in STATS_TABLES] + [("trigger", name) for name in TRIGGER_DDL]
+    found = {tuple(row) for row in conn.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'trigger');")}
+    return all(entry in found for entry in expected)
+
+
+def drop_triggers(conn: sqlite3.Connection) -> None:
+    """
+    Drop the maintenance triggers, e.g. before a bulk load; the tables go
+    stale until rebuild_stats and create_triggers run.
+
+    Args:
+        conn (sqlite3.Connection): Active database connection.
+    """
+    for name in TRIGGER_DDL:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name};")
+
+
+def create_triggers(conn: sqlite3.Connection) -> None:
+    """
+    Create the maintenance triggers (replacing existing ones).
+
+    Args:
+        conn (sqlite3.Connection): Active database connection.
+    """
+    drop_triggers(conn)
+    for ddl in TRIGGER_DDL.values():
+        conn.execute(ddl)
+
+
+def rebuild_stats(conn: sqlite3.Connection) -> None:
+    """
+    Recompute both stats tables from grades, one scan each.
+
+    Args:
+        conn (sqlite3.Connection): Active database connection.
+    """
+    for table, key in STATS_TABLES.items():
+        conn.execute(f"DELETE FROM {table};")
+        conn.execute(f"INSERT INTO {table} {LIVE_STATS.format(key=key)};")
+    conn.commit()
+
+
+def diff_stats(conn: sqlite3.Connection) -> List[Tuple[str, str, tuple]]:
+    """
+    Compare the stats tables with aggregates recomputed from grades.
+
+    Args:
+        conn (sqlite3.Connection): Active database connection.
+    Returns:
+        list: (table, problem, row) for every mismatch; problem is "missing"
+            for live aggregates absent or different in the table and "stale"
+            for table rows that match no live aggregate. Empty if consistent.
+    """
+    problems = []
+    for table, key in STATS_TABLES.items():
+        live = LIVE_STATS.format(key=key)
+        stored = f"SELECT {key}, grade_count, grade_sum, min_grade, max_grade FROM {table}"
+        problems += [(table, "missing", tuple(row)) for row in conn.execute(f"{live} EXCEPT {stored}")]
+        problems += [(table, "stale", tuple(row)) for row in conn.execute(f"{stored} EXCEPT {live}")]
+    return problems
+
+
+def main() -> None:
+    """
+    Main execution function: checks or rebuilds the stats of a database.
+    Exits with status 1 when the check finds mismatches.
+    """
+    parser = argparse.ArgumentParser(description="Check or rebuild the grade stats tables.")
+    parser.add_argument("command", choices=["check", "rebuild"])
+    parser.add_argument("--db", default="school.db", help="database file")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.command == "rebuild":
+            if not has_stats(conn):
+                create_stats(conn)
+            # Recreate the triggers too, in case they were dropped by hand
+            create_triggers(conn)
+            rebuild_stats(conn)
+            print("Stats rebuilt.")
+            return
+        problems = diff_stats(conn)
+        for table, problem, row in problems:
+            print(f"{table}: {problem} {row}")
+        print(f"{len(problems)} mismatch(es)." if problems else "Stats are consistent.")
+        if problems:
+            sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
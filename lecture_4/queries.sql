@@ -29,9 +29,116 @@ CREATE TABLE grades (
 );
 
 
--- Optional but recommended for speed
-CREATE INDEX idx_grades_student ON grades(student_id);
-CREATE INDEX idx_grades_subject ON grades(subject);
+-- Optional but recommended for speed (see create_indexes in create_database.py)
+-- Covering indexes: per-student and per-subject grade lookups never touch the table
+CREATE INDEX idx_grades_student_grade ON grades(student_id, grade);
+CREATE INDEX idx_grades_subject_grade ON grades(subject, grade);
+-- Partial index with only the low grades, for query (8)
+CREATE INDEX idx_grades_low ON grades(student_id, grade) WHERE grade < 80;
+-- Name lookups for query (3); (birth_year, full_name) covers query (5)
+CREATE INDEX idx_students_full_name ON students(full_name);
+CREATE INDEX idx_students_birth_year_name ON students(birth_year, full_name);
+
+
+-- Grade statistics per student and per subject, kept current by the
+-- triggers below; queries (4), (6) and (7) read these instead of
+-- aggregating grades (see grade_stats.py)
+DROP TABLE IF EXISTS student_stats;
+DROP TABLE IF EXISTS subject_stats;
+
+CREATE TABLE student_stats (
+    student_id INTEGER PRIMARY KEY,
+    grade_count INTEGER NOT NULL,
+    grade_sum INTEGER NOT NULL,
+    min_grade INTEGER NOT NULL,
+    max_grade INTEGER NOT NULL
+);
+
+CREATE TABLE subject_stats (
+    subject TEXT PRIMARY KEY,
+    grade_count INTEGER NOT NULL,
+    grade_sum INTEGER NOT NULL,
+    min_grade INTEGER NOT NULL,
+    max_grade INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TRIGGER grades_stats_insert AFTER INSERT ON grades BEGIN
+    INSERT INTO student_stats (student_id, grade_count, grade_sum, min_grade, max_grade)
+    VALUES (NEW.student_id, 1, NEW.grade, NEW.grade, NEW.grade)
+    ON CONFLICT (student_id) DO UPDATE SET
+        grade_count = grade_count + 1,
+        grade_sum = grade_sum + excluded.grade_sum,
+        min_grade = MIN(min_grade, excluded.min_grade),
+        max_grade = MAX(max_grade, excluded.max_grade);
+
+    INSERT INTO subject_stats (subject, grade_count, grade_sum, min_grade, max_grade)
+    VALUES (NEW.subject, 1, NEW.grade, NEW.grade, NEW.grade)
+    ON CONFLICT (subject) DO UPDATE SET
+        grade_count = grade_count + 1,
+        grade_sum = grade_sum + excluded.grade_sum,
+        min_grade = MIN(min_grade, excluded.min_grade),
+        max_grade = MAX(max_grade, excluded.max_grade);
+END;
+
+CREATE TRIGGER grades_stats_delete AFTER DELETE ON grades BEGIN
+    DELETE FROM student_stats WHERE student_id = OLD.student_id AND grade_count = 1;
+    UPDATE student_stats SET
+        grade_count = grade_count - 1,
+        grade_sum = grade_sum - OLD.grade,
+        min_grade = CASE WHEN OLD.grade > min_grade THEN min_grade
+            ELSE (SELECT MIN(grade) FROM grades WHERE student_id = OLD.student_id) END,
+        max_grade = CASE WHEN OLD.grade < max_grade THEN max_grade
+            ELSE (SELECT MAX(grade) FROM grades WHERE student_id = OLD.student_id) END
+    WHERE student_id = OLD.student_id;
+
+    DELETE FROM subject_stats WHERE subject = OLD.subject AND grade_count = 1;
+    UPDATE subject_stats SET
+        grade_count = grade_count - 1,
+        grade_sum = grade_sum - OLD.grade,
+        min_grade = CASE WHEN OLD.grade > min_grade THEN min_grade
+            ELSE (SELECT MIN(grade) FROM grades WHERE subject = OLD.subject) END,
+        max_grade = CASE WHEN OLD.grade < max_grade THEN max_grade
+            ELSE (SELECT MAX(grade) FROM grades WHERE subject = OLD.subject) END
+    WHERE subject = OLD.subject;
+END;
+
+CREATE TRIGGER grades_stats_update AFTER UPDATE OF student_id, subject, grade ON grades BEGIN
+    DELETE FROM student_stats WHERE student_id = OLD.student_id AND grade_count = 1;
+    UPDATE student_stats SET
+        grade_count = grade_count - 1,
+        grade_sum = grade_sum - OLD.grade,
+        min_grade = CASE WHEN OLD.grade > min_grade THEN min_grade
+            ELSE (SELECT MIN(grade) FROM grades WHERE student_id = OLD.student_id) END,
+        max_grade = CASE WHEN OLD.grade < max_grade THEN max_grade
+            ELSE (SELECT MAX(grade) FROM grades WHERE student_id = OLD.student_id) END
+    WHERE student_id = OLD.student_id;
+
+    DELETE FROM subject_stats WHERE subject = OLD.subject AND grade_count = 1;
+    UPDATE subject_stats SET
+        grade_count = grade_count - 1,
+        grade_sum = grade_sum - OLD.grade,
+        min_grade = CASE WHEN OLD.grade > min_grade THEN min_grade
+            ELSE (SELECT MIN(grade) FROM grades WHERE subject = OLD.subject) END,
+        max_grade = CASE WHEN OLD.grade < max_grade THEN max_grade
+            ELSE (SELECT MAX(grade) FROM grades WHERE subject = OLD.subject) END
+    WHERE subject = OLD.subject;
+
+    INSERT INTO student_stats (student_id, grade_count, grade_sum, min_grade, max_grade)
+    VALUES (NEW.student_id, 1, NEW.grade, NEW.grade, NEW.grade)
+    ON CONFLICT (student_id) DO UPDATE SET
+        grade_count = grade_count + 1,
+        grade_sum = grade_sum + excluded.grade_sum,
+        min_grade = MIN(min_grade, excluded.min_grade),
+        max_grade = MAX(max_grade, excluded.max_grade);
+
+    INSERT INTO subject_stats (subject, grade_count, grade_sum, min_grade, max_grade)
+    VALUES (NEW.subject, 1, NEW.grade, NEW.grade, NEW.grade)
+    ON CONFLICT (subject) DO UPDATE SET
+        grade_count = grade_count + 1,
+        grade_sum = grade_sum + excluded.grade_sum,
+        min_grade = MIN(min_grade, excluded.min_grade),
+        max_grade = MAX(max_grade, excluded.max_grade);
+END;
 
 
 
@@ -76,6 +183,8 @@ INSERT INTO grades (student_id, subject, grade) VALUES
 -- ============================
 -- 3. SELECT QUERIES
 -- ============================
+-- reports.py runs these with bound parameters (student name,
+-- birth year, top-N limit, grade threshold) instead of literals.
 
 -- (3) Find all grades for Alice Johnson
 SELECT s.full_name, g.subject, g.grade
@@ -88,38 +197,37 @@ ORDER BY g.subject;
 -- (4) Average grade per student
 SELECT 
     s.full_name,
-    ROUND(AVG(g.grade), 2) AS average_grade,
-    COUNT(g.id) AS total_grades
+    ROUND(CAST(st.grade_sum AS REAL) / st.grade_count, 2) AS average_grade,
+    COALESCE(st.grade_count, 0) AS total_grades
 FROM students s
-LEFT JOIN grades g ON s.id = g.student_id
-GROUP BY s.id
-ORDER BY average_grade DESC;
+LEFT JOIN student_stats st ON s.id = st.student_id
+ORDER BY average_grade DESC, s.id;
 
 
 -- (5) Students born after 2004
+-- The unary + keeps idx_students_full_name from serving the ORDER BY, which
+-- would walk every student: the birth year range is searched and sorted instead
 SELECT id, full_name, birth_year
 FROM students
 WHERE birth_year > 2004
-ORDER BY full_name;
+ORDER BY +full_name;
 
 
 -- (6) Subjects and their average grades
 SELECT 
     subject,
-    ROUND(AVG(grade), 2) AS average_grade
-FROM grades
-GROUP BY subject
-ORDER BY average_grade DESC;
+    ROUND(CAST(grade_sum AS REAL) / grade_count, 2) AS average_grade
+FROM subject_stats
+ORDER BY average_grade DESC, subject;
 
 
 -- (7) Top 3 students by average grade
 SELECT
     s.full_name,
-    ROUND(AVG(g.grade), 2) AS average_grade
-FROM students s
-JOIN grades g ON s.id = g.student_id
-GROUP BY s.id
-ORDER BY average_grade DESC
+    ROUND(CAST(st.grade_sum AS REAL) / st.grade_count, 2) AS average_grade
+FROM student_stats st
+JOIN students s ON s.id = st.student_id
+ORDER BY average_grade DESC, s.id
 LIMIT 3;
 
 
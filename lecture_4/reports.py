@@ -0,0 +1,262 @@
+"""
+Student Grades Manager — report queries.
+The SELECT queries (3)-(8) of queries.sql as parameterized Python functions.
+
+A ReportService holds one long-lived connection. Every report is a constant
+SQL text with bound parameters, so sqlite3's statement cache prepares each
+query once per connection and reuses it on later calls instead of parsing
+the SQL again. Reports return the cursor itself: rows are fetched lazily as
+the caller iterates.
+
+Queries (4), (6) and (7) read the grade_stats summary tables. The service
+only reads: a database without the tables or their triggers is refused
+until `python grade_stats.py rebuild` has been run on it.
+
+Usage:
+    python reports.py student-grades "Alice Johnson"
+    python reports.py top-students --limit 10 --db school_large.db
+    python reports.py --list
+"""
+
+import argparse
+import sqlite3
+from typing import Dict, List, Optional
+
+import grade_stats
+
+# (3) All grades of one student
+STUDENT_GRADES = """
+SELECT s.full_name, g.subject, g.grade
+FROM students s
+JOIN grades g ON s.id = g.student_id
+WHERE s.full_name = :full_name
+ORDER BY g.subject;
+"""
+
+# (4) Average grade per student
+STUDENT_AVERAGES = """
+SELECT
+    s.full_name,
+    ROUND(CAST(st.grade_sum AS REAL) / st.grade_count, 2) AS average_grade,
+    COALESCE(st.grade_count, 0) AS total_grades
+FROM students s
+LEFT JOIN student_stats st ON s.id = st.student_id
+ORDER BY average_grade DESC, s.id;
+"""
+
+# (5) Students born after a given year; +full_name makes the planner search
+# the birth year range and sort it rather than walk idx_students_full_name
+STUDENTS_BORN_AFTER = """
+SELECT id, full_name, birth_year
+FROM students
+WHERE birth_year > :year
+ORDER BY +full_name;
+"""
+
+# (6) Subjects and their average grades
+SUBJECT_AVERAGES = """
+SELECT
+    subject,
+    ROUND(CAST(grade_sum AS REAL) / grade_count, 2) AS average_grade
+FROM subject_stats
+ORDER BY average_grade DESC, subject;
+"""
+
+# (7) Top N students by average grade
+TOP_STUDENTS = """
+SELECT
+    s.full_name,
+    ROUND(CAST(st.grade_sum AS REAL) / st.grade_count, 2) AS average_grade
+FROM student_stats st
+JOIN students s ON s.id = st.student_id
+ORDER BY average_grade DESC, s.id
+LIMIT :limit;
+"""
+
+# (8) Students who scored below a threshold at least once
+STUDENTS_BELOW = """
+SELECT DISTINCT
+    s.full_name
+FROM students s
+JOIN grades g ON s.id = g.student_id
+WHERE g.grade < :threshold
+ORDER BY s.full_name;
+"""
+
+# (8) for thresholds up to 80: the literal bound repeats the WHERE clause of
+# the partial index idx_grades_low, which lets the planner use that index
+# (it does not rely on the value bound to :threshold)
+LOW_GRADE_BOUND = 80
+STUDENTS_BELOW_LOW = STUDENTS_BELOW.replace(
+    "WHERE g.grade < :threshold", f"WHERE g.grade < :threshold AND g.grade < {LOW_GRADE_BOUND}"
+)
+
+# Report name -> SQL, for the CLI and for tooling that walks every report
+QUERIES: Dict[str, str] = {
+    "student-grades": STUDENT_GRADES,
+    "student-averages": STUDENT_AVERAGES,
+    "born-after": STUDENTS_BORN_AFTER,
+    "subject-averages": SUBJECT_AVERAGES,
+    "top-students": TOP_STUDENTS,
+    "below": STUDENTS_BELOW,
+}
+
+
+def students_below_sql(threshold: int) -> str:
+    """
+    The query (8) text for `threshold`: STUDENTS_BELOW_LOW when the partial
+    index covers it, STUDENTS_BELOW otherwise. Both are constant texts, so
+    each is prepared once.
+    """
+    return STUDENTS_BELOW_LOW if threshold <= LOW_GRADE_BOUND else STUDENTS_BELOW
+
+
+class ReportService:
+    """
+    The report queries over one reusable connection.
+
+    Args:
+        db_name (str): SQLite database file.
+        cached_statements (int): Size of the connection's prepared statement cache.
+    """
+
+    def __init__(self, db_name: str = "school.db", cached_statements: int = 128):
+        self.conn = sqlite3.connect(db_name, cached_statements=cached_statements)
+        self.conn.row_factory = sqlite3.Row
+        if not grade_stats.has_stats(self.conn):
+            self.conn.close()
+            raise ValueError(
+                f"{db_name} has no up-to-date grade stats; run `python grade_stats.py rebuild --db {db_name}` first."
+            )
+
+    def __enter__(self) -> "ReportService":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the connection; the service cannot be used afterwards.
+        """
+        self.conn.close()
+
+    def _run(self, sql: str, params: Optional[dict] = None) -> sqlite3.Cursor:
+        """
+        Execute one report; the returned cursor yields its rows lazily.
+        """
+        return self.conn.execute(sql, params or {})
+
+    def student_grades(self, full_name: str) -> sqlite3.Cursor:
+        """
+        Query (3): full_name, subject and grade of every grade of one student.
+
+        Args:
+            full_name (str): Exact full name of the student.
+        """
+        return self._run(STUDENT_GRADES, {"full_name": full_name})
+
+    def student_averages(self) -> sqlite3.Cursor:
+        """
+        Query (4): full_name, average_grade and total_grades of every student, best first.
+        """
+        return self._run(STUDENT_AVERAGES)
+
+    def students_born_after(self, year: int = 2004) -> sqlite3.Cursor:
+        """
+        Query (5): id, full_name and birth_year of students born after `year`.
+
+        Args:
+            year (int): Exclusive lower bound on birth_year.
+        """
+        return self._run(STUDENTS_BORN_AFTER, {"year": year})
+
+    def subject_averages(self) -> sqlite3.Cursor:
+        """
+        Query (6): subject and average_grade, best first.
+        """
+        return self._run(SUBJECT_AVERAGES)
+
+    def top_students(self, limit: int = 3) -> sqlite3.Cursor:
+        """
+        Query (7): full_name and average_grade of the `limit` best students.
+
+        Args:
+            limit (int): Number of students to return.
+        """
+        return self._run(TOP_STUDENTS, {"limit": limit})
+
+    def students_below(self, threshold: int = 80) -> sqlite3.Cursor:
+        """
+        Query (8): full_name of students with at least one grade below `threshold`.
+
+        Args:
+            threshold (int): Exclusive upper bound on the grade. Up to 80 the
+                grades come from the partial index idx_grades_low; above it the
+                query walks idx_grades_student_grade instead.
+        """
+        return self._run(students_below_sql(threshold), {"threshold": threshold})
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Command-line options: the database and one report with its parameters.
+    """
+    parser = argparse.ArgumentParser(description="Run a school.db report.")
+    parser.add_argument("--db", default="school.db", help="database file")
+    parser.add_argument("--list", action="store_true", help="list the reports and exit")
+    reports = parser.add_subparsers(dest="report")
+
+    student_grades = reports.add_parser("student-grades", help="query (3): grades of one student")
+    student_grades.add_argument("full_name")
+    reports.add_parser("student-averages", help="query (4): average grade per student")
+    born_after = reports.add_parser("born-after", help="query (5): students born after a year")
+    born_after.add_argument("year", type=int, nargs="?", default=2004)
+    reports.add_parser("subject-averages", help="query (6): average grade per subject")
+    top = reports.add_parser("top-students", help="query (7): best students by average grade")
+    top.add_argument("--limit", type=int, default=3)
+    below = reports.add_parser("below", help="query (8): students with a grade below a threshold")
+    below.add_argument("--threshold", type=int, default=80)
+
+    args = parser.parse_args(argv)
+    if args.report is None and not args.list:
+        parser.error("choose a report (see --list)")
+    return args
+
+
+def run_report(service: ReportService, args: argparse.Namespace) -> sqlite3.Cursor:
+    """
+    Dispatch the parsed CLI arguments to the matching ReportService method.
+    """
+    if args.report == "student-grades":
+        return service.student_grades(args.full_name)
+    if args.report == "student-averages":
+        return service.student_averages()
+    if args.report == "born-after":
+        return service.students_born_after(args.year)
+    if args.report == "subject-averages":
+        return service.subject_averages()
+    if args.report == "top-students":
+        return service.top_students(args.limit)
+    return service.students_below(args.threshold)
+
+
+def main() -> None:
+    """
+    Main execution function: runs one report and prints its rows tab-separated,
+    header first, streaming them as they are fetched.
+    """
+    args = parse_args()
+    if args.list:
+        print("\n".join(QUERIES))
+        return
+
+    with ReportService(args.db) as service:
+        rows = run_report(service, args)
+        print("\t".join(column[0] for column in rows.description))
+        for row in rows:
+            print("\t".join("" if value is None else str(value) for value in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+"""
+Student Grades Manager — columnar snapshots.
+Exports the students and grades tables of school.db to NumPy .npy files
+(one file per column, memory-mappable), and reproduces the reports of
+queries.sql from a snapshot with vectorized code.
+
+Layout of a snapshot directory:
+- manifest.json: format version, grades high-water mark (largest exported
+  grades.id), the subject dictionary and the list of grade parts;
+- students/{id,full_name,birth_year}.npy: the whole students table,
+  rewritten by every export;
+- grades-NNNNN/{id,student_id,subject,grade}.npy: one part per export with
+  the grades added since the previous one. `subject` is dictionary-encoded:
+  it holds indexes into the manifest's subject list, which only grows, so
+  codes stay valid across parts.
+
+Exports are incremental by grades.id: grades are treated as append-only.
+Grades updated or deleted after they were exported are not picked up; run
+with --full to rebuild the snapshot from scratch after such changes.
+A first or --full export is built in a temporary directory next to --out
+and replaces it only once complete; an existing --out must be empty or
+hold a snapshot, anything else is refused.
+
+Requires numpy (unlike the other lecture_4 scripts).
+
+Usage:
+    python snapshot.py export --db school.db --out snapshot [--full]
+    python snapshot.py report top-students --snapshot snapshot
+    python snapshot.py compare --db school.db --snapshot snapshot
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import time
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from reports import QUERIES, ReportService
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+STUDENT_COLUMNS = ("id", "full_name", "birth_year")
+GRADE_COLUMNS = ("id", "student_id", "subject", "grade")
+# Rows fetched from SQLite per round trip while exporting
+FETCH_ROWS = 100_000
+
+
+def _save_column(directory: str, name: str, values: np.ndarray) -> None:
+    """
+    Write one column as directory/name.npy via a temporary file, so readers
+    never see a half-written file.
+    """
+    path = os.path.join(directory, f"{name}.npy")
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, values)
+    os.replace(path + ".tmp", path)
+
+
+def read_manifest(out_dir: str) -> Optional[dict]:
+    """
+    Return the snapshot's manifest, or None if `out_dir` holds no snapshot.
+
+    Args:
+        out_dir (str): Snapshot directory.
+    """
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(out_dir: str, manifest: dict) -> None:
+    """
+    Replace the manifest atomically. It is written last by an export, so
+    after a failed export it still lists only complete grade parts.
+
+    Args:
+        out_dir (str): Snapshot directory.
+        manifest (dict): Manifest contents.
+    """
+    path = os.path.join(out_dir, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _check_replaceable(out_dir: str) -> None:
+    """
+    Refuse to replace `out_dir` unless it is missing, empty or a snapshot.
+    """
+    if os.path.exists(out_dir) and not os.path.isdir(out_dir):
+        raise ValueError(f"{out_dir} is not a directory.")
+    if os.path.isdir(out_dir) and os.listdir(out_dir) and read_manifest(out_dir) is None:
+        raise ValueError(f"{out_dir} is not empty and holds no snapshot; choose another --out.")
+
+
+def _swap_in(build_dir: str, out_dir: str) -> None:
+    """
+    Put the complete snapshot in `build_dir` in place of `out_dir`.
+    """
+    if not os.path.isdir(out_dir):
+        os.replace(build_dir, out_dir)
+        return
+    old_dir = build_dir + ".old"
+    os.replace(out_dir, old_dir)
+    os.replace(build_dir, out_dir)
+    shutil.rmtree(old_dir)
+
+
+def export(db_name: str, out_dir: str, full: bool = False) -> dict:
+    """
+    Export students and the grades added since the last export.
+
+    Args:
+        db_name (str): SQLite database file.
+        out_dir (str): Snapshot directory, created if needed.
+        full (bool): Replace the existing snapshot with a complete export.
+    Returns:
+        dict: The new manifest.
+    """
+    manifest = None if full else read_manifest(out_dir)
+    if manifest is None:
+        # Build from scratch beside out_dir; the old snapshot stays until the new one is complete
+        _check_replaceable(out_dir)
+        out_path = os.path.abspath(out_dir)
+        build_dir = os.path.join(os.path.dirname(out_path), f".{os.path.basename(out_path)}.tmp-{os.getpid()}")
+        shutil.rmtree(build_dir, ignore_errors=True)
+        manifest = {"version": FORMAT_VERSION, "high_water": 0, "subjects": [], "parts": []}
+    elif manifest["version"] != FORMAT_VERSION:
+        raise ValueError(f"Snapshot format {manifest['version']} is not supported; export with --full.")
+    else:
+        build_dir = out_dir
+
+    try:
+        _export_into(db_name, build_dir, manifest)
+    except BaseException:
+        if build_dir != out_dir:
+            shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    if build_dir != out_dir:
+        _swap_in(build_dir, out_dir)
+    return manifest
+
+
+def _export_into(db_name: str, out_dir: str, manifest: dict) -> None:
+    """
+    Write the students and the new grades of `db_name` into `out_dir`,
+    updating `manifest` in place and writing it last.
+    """
+    os.makedirs(os.path.join(out_dir, "students"), exist_ok=True)
+    conn = sqlite3.connect(db_name)
+    # One read transaction, so students and grades come from the same state
+    conn.isolation_level = None
+    conn.execute("BEGIN;")
+    try:
+        high_water = conn.execute("SELECT COALESCE(MAX(id), 0) FROM grades;").fetchone()[0]
+        if high_water < manifest["high_water"]:
+            raise ValueError(
+                f"grades.id went back from {manifest['high_water']} to {high_water}; "
+                "the database was rebuilt, export with --full."
+            )
+
+        ids, names, years = [], [], []
+        for student_id, full_name, birth_year in conn.execute(
+            "SELECT id, full_name, birth_year FROM students ORDER BY id;"
+        ):
+            ids.append(student_id)
+            names.append(full_name)
+            years.append(birth_year)
+        students = os.path.join(out_dir, "students")
+        _save_column(students, "id", np.array(ids, dtype=np.int64))
+        _save_column(students, "full_name", np.array(names, dtype=str))
+        _save_column(students, "birth_year", np.array(years, dtype=np.int16))
+
+        if high_water > manifest["high_water"]:
+            manifest["parts"].append(_export_grades(conn, out_dir, manifest, high_water))
+            manifest["high_water"] = high_water
+        manifest["students"] = len(ids)
+    finally:
+        conn.execute("COMMIT;")
+        conn.close()
+
+    write_manifest(out_dir, manifest)
+
+
+def _export_grades(conn: sqlite3.Connection, out_dir: str, manifest: dict, high_water: int) -> dict:
+    """
+    Write the grades with manifest["high_water"] < id <= high_water as a new
+    part, extending the subject dictionary in place. Returns the part entry.
+    """
+    codes = {subject: code for code, subject in enumerate(manifest["subjects"])}
+    chunks: Dict[str, List[np.ndarray]] = {column: [] for column in GRADE_COLUMNS}
+    cursor = conn.execute(
+        "SELECT id, student_id, subject, grade FROM grades WHERE id > ? AND id <= ? ORDER BY id;",
+        (manifest["high_water"], high_water),
+    )
+    while True:
+        rows = cursor.fetchmany(FETCH_ROWS)
+        if not rows:
+            break
+        ids, student_ids, subjects, grades = zip(*rows)
+        for subject in sorted(set(subjects).difference(codes)):
+            codes[subject] = len(manifest["subjects"])
+            manifest["subjects"].append(subject)
+        chunks["id"].append(np.array(ids, dtype=np.int64))
+        chunks["student_id"].append(np.array(student_ids, dtype=np.int64))
+        chunks["subject"].append(np.array([codes[subject] for subject in subjects], dtype=np.int32))
+        chunks["grade"].append(np.array(grades, dtype=np.int16))
+
+    name = f"grades-{len(manifest['parts']) + 1:05d}"
+    part_dir = os.path.join(out_dir, name)
+    os.makedirs(part_dir, exist_ok=True)
+    for column, arrays in chunks.items():
+        _save_column(part_dir, column, np.concatenate(arrays))
+    return {"name": name, "rows": int(sum(len(a) for a in chunks["id"])), "max_id": high_water}
+
+
+def sql_round(values: np.ndarray, digits: int = 2) -> np.ndarray:
+    """
+    ROUND(value, digits) as SQLite computes it for the non-negative averages
+    of the reports. SQLite rounds the decimal value it would print, so halves
+    go up even when the binary double lies just below them (1.025 -> 1.03),
+    where np.round would round to even and from the exact binary value.
+    The product is taken in extended precision, where it is exact, and the
+    nudge of 1e-9 lifts such near-halves over the boundary; a genuine
+    average sum/count is never that close below a half for counts under 5e8.
+    """
+    scale = 10 ** digits
+    return np.floor(values.astype(np.longdouble) * scale + 0.5 + 1e-9).astype(np.float64) / scale
+
+
+class Snapshot:
+    """
+    A loaded snapshot: memory-mapped columns and the queries.sql reports over them.
+
+    Args:
+        path (str): Snapshot directory written by export().
+    """
+
+    def __init__(self, path: str):
+        manifest = read_manifest(path)
+        if manifest is None:
+            raise ValueError(f"No snapshot in {path}; run the export first.")
+        self.manifest = manifest
+        self.subjects = np.array(manifest["subjects"], dtype=str)
+
+        def load(directory: str, column: str) -> np.ndarray:
+            return np.load(os.path.join(path, directory, f"{column}.npy"), mmap_mode="r")
+
+        self.students = {column: load("students", column) for column in STUDENT_COLUMNS}
+        parts = [part["name"] for part in manifest["parts"]]
+        self.grades = {}
+        for column in GRADE_COLUMNS:
+            arrays = [load(part, column) for part in parts]
+            # A single part stays memory-mapped; several are concatenated once
+            if not arrays:
+                self.grades[column] = np.zeros(0, dtype=np.int64)
+            else:
+                self.grades[column] = arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+
+        # Row of each grade's student in the students columns (ids are sorted), -1 if none
+        student_ids = self.students["id"]
+        rows = np.searchsorted(student_ids, self.grades["student_id"])
+        rows = np.minimum(rows, max(len(student_ids) - 1, 0))
+        found = student_ids[rows] == self.grades["student_id"] if len(student_ids) else rows < 0
+        self.grade_student = np.where(found, rows, -1)
+
+    def _student_totals(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Number and sum of the grades of each student (grades of unknown students ignored).
+        """
+        known = self.grade_student >= 0
+        rows = self.grade_student[known]
+        count = np.bincount(rows, minlength=len(self.students["id"]))
+        total = np.bincount(rows, weights=self.grades["grade"][known], minlength=len(self.students["id"]))
+        return count, total
+
+    def student_grades(self, full_name: str) -> List[Tuple[str, str, int]]:
+        """
+        Query (3): (full_name, subject, grade) of one student's grades, by subject.
+        """
+        rows = np.flatnonzero(self.students["full_name"] == full_name)
+        selected = np.flatnonzero(np.isin(self.grade_student, rows))
+        subjects = self.subjects[self.grades["subject"][selected]]
+        order = np.argsort(subjects, kind="stable")
+        names = self.students["full_name"][self.grade_student[selected]]
+        return [
+            (str(names[i]), str(subjects[i]), int(self.grades["grade"][selected[i]])) for i in order
+        ]
+
+    @cached_property
+    def _names(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The sorted distinct student names, each student's index into them, and
+        the students in name order (ties by id). One string sort, reused by
+        every report ordered by name.
+        """
+        unique, rank = np.unique(self.students["full_name"], return_inverse=True)
+        return unique, rank, np.argsort(rank, kind="stable")
+
+    def _ranking(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Students by rounded average, best first, then by id; students without
+        grades last (like SQL's NULL in DESC order). Returns the order, the
+        rounded averages (NaN without grades) and the grade counts.
+        """
+        count, total = self._student_totals()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            average = sql_round(total / count)
+        order = np.lexsort((self.students["id"], np.where(count > 0, -average, np.inf)))
+        return order, average, count
+
+    def student_averages(self) -> List[Tuple[str, Optional[float], int]]:
+        """
+        Query (4): (full_name, average_grade, total_grades) of every student,
+        best first; students without grades last with a None average.
+        """
+        order, average, count = self._ranking()
+        names = self.students["full_name"][order].tolist()
+        counts = count[order].tolist()
+        averages = average[order].tolist()
+        return [(name, avg if n else None, n) for name, avg, n in zip(names, averages, counts)]
+
+    def students_born_after(self, year: int = 2004) -> List[Tuple[int, str, int]]:
+        """
+        Query (5): (id, full_name, birth_year) of students born after `year`, by name.
+        """
+        by_name = self._names[2]
+        rows = by_name[self.students["birth_year"][by_name] > year]
+        return list(zip(
+            self.students["id"][rows].tolist(),
+            self.students["full_name"][rows].tolist(),
+            self.students["birth_year"][rows].tolist(),
+        ))
+
+    def subject_averages(self) -> List[Tuple[str, float]]:
+        """
+        Query (6): (subject, average_grade), best first.
+        """
+        count = np.bincount(self.grades["subject"], minlength=len(self.subjects))
+        total = np.bincount(self.grades["subject"], weights=self.grades["grade"], minlength=len(self.subjects))
+        present = np.flatnonzero(count)
+        average = sql_round(total[present] / count[present])
+        order = np.lexsort((self.subjects[present], -average))
+        return list(zip(self.subjects[present[order]].tolist(), average[order].tolist()))
+
+    def top_students(self, limit: int = 3) -> List[Tuple[str, float]]:
+        """
+        Query (7): (full_name, average_grade) of the `limit` best students.
+        """
+        order, average, count = self._ranking()
+        top = order[:limit]
+        top = top[count[top] > 0]
+        return list(zip(self.students["full_name"][top].tolist(), average[top].tolist()))
+
+    def students_below(self, threshold: int = 80) -> List[str]:
+        """
+        Query (8): names of students with at least one grade below `threshold`, sorted, distinct.
+        """
+        unique, rank, _ = self._names
+        rows = self.grade_student[(self.grades["grade"] < threshold) & (self.grade_student >= 0)]
+        return unique[np.unique(rank[rows])].tolist()
+
+
+def run_report(source, report: str, args: argparse.Namespace) -> list:
+    """
+    Run `report` on a Snapshot or a ReportService with the CLI arguments,
+    as a list of plain tuples.
+    """
+    calls = {
+        "student-grades": lambda: source.student_grades(args.full_name),
+        "student-averages": lambda: source.student_averages(),
+        "born-after": lambda: source.students_born_after(args.year),
+        "subject-averages": lambda: source.subject_averages(),
+        "top-students": lambda: source.top_students(args.limit),
+        "below": lambda: source.students_below(args.threshold),
+    }
+    rows = calls[report]()
+    if isinstance(source, ReportService):
+        rows = [row[0] if report == "below" else tuple(row) for row in rows]
+    return rows
+
+
+def compare(db_name: str, snapshot: Snapshot, args: argparse.Namespace) -> bool:
+    """
+    Run every report in SQL and on the snapshot, check they agree and print both timings.
+    Rows that tie in the SQL ordering may come back in any order, so
+    query (3) is compared as sorted lists.
+    """
+    agree = True
+    print(f"{'report':<18} {'sql':>10} {'snapshot':>10} {'speedup':>8}  same")
+    with ReportService(db_name) as service:
+        for report in QUERIES:
+            started = time.perf_counter()
+            expected = run_report(service, report, args)
+            sql_time = time.perf_counter() - started
+            started = time.perf_counter()
+            actual = run_report(snapshot, report, args)
+            snapshot_time = time.perf_counter() - started
+            same = sorted(expected) == sorted(actual) if report == "student-grades" else expected == actual
+            agree &= same
+            print(f"{report:<18} {sql_time * 1000:>8.1f}ms {snapshot_time * 1000:>8.1f}ms "
+                  f"{sql_time / max(snapshot_time, 1e-9):>7.1f}x  {'yes' if same else 'NO'}")
+    return agree
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Command-line options for the export, report and compare commands.
+    """
+    parser = argparse.ArgumentParser(description="Columnar snapshots of school.db.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export", help="export new grades (and all students) to a snapshot")
+    export_cmd.add_argument("--db", default="school.db", help="database file")
+    export_cmd.add_argument("--out", default="snapshot", help="snapshot directory")
+    export_cmd.add_argument("--full", action="store_true", help="discard the snapshot and export everything")
+
+    report_cmd = commands.add_parser("report", help="run one report on a snapshot")
+    report_cmd.add_argument("report", choices=list(QUERIES))
+
+    compare_cmd = commands.add_parser("compare", help="run every report in SQL and on the snapshot")
+    compare_cmd.add_argument("--db", default="school.db", help="database file")
+
+    for command in (report_cmd, compare_cmd):
+        command.add_argument("--snapshot", default="snapshot", help="snapshot directory")
+        command.add_argument("--full-name", default="Alice Johnson", help="student for student-grades")
+        command.add_argument("--year", type=int, default=2004, help="year for born-after")
+        command.add_argument("--limit", type=int, default=3, help="students for top-students")
+        command.add_argument("--threshold", type=int, default=80, help="grade for below")
+    return parser.parse_args()
+
+
+def main() -> None:
+    """
+    Main execution function.
+    """
+    args = parse_args()
+    if args.command == "export":
+        previous = None if args.full else read_manifest(args.out)
+        parts_before = len(previous["parts"]) if previous else 0
+        started = time.perf_counter()
+        manifest = export(args.db, args.out, args.full)
+        new_grades = sum(part["rows"] for part in manifest["parts"][parts_before:])
+        print(f"Exported {manifest['students']:,} students and {new_grades:,} new grades "
+              f"(high-water mark {manifest['high_water']}) in {time.perf_counter() - started:.2f} s.")
+    elif args.command == "report":
+        for row in run_report(Snapshot(args.snapshot), args.report, args):
+            print("\t".join(str(value) for value in (row if isinstance(row, tuple) else (row,))))
+    elif not compare(args.db, Snapshot(args.snapshot), args):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
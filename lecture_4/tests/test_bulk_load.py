@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Add the lecture_4 directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bulk_load
+import grade_stats
+
+
+def write_csv(path, header, rows):
+    """Write a CSV export with a header row and return its path."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(header + "\n")
+        f.writelines(",".join(str(value) for value in row) + "\n" for row in rows)
+    return str(path)
+
+
+def schema_objects(db_path, kind):
+    """Names of the indexes or triggers of a database."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = ?;", (kind,))}
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def students_csv(tmp_path):
+    """Two students, one with an explicit id and one without."""
+    return write_csv(tmp_path / "students.csv", "id,full_name,birth_year", [(1, "Ann Lee", 2004), ("", "Bo Kim", 2006)])
+
+
+class TestBulkLoad:
+    """Test cases for the chunked CSV and synthetic loader."""
+
+    def test_csv_import(self, tmp_path, students_csv):
+        """Test a CSV import loads every row and leaves indexes, triggers and consistent stats."""
+        db_path = str(tmp_path / "school.db")
+        grades_csv = write_csv(
+            tmp_path / "grades.csv", "student_id,subject,grade", [(1, "Math", 90), (1, "Art", 70), (2, "Math", 55)]
+        )
+        counts = bulk_load.load(
+            db_path, bulk_load.read_students_csv(students_csv), bulk_load.read_grades_csv(grades_csv), chunk_size=2
+        )
+
+        assert counts == (2, 3)
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT id, full_name FROM students ORDER BY id;").fetchall() == [(1, "Ann Lee"), (2, "Bo Kim")]
+        assert grade_stats.diff_stats(conn) == []
+        conn.close()
+        assert set(grade_stats.TRIGGER_DDL) <= schema_objects(db_path, "trigger")
+        assert "idx_grades_student_grade" in schema_objects(db_path, "index")
+
+    @pytest.mark.parametrize("bad_row", [(7, "Math", 80), (1, "Math", 900)], ids=["unknown-student", "grade-out-of-range"])
+    def test_failed_chunk_leaves_consistent_database(self, tmp_path, students_csv, bad_row):
+        """Test a rejected grade fails the load but keeps earlier chunks indexed, with triggers and exact stats."""
+        db_path = str(tmp_path / "school.db")
+        grades_csv = write_csv(
+            tmp_path / "grades.csv", "student_id,subject,grade", [(1, "Math", 90), (2, "Art", 70), bad_row]
+        )
+        with pytest.raises(sqlite3.IntegrityError):
+            bulk_load.load(
+                db_path, bulk_load.read_students_csv(students_csv), bulk_load.read_grades_csv(grades_csv), chunk_size=2
+            )
+
+        assert set(grade_stats.TRIGGER_DDL) <= schema_objects(db_path, "trigger")
+        assert "idx_grades_student_grade" in schema_objects(db_path, "index")
+        conn = sqlite3.connect(db_path)
+        # The first chunk stays, the failing one is rolled back
+        assert conn.execute("SELECT student_id, grade FROM grades ORDER BY id;").fetchall() == [(1, 90), (2, 70)]
+        assert grade_stats.diff_stats(conn) == []
+        # The triggers keep the stats current after the failed load
+        conn.execute("INSERT INTO grades (student_id, subject, grade) VALUES (2, 'Art', 100);")
+        assert grade_stats.diff_stats(conn) == []
+        conn.close()
+
+    def test_pragmas_are_restored(self, tmp_path):
+        """Test bulk_pragmas applies its settings and restores the previous ones, also after an error."""
+        conn = sqlite3.connect(str(tmp_path / "school.db"), isolation_level=None)
+        before = {name: conn.execute(f"PRAGMA {name};").fetchone()[0] for name in bulk_load.BULK_PRAGMAS}
+
+        with pytest.raises(RuntimeError):
+            with bulk_load.bulk_pragmas(conn):
+                assert conn.execute("PRAGMA journal_mode;").fetchone()[0] == "memory"
+                assert conn.execute("PRAGMA foreign_keys;").fetchone()[0] == 1
+                assert conn.execute("PRAGMA cache_size;").fetchone()[0] == bulk_load.BULK_PRAGMAS["cache_size"]
+                raise RuntimeError("load failed")
+
+        assert {name: conn.execute(f"PRAGMA {name};").fetchone()[0] for name in bulk_load.BULK_PRAGMAS} == before
+        conn.close()
+
+    def test_synthetic_data_is_deterministic(self):
+        """Test the same seed gives the same students and grades, and another seed does not."""
+        def rows(seed):
+            return list(bulk_load.generate_students(50, seed)), list(bulk_load.generate_grades(50, 5, seed))
+
+        assert rows(3) == rows(3)
+        assert rows(3) != rows(4)
@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+# Add the lecture_4 directory to the Python path
+LECTURE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, LECTURE_DIR)
+
+import grade_stats
+from reports import ReportService
+from create_database import create_connection, create_indexes, create_tables, insert_data
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """The sample database of create_database.py."""
+    path = str(tmp_path / "school.db")
+    conn = create_connection(path)
+    create_tables(conn)
+    insert_data(conn)
+    create_indexes(conn)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def db(db_path):
+    """Connection to the sample database."""
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def stats_row(conn, table, key):
+    """The stored (grade_count, grade_sum, min_grade, max_grade) of one key."""
+    column = grade_stats.STATS_TABLES[table]
+    return conn.execute(
+        f"SELECT grade_count, grade_sum, min_grade, max_grade FROM {table} WHERE {column} = ?;", (key,)
+    ).fetchone()
+
+
+class TestGradeStats:
+    """Test cases for the trigger-maintained grade stats tables."""
+
+    def test_sample_data_is_consistent(self, db):
+        """Test the tables filled by the triggers during insert_data match the live aggregates."""
+        assert grade_stats.diff_stats(db) == []
+
+    def test_inserts_deletes_and_updates(self, db):
+        """Test every kind of write, including removing a minimum or maximum, keeps the tables exact."""
+        db.execute("INSERT INTO students (full_name, birth_year) VALUES ('Jack Brown', 2008);")
+        db.executemany(
+            "INSERT INTO grades (student_id, subject, grade) VALUES (?, ?, ?);",
+            [(10, "Music", 55), (10, "Music", 100), (10, "Math", 70), (1, "Music", 62)],
+        )
+        assert stats_row(db, "subject_stats", "Music") == (3, 217, 55, 100)
+        assert grade_stats.diff_stats(db) == []
+
+        # Delete the minimum, then the maximum, then the last grade of a subject
+        db.execute("DELETE FROM grades WHERE student_id = 10 AND grade = 55;")
+        db.execute("DELETE FROM grades WHERE student_id = 10 AND grade = 100;")
+        assert stats_row(db, "student_stats", 10) == (1, 70, 70, 70)
+        db.execute("DELETE FROM grades WHERE subject = 'Music';")
+        assert stats_row(db, "subject_stats", "Music") is None
+        assert grade_stats.diff_stats(db) == []
+
+        # Move grades to another student, to another subject, and change their value
+        db.execute("UPDATE grades SET student_id = 10 WHERE student_id = 1 AND subject = 'Math';")
+        db.execute("UPDATE grades SET subject = 'Music', grade = grade - 30 WHERE student_id = 2;")
+        db.execute("UPDATE grades SET grade = 100 WHERE id = (SELECT MIN(id) FROM grades WHERE student_id = 3);")
+        db.commit()
+        assert stats_row(db, "subject_stats", "Music")[0] == 3
+        assert grade_stats.diff_stats(db) == []
+
+    def test_corrupted_rows_are_reported(self, db):
+        """Test diff_stats reports a changed row as missing and stale, and a deleted row as missing."""
+        student = stats_row(db, "student_stats", 1)
+        art = stats_row(db, "subject_stats", "Art")
+        db.execute("UPDATE student_stats SET grade_sum = grade_sum + 1 WHERE student_id = 1;")
+        db.execute("DELETE FROM subject_stats WHERE subject = 'Art';")
+
+        assert sorted(grade_stats.diff_stats(db)) == [
+            ("student_stats", "missing", (1,) + student),
+            ("student_stats", "stale", (1, student[0], student[1] + 1) + student[2:]),
+            ("subject_stats", "missing", ("Art",) + art),
+        ]
+
+        grade_stats.rebuild_stats(db)
+        assert grade_stats.diff_stats(db) == []
+
+    def test_rebuild_restores_dropped_triggers(self, db_path, db):
+        """Test the rebuild command recreates triggers a bulk load left dropped."""
+        grade_stats.drop_triggers(db)
+        db.commit()
+        subprocess.run(
+            [sys.executable, os.path.join(LECTURE_DIR, "grade_stats.py"), "rebuild", "--db", db_path],
+            check=True, capture_output=True,
+        )
+        db.execute("INSERT INTO grades (student_id, subject, grade) VALUES (1, 'Music', 10);")
+        assert stats_row(db, "subject_stats", "Music") == (1, 10, 10, 10)
+        assert grade_stats.diff_stats(db) == []
+
+    def test_reports_refuse_missing_stats(self, db_path, db):
+        """Test a report service refuses a database without the stats tables or triggers and leaves it alone."""
+        db.execute("DROP TRIGGER grades_stats_insert;")
+        db.commit()
+        assert not grade_stats.has_stats(db)
+        with pytest.raises(ValueError, match="grade_stats.py rebuild"):
+            ReportService(db_path)
+        assert db.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'grades_stats_insert';").fetchone()[0] == 0
+
+        for table in grade_stats.STATS_TABLES:
+            db.execute(f"DROP TABLE {table};")
+        db.commit()
+        with pytest.raises(ValueError, match="grade_stats.py rebuild"):
+            ReportService(db_path)
+        assert db.execute("SELECT COUNT(*) FROM sqlite_master WHERE name IN ('student_stats', 'subject_stats');").fetchone()[0] == 0
+
+        grade_stats.create_stats(db)
+        grade_stats.rebuild_stats(db)
+        with ReportService(db_path) as service:
+            assert len(service.subject_averages().fetchall()) == 6
@@ -0,0 +1,151 @@
+import os
+import re
+import sqlite3
+import sys
+
+import pytest
+
+# Add the lecture_4 directory to the Python path
+LECTURE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, LECTURE_DIR)
+
+import bulk_load
+import reports
+from create_database import create_connection, create_indexes, create_tables, insert_data
+
+# Tables a report may read in full: one row per student or per subject, the
+# size of the report itself. Any other SCAN is a problem, also one "USING
+# INDEX": walking a whole index still reads every row. The exceptions below
+# name the index they expect and why the full read is inherent.
+SUMMARY_TABLES = {"student_stats", "subject_stats"}
+EXPECTED_SCANS = {
+    "student-averages": {
+        ("students", "idx_students_full_name"): "the report lists every student; the narrowest covering index",
+    },
+    "below": {
+        ("students", "idx_students_full_name"):
+            "names are walked in order (no sort for DISTINCT/ORDER BY), probing idx_grades_low per student",
+    },
+}
+ALIASES = {"s": "students", "g": "grades", "st": "student_stats"}
+SCAN = re.compile(r"SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?")
+
+
+def select_queries():
+    """The SELECT statements of section 3 of queries.sql, by report name."""
+    with open(os.path.join(LECTURE_DIR, "queries.sql"), encoding="utf-8") as f:
+        section = f.read().split("-- 3. SELECT QUERIES")[1]
+    statements = [statement.strip() for statement in section.split(";")]
+    # Drop the comment lines above each statement
+    queries = [re.sub(r"^(--.*\n)+", "", statement) for statement in statements if "SELECT" in statement]
+    # Same order as reports.QUERIES: queries (3) to (8)
+    return dict(zip(reports.QUERIES, queries))
+
+
+def plan_lines(conn, sql, params=()):
+    """The detail column of EXPLAIN QUERY PLAN for `sql`."""
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def plan_problems(conn, name, sql, params=()):
+    """Plan lines of report `name` that scan a table, with or without an index, unexpectedly."""
+    problems = []
+    for line in plan_lines(conn, sql, params):
+        match = SCAN.match(line)
+        if not match:
+            continue
+        table, index = ALIASES.get(match.group(1), match.group(1)), match.group(2)
+        if table in SUMMARY_TABLES or (table, index) in EXPECTED_SCANS.get(name, {}):
+            continue
+        problems.append(line)
+    return problems
+
+
+@pytest.fixture(params=["sample", "synthetic"])
+def db_path(request, tmp_path):
+    """The sample database of create_database.py, or 2000 generated students; analyzed either way."""
+    path = str(tmp_path / "school.db")
+    if request.param == "sample":
+        conn = create_connection(path)
+        create_tables(conn)
+        insert_data(conn)
+        create_indexes(conn)
+        conn.execute("ANALYZE;")
+        conn.close()
+    else:
+        bulk_load.load(path, bulk_load.generate_students(2000, 0), bulk_load.generate_grades(2000, 10, 0), 500)
+    return path
+
+
+@pytest.fixture
+def db(db_path):
+    """Connection to the analyzed database."""
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+class TestQueryPlans:
+    """Test cases for the query plans of the queries.sql reports."""
+
+    def test_queries_sql_is_covered(self):
+        """Test every query of queries.sql is found and has a reports.py counterpart."""
+        assert len(select_queries()) == len(reports.QUERIES) == 6
+
+    def test_queries_sql_use_indexes(self, db):
+        """Test no query in queries.sql scans a table or walks a whole index unless it is expected to."""
+        problems = {name: plan_problems(db, name, sql) for name, sql in select_queries().items()}
+        assert {name: lines for name, lines in problems.items() if lines} == {}
+
+    def test_reports_use_indexes(self, db):
+        """Test the same holds for the parameterized reports, with their default parameters."""
+        params = {"full_name": "Alice Johnson", "year": 2004, "limit": 3, "threshold": 80}
+        problems = {name: plan_problems(db, name, sql, params) for name, sql in reports.QUERIES.items()}
+        assert {name: lines for name, lines in problems.items() if lines} == {}
+
+    def test_born_after_searches_birth_year(self, db):
+        """Test query (5) searches the birth year range in its covering index rather than walking names."""
+        for year in (2000, 2004, 2007):
+            plan = plan_lines(db, reports.STUDENTS_BORN_AFTER, {"year": year})
+            assert "SEARCH students USING COVERING INDEX idx_students_birth_year_name (birth_year>?)" in plan
+        assert "SEARCH students USING COVERING INDEX idx_students_birth_year_name (birth_year>?)" in plan_lines(
+            db, select_queries()["born-after"]
+        )
+
+    def test_low_grades_use_partial_index(self, db):
+        """Test query (8) reads the grades below 80 from the partial index only."""
+        plan = " ".join(plan_lines(db, select_queries()["below"]))
+        assert "COVERING INDEX idx_grades_low" in plan
+
+    def test_service_uses_partial_index_up_to_80(self, db):
+        """Test the report service reads idx_grades_low for thresholds up to 80, and not above."""
+        for threshold, uses_partial in ((60, True), (80, True), (85, False)):
+            sql = reports.students_below_sql(threshold)
+            plan = " ".join(plan_lines(db, sql, {"threshold": threshold}))
+            assert ("idx_grades_low" in plan) == uses_partial
+            assert plan_problems(db, "below", sql, {"threshold": threshold}) == []
+
+    def test_partial_index_threshold_is_respected(self, db, db_path):
+        """Test bound thresholds other than 80 give the same students as a query without indexes."""
+        reference = (
+            "SELECT DISTINCT s.full_name FROM students s JOIN grades g NOT INDEXED ON s.id = g.student_id "
+            "WHERE g.grade < ? ORDER BY s.full_name"
+        )
+        with reports.ReportService(db_path) as service:
+            for threshold in (60, 80, 85, 90):
+                expected = [row[0] for row in db.execute(reference, (threshold,))]
+                assert [row["full_name"] for row in service.students_below(threshold)] == expected
+
+    def test_dropped_index_is_caught(self, db):
+        """Test losing an index shows up as a problem rather than a silent slowdown."""
+        db.execute("DROP INDEX idx_grades_student_grade;")
+        db.execute("DROP INDEX idx_grades_low;")
+        db.execute("DROP INDEX idx_students_birth_year_name;")
+        problems = {name: plan_problems(db, name, sql) for name, sql in select_queries().items()}
+        assert problems["student-grades"] and problems["born-after"]
+
+    def test_index_walk_is_caught(self, db):
+        """Test a plan that walks a whole index, e.g. query (5) ordered by the name index, is a problem."""
+        sql = reports.STUDENTS_BORN_AFTER.replace("+full_name", "full_name")
+        sql = sql.replace("FROM students", "FROM students INDEXED BY idx_students_full_name")
+        assert plan_problems(db, "born-after", sql, {"year": 2004}) == ["SCAN students USING INDEX idx_students_full_name"]
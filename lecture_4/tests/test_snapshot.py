@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Add the lecture_4 directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bulk_load
+import snapshot
+from create_database import create_connection, create_indexes, create_tables, insert_data
+from reports import ReportService
+
+
+def sql_reports(db_path):
+    """Every report with its default parameters, run in SQL."""
+    with ReportService(db_path) as service:
+        return {
+            "student-grades": sorted(tuple(row) for row in service.student_grades("Alice Johnson")),
+            "student-averages": [tuple(row) for row in service.student_averages()],
+            "born-after": [tuple(row) for row in service.students_born_after()],
+            "subject-averages": [tuple(row) for row in service.subject_averages()],
+            "top-students": [tuple(row) for row in service.top_students(10)],
+            "below": [row[0] for row in service.students_below()],
+        }
+
+
+def snapshot_reports(path):
+    """The same reports on a snapshot."""
+    snap = snapshot.Snapshot(path)
+    return {
+        "student-grades": sorted(snap.student_grades("Alice Johnson")),
+        "student-averages": snap.student_averages(),
+        "born-after": snap.students_born_after(),
+        "subject-averages": snap.subject_averages(),
+        "top-students": snap.top_students(10),
+        "below": snap.students_below(),
+    }
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """The sample database of create_database.py."""
+    path = str(tmp_path / "school.db")
+    conn = create_connection(path)
+    create_tables(conn)
+    insert_data(conn)
+    create_indexes(conn)
+    conn.close()
+    return path
+
+
+class TestSnapshot:
+    """Test cases for the columnar snapshot export and its reports."""
+
+    def test_reports_match_sql(self, db_path, tmp_path):
+        """Test every report computed from a snapshot equals the SQL report."""
+        out = str(tmp_path / "snapshot")
+        manifest = snapshot.export(db_path, out)
+        assert manifest["high_water"] == 27 and manifest["students"] == 9
+        assert snapshot_reports(out) == sql_reports(db_path)
+
+    def test_incremental_export(self, db_path, tmp_path):
+        """Test a second export adds only the new grades, extends the subject dictionary and stays correct."""
+        out = str(tmp_path / "snapshot")
+        snapshot.export(db_path, out)
+        subjects = list(snapshot.read_manifest(out)["subjects"])
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO students (full_name, birth_year) VALUES ('Jack Brown', 2008);")
+        conn.executemany(
+            "INSERT INTO grades (student_id, subject, grade) VALUES (?, ?, ?);",
+            [(10, "Music", 55), (10, "Math", 100), (1, "Music", 70)],
+        )
+        conn.commit()
+        conn.close()
+
+        manifest = snapshot.export(db_path, out)
+        assert [part["rows"] for part in manifest["parts"]] == [27, 3]
+        assert manifest["high_water"] == 30
+        assert manifest["subjects"] == subjects + ["Music"]
+        assert snapshot_reports(out) == sql_reports(db_path)
+
+        # Nothing new: no empty part is written
+        assert len(snapshot.export(db_path, out)["parts"]) == 2
+
+    def test_rebuilt_database_needs_full_export(self, db_path, tmp_path):
+        """Test a database whose grade ids went back is refused unless the export is full."""
+        out = str(tmp_path / "snapshot")
+        bulk_load.load(db_path, bulk_load.generate_students(50, 1), bulk_load.generate_grades(50, 2, 1))
+        snapshot.export(db_path, out)
+
+        conn = create_connection(db_path)
+        create_tables(conn)
+        insert_data(conn)
+        conn.close()
+        with pytest.raises(ValueError, match="--full"):
+            snapshot.export(db_path, out)
+        assert snapshot.export(db_path, out, full=True)["high_water"] == 27
+        assert snapshot_reports(out) == sql_reports(db_path)
+
+    def test_sql_round(self):
+        """Test averages round like SQLite's ROUND (halves up, not to even)."""
+        averages = [total / count for count in (1, 2, 3, 7, 8, 16, 40, 200) for total in range(count, 100 * count + 1)]
+        conn = sqlite3.connect(":memory:")
+        expected = [conn.execute("SELECT ROUND(?, 2);", (average,)).fetchone()[0] for average in averages]
+        conn.close()
+        assert snapshot.sql_round(snapshot.np.array(averages)).tolist() == expected
+        assert snapshot.sql_round(snapshot.np.array([85.125])).tolist() == [85.13]
+
+    def test_full_export_refuses_foreign_directory(self, db_path, tmp_path):
+        """Test --full never deletes a non-empty directory that holds no snapshot."""
+        out = tmp_path / "work"
+        out.mkdir()
+        (out / "notes.txt").write_text("keep me")
+        for full in (True, False):
+            with pytest.raises(ValueError, match="holds no snapshot"):
+                snapshot.export(db_path, str(out), full=full)
+        assert [path.name for path in out.iterdir()] == ["notes.txt"]
+
+    def test_failed_full_export_keeps_previous_snapshot(self, db_path, tmp_path):
+        """Test the previous snapshot stays readable, and no temporary directory remains, when --full fails."""
+        out = str(tmp_path / "snapshot")
+        snapshot.export(db_path, out)
+        before = snapshot_reports(out)
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("DROP TABLE students;")
+        conn.close()
+        with pytest.raises(sqlite3.OperationalError):
+            snapshot.export(db_path, out, full=True)
+
+        assert snapshot_reports(out) == before
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["school.db", "snapshot"]
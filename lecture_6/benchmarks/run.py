@@ -0,0 +1,262 @@
+"""
+Load-test every book_api route and report latency percentiles, throughput and peak RSS.
+
+The app is driven by concurrent clients either in-process through httpx's
+ASGI transport (no network, measures the app itself) or over HTTP against a
+real uvicorn process. Results are written as JSON and can be compared with a
+stored baseline; the exit code is 1 when a route regressed.
+
+Usage:
+    python benchmarks/run.py --rows 10000 --output results.json
+    python benchmarks/run.py --transport uvicorn --baseline results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from seed import BOOK_API_DIR, WORDS, point_at, seed_database
+
+# Route scenarios in execution order: deletes only remove books created earlier
+ROUTES = ["healthcheck", "list", "stream", "search", "stats", "get", "create", "update", "patch", "bulk", "delete"]
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def build_request(route: str, rng: random.Random, state: dict) -> tuple[str, str, dict]:
+    """Return (method, url, httpx keyword arguments) for one request of `route`."""
+    max_id = state["max_id"]
+    if route == "healthcheck":
+        return "GET", "/healthcheck", {}
+    if route == "list":
+        return "GET", "/books/", {"params": {"limit": 100, "after_id": rng.randint(0, max_id)}}
+    if route == "stream":
+        return "GET", "/books/", {"params": {"stream": "true", "after_id": max(0, max_id - 1000)}}
+    if route == "search":
+        return "GET", "/books/search/", {"params": {"query": rng.choice(WORDS)[: rng.randint(3, 6)], "limit": 20}}
+    if route == "stats":
+        return "GET", rng.choice(["/books/stats/authors/top", "/books/stats/decades"]), {}
+    if route == "get":
+        return "GET", f"/books/{rng.randint(1, max_id)}", {}
+    if route == "create":
+        return "POST", "/books/", {"json": {"title": "Bench " + rng.choice(WORDS), "author": "Bench Author", "year": 2000}}
+    if route == "update":
+        body = {"title": rng.choice(WORDS).title(), "author": "Bench Author", "year": rng.randint(1800, 2025)}
+        return "PUT", f"/books/{rng.randint(1, max_id)}", {"json": body}
+    if route == "patch":
+        return "PATCH", f"/books/{rng.randint(1, max_id)}", {"json": {"year": rng.randint(1800, 2025)}}
+    if route == "bulk":
+        books = [{"title": f"Bulk {rng.choice(WORDS)}", "author": "Bench Author", "year": 1999} for _ in range(100)]
+        return "POST", "/books/bulk", {"json": books}
+    if route == "delete":
+        return "DELETE", f"/books/{state['created'].pop()}", {}
+    raise ValueError(f"Unknown route {route!r}")
+
+
+async def run_route(client: httpx.AsyncClient, route: str, requests: int, concurrency: int, state: dict, seed: int) -> dict:
+    """Fire `requests` requests at one route from `concurrency` clients."""
+    rng = random.Random(f"{seed}-{route}")
+    if route == "delete":
+        requests = min(requests, len(state["created"]))
+    latencies: list[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = build_request(route, rng, state)
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            await response.aread()
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+            elif route == "create":
+                state["created"].append(response.json()["id"])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+async def run_routes(client: httpx.AsyncClient, args, max_id: int) -> dict:
+    """Run every selected route scenario in order."""
+    state = {"max_id": max_id, "created": []}
+    results = {}
+    for route in args.routes:
+        # Streaming the tail of the table is much heavier than other requests
+        requests = max(1, args.requests // 10) if route == "stream" else args.requests
+        results[route] = await run_route(client, route, requests, args.concurrency, state, args.seed)
+        print(f"  {route:<12} p50 {results[route]['p50_ms']:>8.2f} ms   p95 {results[route]['p95_ms']:>8.2f} ms   "
+              f"p99 {results[route]['p99_ms']:>8.2f} ms   {results[route]['throughput_rps']:>9.1f} req/s")
+    return results
+
+
+def peak_rss_mb(pid: int | None = None) -> float:
+    """Peak resident set size of this process, or of `pid` when given (Linux /proc)."""
+    if pid is None:
+        kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in KiB elsewhere
+        return round(kib / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    return 0.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def bench_asgi(args, max_id: int) -> tuple[dict, float]:
+    """Drive the app in-process through httpx's ASGI transport."""
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            results = await run_routes(client, args, max_id)
+    return results, peak_rss_mb()
+
+
+async def bench_uvicorn(args, max_id: int) -> tuple[dict, float]:
+    """Drive a real uvicorn server over HTTP."""
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BOOK_API_DIR,
+        env=os.environ.copy(),
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60, limits=limits) as client:
+            for _ in range(100):
+                try:
+                    await client.get("/healthcheck")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn did not start")
+            results = await run_routes(client, args, max_id)
+        return results, peak_rss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Describe every route whose p95 or throughput is worse than the baseline by more than `tolerance`."""
+    regressions = []
+    for route, current in results["routes"].items():
+        base = baseline.get("routes", {}).get(route)
+        if base is None:
+            continue
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {base['p95_ms']} ms -> {current['p95_ms']} ms")
+        if base["throughput_rps"] and current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{route}: throughput {base['throughput_rps']} -> {current['throughput_rps']} req/s")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="bench.db", help="benchmark database file")
+    parser.add_argument("--rows", type=int, default=10_000, help="books to seed (e.g. 10000 or 1000000)")
+    parser.add_argument("--reuse-db", action="store_true", help="keep an existing database instead of reseeding")
+    parser.add_argument("--transport", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--requests", type=int, default=500, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=ROUTES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a stored results JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative regression (default 10%%)")
+    args = parser.parse_args()
+
+    if not (args.reuse_db and os.path.exists(args.db)):
+        print(f"Seeding {args.rows} books ...")
+        seed_database(args.db, args.rows, args.seed)
+    point_at(args.db)
+
+    import sqlite3
+
+    with sqlite3.connect(args.db) as conn:
+        rows, max_id = conn.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM books").fetchone()
+
+    print(f"Benchmarking {args.transport} transport, {args.concurrency} clients, {args.requests} requests/route:")
+    bench = bench_asgi if args.transport == "asgi" else bench_uvicorn
+    routes, rss = asyncio.run(bench(args, max_id))
+    print(f"  peak RSS {rss} MB")
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "transport": args.transport,
+            "rows": rows,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "db_mode": os.getenv("DB_MODE", "async"),
+            "sqlite_profile": os.getenv("SQLITE_PROFILE", "performance"),
+            "cache_backend": os.getenv("CACHE_BACKEND", "memory"),
+            "python": platform.python_version(),
+        },
+        "routes": routes,
+        "peak_rss_mb": rss,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for key in ("transport", "rows", "concurrency"):
+            if baseline.get("meta", {}).get(key) != results["meta"][key]:
+                print(f"Warning: baseline was recorded with {key}={baseline.get('meta', {}).get(key)!r}, "
+                      f"this run used {results['meta'][key]!r}")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
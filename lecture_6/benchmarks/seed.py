@@ -0,0 +1,81 @@
+"""
+Seed a book_api database with a deterministic synthetic catalogue.
+
+Usage:
+    python benchmarks/seed.py --db /tmp/bench.db --rows 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BOOK_API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "book_api")
+
+# Small vocabulary so that search queries have realistic hit rates
+WORDS = [
+    "shadow", "river", "empire", "garden", "winter", "silent", "machine", "ocean", "glass", "crown",
+    "forest", "letter", "memory", "storm", "island", "secret", "mountain", "city", "fire", "night",
+    "library", "journey", "stone", "mirror", "harvest", "signal", "orbit", "paper", "wolf", "lantern",
+]
+FIRST_NAMES = ["Anna", "Boris", "Clara", "Dmitri", "Elena", "Farid", "Greta", "Hiro", "Ines", "Jonas", "Kira", "Leo"]
+LAST_NAMES = ["Ivanova", "Smith", "Novak", "Garcia", "Tanaka", "Keller", "Okafor", "Rossi", "Larsen", "Moreau"]
+
+
+def point_at(db_path: str) -> None:
+    """Make book_api importable and point it at `db_path` (call before importing it)."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(db_path)}"
+    if BOOK_API_DIR not in sys.path:
+        sys.path.insert(0, BOOK_API_DIR)
+
+
+def generate_books(rows: int, seed: int = 0):
+    """Yield `rows` book dicts, always the same ones for the same seed."""
+    rng = random.Random(seed)
+    authors = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    for _ in range(rows):
+        title = " ".join(rng.sample(WORDS, rng.randint(1, 4))).title()
+        year = rng.randint(1800, 2025) if rng.random() > 0.05 else None
+        yield {"title": title, "author": rng.choice(authors), "year": year}
+
+
+def seed_database(db_path: str, rows: int, seed: int = 0, batch_size: int = 20000) -> float:
+    """Create a fresh database with `rows` books; returns the elapsed seconds."""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    point_at(db_path)
+
+    import crud
+    import migrations
+    import schemas
+    from database import SessionLocal, engine
+
+    started = time.perf_counter()
+    migrations.upgrade(engine)
+
+    batch = []
+    with SessionLocal() as db:
+        for book in generate_books(rows, seed):
+            batch.append(schemas.BookCreate.model_construct(**book))
+            if len(batch) >= batch_size:
+                crud.bulk_create_books(db, batch)
+                batch = []
+        if batch:
+            crud.bulk_create_books(db, batch)
+    engine.dispose()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="bench.db", help="database file to (re)create")
+    parser.add_argument("--rows", type=int, default=10_000, help="number of books")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    elapsed = seed_database(args.db, args.rows, args.seed)
+    print(f"Seeded {args.rows} books into {args.db} in {elapsed:.1f}s ({args.rows / elapsed:,.0f} rows/s).")
+
+
+if __name__ == "__main__":
+    main()
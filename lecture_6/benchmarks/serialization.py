@@ -0,0 +1,79 @@
+"""
+Compare the legacy list serialization path with the tuple + fast-encoder path.
+
+legacy: ORM objects -> schemas.Book per row -> FastAPI's jsonable_encoder -> JSONResponse
+fast:   column tuples -> compiled RowSerializer -> orjson bytes
+
+Usage:
+    python benchmarks/serialization.py --rows 10000 --page 1000
+"""
+import argparse
+import os
+import statistics
+import time
+
+from seed import point_at, seed_database
+
+
+def timed(fn, repeat: int) -> float:
+    """Median wall time of `fn` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="bench.db")
+    parser.add_argument("--rows", type=int, default=10_000, help="books to seed when the database is missing")
+    parser.add_argument("--page", type=int, default=1000, help="books per response")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        seed_database(args.db, args.rows)
+    point_at(args.db)
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    import crud
+    import schemas
+    import serializers
+    from database import SessionLocal
+
+    book_rows = serializers.RowSerializer(schemas.Book)
+
+    with SessionLocal() as db:
+        def legacy_serialize(books):
+            items = [schemas.Book.model_validate(book) for book in books]
+            return JSONResponse(jsonable_encoder(items)).body
+
+        def legacy():
+            db.expunge_all()
+            return legacy_serialize(crud.get_books(db, args.page))
+
+        def fast():
+            return book_rows.dumps_list(crud.get_book_rows(db, args.page))
+
+        assert legacy() == fast(), "both paths must produce identical bytes"
+
+        books = crud.get_books(db, args.page)
+        rows = crud.get_book_rows(db, args.page)
+        results = {
+            "serialize only": (timed(lambda: legacy_serialize(books), args.repeat),
+                               timed(lambda: book_rows.dumps_list(rows), args.repeat)),
+            "query + serialize": (timed(legacy, args.repeat), timed(fast, args.repeat)),
+        }
+
+    print(f"{args.page} books per response, median of {args.repeat} runs "
+          f"(encoder: {'orjson' if serializers.orjson else 'json'}):")
+    for name, (legacy_ms, fast_ms) in results.items():
+        print(f"  {name:<18} legacy {legacy_ms:8.2f} ms   fast {fast_ms:8.2f} ms   {legacy_ms / fast_ms:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+import crud
+import schemas
+
+# Async versions of the functions in crud.py. Each one accepts either an
+# AsyncSession (runs the crud function on the async connection) or a plain
+# Session (runs it in the threadpool), so routes work in both DB modes.
+async def run(db: AsyncSession | Session, fn, *args):
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
+
+# Current version of the books table
+async def get_books_version(db):
+    return await run(db, crud.get_books_version)
+
+# Create new book
+async def create_book(db, book: schemas.BookCreate):
+    return await run(db, crud.create_book, book)
+
+# Get one book by primary key
+async def get_book(db, book_id: int):
+    return await run(db, crud.get_book, book_id)
+
+# Get one page of books
+async def get_books(db, limit: int = 100, after_id: int | None = None):
+    return await run(db, crud.get_books, limit, after_id)
+
+# Get one page of books as row tuples
+async def get_book_rows(db, limit: int = 100, after_id: int | None = None):
+    return await run(db, crud.get_book_rows, limit, after_id)
+
+# Iterate over all books as row tuples, in fixed-size batches
+async def iter_book_rows(db, batch_size: int = 1000, after_id: int | None = None):
+    if not isinstance(db, AsyncSession):
+        async for batch in iterate_in_threadpool(crud.iter_book_rows(db, batch_size, after_id)):
+            yield batch
+        return
+
+    stmt = crud.book_rows_query(after_id).execution_options(yield_per=batch_size)
+    result = await db.stream(stmt)
+    async for batch in result.partitions():
+        yield batch
+
+# Insert a batch of books
+async def bulk_create_books(db, books: list[schemas.BookCreate], upsert: bool = False):
+    return await run(db, crud.bulk_create_books, books, upsert)
+
+# Delete book
+async def delete_book(db, book_id: int):
+    return await run(db, crud.delete_book, book_id)
+
+# Update book
+async def update_book(db, book_id: int, book_data: schemas.BookUpdate):
+    return await run(db, crud.update_book, book_id, book_data)
+
+# Update only the given columns of a book
+async def patch_book(db, book_id: int, changes: dict):
+    return await run(db, crud.patch_book, book_id, changes)
+
+# Delete every selected book
+async def delete_books(db, selection: schemas.BookSelection):
+    return await run(db, crud.delete_books, selection)
+
+# Write the same changes to every selected book
+async def update_books(db, selection: schemas.BookSelection, changes: dict):
+    return await run(db, crud.update_books, selection, changes)
+
+# Book counts per author
+async def get_author_counts(db, limit: int = 100, after: str | None = None):
+    return await run(db, crud.get_author_counts, limit, after)
+
+# Authors with the most books
+async def get_top_authors(db, n: int = 10):
+    return await run(db, crud.get_top_authors, n)
+
+# Book counts per decade
+async def get_decade_counts(db):
+    return await run(db, crud.get_decade_counts)
+
+# Search books
+async def search_books(db, query: str, limit: int = 50):
+    return await run(db, crud.search_books, query, limit)
+
+# Search books, as row tuples
+async def search_book_rows(db, query: str, limit: int = 50):
+    return await run(db, crud.search_book_rows, query, limit)
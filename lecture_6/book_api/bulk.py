@@ -0,0 +1,86 @@
+import json
+
+from fastapi import Request
+from pydantic import ValidationError
+import async_crud
+import crud
+import schemas
+
+# Content types treated as one JSON document per line
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+# Only the first rejections are echoed back; the rest are only counted
+MAX_REPORTED_REJECTIONS = 1000
+
+# Yield the raw records of a JSON array or NDJSON request body
+async def read_records(request: Request):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in NDJSON_TYPES:
+        records = json.loads(await request.body())
+        if not isinstance(records, list):
+            raise ValueError("Expected a JSON array of books")
+        for record in records:
+            yield record
+        return
+
+    # NDJSON is parsed line by line as the body arrives, so it is never held in full
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield parse_line(line)
+    if buffer.strip():
+        yield parse_line(buffer)
+
+# Decode one NDJSON line; invalid JSON is passed on as the error itself
+def parse_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as exc:
+        return exc
+
+# Describe why a record was rejected
+def rejection_reason(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'book'}: {error['msg']}"
+            for error in exc.errors()
+        )
+    return f"Invalid JSON: {exc}"
+
+# Validate records and write them in batches of crud.BULK_BATCH_SIZE
+async def import_books(request: Request, db, upsert: bool = False) -> schemas.BulkImportResult:
+    result = schemas.BulkImportResult()
+    batch: list[schemas.BookCreate] = []
+    batch_rejected = 0
+
+    async def flush():
+        nonlocal batch, batch_rejected
+        inserted, matched = await async_crud.bulk_create_books(db, batch, upsert)
+        result.inserted += inserted
+        result.matched += matched
+        result.batches.append(schemas.BulkBatchResult(
+            batch=len(result.batches), inserted=inserted, matched=matched, rejected=batch_rejected
+        ))
+        batch, batch_rejected = [], 0
+
+    index = 0
+    async for record in read_records(request):
+        try:
+            if isinstance(record, Exception):
+                raise record
+            batch.append(schemas.BookCreate.model_validate(record))
+        except ValueError as exc:
+            batch_rejected += 1
+            result.rejected_count += 1
+            if len(result.rejected) < MAX_REPORTED_REJECTIONS:
+                result.rejected.append(schemas.BulkRejectedRow(index=index, error=rejection_reason(exc)))
+        index += 1
+        if len(batch) >= crud.BULK_BATCH_SIZE:
+            await flush()
+
+    if batch or batch_rejected:
+        await flush()
+    return result
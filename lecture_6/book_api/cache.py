@@ -0,0 +1,168 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import redis
+except ImportError:  # optional: only needed for CACHE_BACKEND=redis
+    redis = None
+
+# In-process LRU cache; entries expire after `ttl` seconds
+class LRUCache:
+    blocking = False
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+# Shared cache on a Redis-compatible client (anything with get/set/incr).
+# Every call is a network round trip, so ResponseCache keeps it off the event loop.
+class RedisCache:
+    blocking = True
+
+    def __init__(self, client, ttl: float = 60.0):
+        self.client = client
+        self.ttl = ttl
+
+    def get(self, key: str) -> bytes | None:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes):
+        self.client.set(key, value, ex=max(1, int(self.ttl)))
+
+    def counter(self, key: str) -> int:
+        return int(self.client.get(key) or 0)
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(key)
+
+# Cache disabled
+class NullCache:
+    blocking = False
+
+    def get(self, key: str) -> bytes | None:
+        return None
+
+    def set(self, key: str, value: bytes):
+        pass
+
+    def counter(self, key: str) -> int:
+        return 0
+
+    def incr(self, key: str) -> int:
+        return 0
+
+# Pre-serialized responses grouped in namespaces. Every key embeds the
+# namespace's generation counter, so invalidate() makes all existing
+# entries unreachable at once and they simply age out of the backend.
+class ResponseCache:
+    def __init__(self, backend, prefix: str = "book_api"):
+        self.backend = backend
+        self.prefix = prefix
+
+    def _generation_key(self, namespace: str) -> str:
+        return f"{self.prefix}:generation:{namespace}"
+
+    def _key(self, namespace: str, generation: int, name: str, params: dict) -> str:
+        return f"{self.prefix}:{namespace}:{generation}:{name}?{urlencode(sorted(params.items()))}"
+
+    # Build the key before reading the database: a write that lands while the
+    # response is being built bumps the generation, so the result is stored
+    # under a key nobody reads any more
+    def key(self, namespace: str, name: str, **params) -> str:
+        generation = self.backend.counter(self._generation_key(namespace))
+        return self._key(namespace, generation, name, params)
+
+    def get(self, key: str) -> bytes | None:
+        return self.backend.get(key)
+
+    def set(self, key: str, body: bytes):
+        self.backend.set(key, body)
+
+    # Run a backend call from async code; blocking backends go to the threadpool
+    async def _call(self, fn, *args):
+        if self.backend.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    # Async versions of key, get and set, for request handlers
+    async def akey(self, namespace: str, name: str, **params) -> str:
+        generation = await self._call(self.backend.counter, self._generation_key(namespace))
+        return self._key(namespace, generation, name, params)
+
+    async def aget(self, key: str) -> bytes | None:
+        return await self._call(self.backend.get, key)
+
+    async def aset(self, key: str, body: bytes):
+        await self._call(self.backend.set, key, body)
+
+    # Called by crud after a commit. Async sessions run crud on the event loop
+    # thread; there a blocking backend is bumped from the threadpool without
+    # waiting, which is safe because cached responses are also keyed by the
+    # books table version the commit has already changed.
+    def invalidate(self, namespace: str):
+        if self.backend.blocking:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+            else:
+                loop.run_in_executor(None, self.backend.incr, self._generation_key(namespace))
+                return
+        self.backend.incr(self._generation_key(namespace))
+
+# Build the backend selected by CACHE_BACKEND (memory, redis or none)
+def create_backend():
+    backend = os.getenv("CACHE_BACKEND", "memory")
+    ttl = float(os.getenv("CACHE_TTL", "60"))
+    if backend == "memory":
+        return LRUCache(maxsize=int(os.getenv("CACHE_MAXSIZE", "1024")), ttl=ttl)
+    if backend == "redis":
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+        return RedisCache(redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0")), ttl=ttl)
+    if backend == "none":
+        return NullCache()
+    raise ValueError(f"CACHE_BACKEND must be 'memory', 'redis' or 'none', got {backend!r}")
+
+# Cache of serialized book listings and searches
+response_cache = ResponseCache(create_backend())
+
+# Namespace for every cached response derived from the books table
+BOOKS = "books"
@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request
+
+# Weak ETag for a table version
+def etag(version: int) -> str:
+    return f'W/"{version}"'
+
+# Validator headers for a response derived from a table at `version`
+def validator_headers(version: int, updated_at: datetime | None) -> dict:
+    headers = {"ETag": etag(version), "Cache-Control": "no-cache"}
+    if updated_at is not None:
+        headers["Last-Modified"] = format_datetime(updated_at.replace(tzinfo=timezone.utc), usegmt=True)
+    return headers
+
+# Whether the client's copy is still current. If-None-Match wins over
+# If-Modified-Since, and ETags are compared weakly, as RFC 9110 requires.
+# "*" is not honoured: the decision is made from the table version, before
+# a single book is known to exist, so it would answer 304 for missing books.
+def is_not_modified(request: Request, version: int, updated_at: datetime | None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        current = etag(version).removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == current for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or updated_at is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have one-second resolution
+    return updated_at.replace(tzinfo=timezone.utc, microsecond=0) <= since
@@ -1,6 +1,30 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 import models
 import schemas
+import search_index
+import stats
+from cache import BOOKS, response_cache
+
+# Bump the books table version; call inside the transaction that writes books
+def bump_books_version(db: Session):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    stmt = sqlite_insert(models.TableVersion).values(name=models.Book.__tablename__, version=1, updated_at=now)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[models.TableVersion.name],
+        set_={"version": models.TableVersion.version + 1, "updated_at": now},
+    ))
+
+# Current (version, updated_at UTC) of the books table; (0, None) before the first write
+def get_books_version(db: Session) -> tuple[int, datetime | None]:
+    row = db.execute(
+        select(models.TableVersion.version, models.TableVersion.updated_at)
+        .where(models.TableVersion.name == models.Book.__tablename__)
+    ).first()
+    return (row.version, row.updated_at) if row else (0, None)
 
 # Create new book
 def create_book(db: Session, book: schemas.BookCreate):
@@ -10,37 +34,206 @@ def create_book(db: Session, book: schemas.BookCreate):
         year=book.year
     )
     db.add(db_book)
+    db.flush()
+    search_index.index_book(db, db_book)
+    bump_books_version(db)
     db.commit()
-    db.refresh(db_book)
+    response_cache.invalidate(BOOKS)
     return db_book
 
-# Get all books
-def get_books(db: Session):
-    return db.query(models.Book).all()
+# Get one book by primary key (answered from the identity map when already loaded)
+def get_book(db: Session, book_id: int):
+    return db.get(models.Book, book_id)
+
+# Get one page of books, keyset-paginated on id
+def get_books(db: Session, limit: int = 100, after_id: int | None = None):
+    query = db.query(models.Book)
+    if after_id is not None:
+        query = query.filter(models.Book.id > after_id)
+    return query.order_by(models.Book.id).limit(limit).all()
+
+# Book columns in schemas.Book field order, for tuple-based serialization
+BOOK_ROW_COLUMNS = [getattr(models.Book, name) for name in schemas.Book.model_fields]
+
+# Keyset-paginated books as plain row tuples (no ORM objects)
+def book_rows_query(after_id: int | None = None):
+    stmt = select(*BOOK_ROW_COLUMNS).order_by(models.Book.id)
+    if after_id is not None:
+        stmt = stmt.where(models.Book.id > after_id)
+    return stmt
+
+# Get one page of books as row tuples
+def get_book_rows(db: Session, limit: int = 100, after_id: int | None = None):
+    return db.execute(book_rows_query(after_id).limit(limit)).all()
+
+# Iterate over all books as row tuples, in fixed-size batches from a server-side cursor
+def iter_book_rows(db: Session, batch_size: int = 1000, after_id: int | None = None):
+    result = db.execute(book_rows_query(after_id).execution_options(yield_per=batch_size))
+    yield from result.partitions()
+
+# Rows written per transaction by bulk imports
+BULK_BATCH_SIZE = 5000
+
+# Natural key used to recognise a book that is already in the catalogue
+def natural_key(row: dict) -> tuple:
+    return row["title"], row["author"], row["year"]
+
+# Drop rows whose natural key already exists (in the table or earlier in the batch);
+# run under the write lock, nothing in the schema enforces the key
+def drop_existing_books(db: Session, rows: list[dict]) -> tuple[list[dict], int]:
+    titles = {row["title"] for row in rows}
+    existing = {
+        tuple(key)
+        for key in db.execute(
+            select(models.Book.title, models.Book.author, models.Book.year)
+            .where(models.Book.title.in_(titles))
+        )
+    }
+    new_rows = []
+    for row in rows:
+        key = natural_key(row)
+        if key not in existing:
+            existing.add(key)
+            new_rows.append(row)
+    return new_rows, len(rows) - len(new_rows)
+
+# Insert a batch of books in one transaction with a single executemany.
+# With upsert=True books matching an existing (title, author, year) are skipped.
+# Returns (inserted, matched).
+def bulk_create_books(db: Session, books: list[schemas.BookCreate], upsert: bool = False):
+    rows = [book.model_dump() for book in books]
+    matched = 0
+    if upsert and rows:
+        # Take the write lock before looking for existing books, so a concurrent
+        # import cannot insert the same book between the check and the insert
+        db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+        rows, matched = drop_existing_books(db, rows)
+    if rows:
+        inserted = db.execute(
+            insert(models.Book).returning(models.Book.id, models.Book.title, models.Book.author, models.Book.year),
+            rows,
+        ).all()
+        search_index.index_rows(db, [row._asdict() for row in inserted])
+        bump_books_version(db)
+    db.commit()
+    if rows:
+        response_cache.invalidate(BOOKS)
+    return len(rows), matched
 
-# Delete book
+# Delete book with a single DELETE ... RETURNING; returns the deleted book or None
 def delete_book(db: Session, book_id: int):
-    book = db.query(models.Book).filter(models.Book.id == book_id).first()
-    if book:
-        db.delete(book)
-        db.commit()
+    book = db.execute(
+        delete(models.Book)
+        .where(models.Book.id == book_id)
+        .returning(models.Book)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+    if book is None:
+        db.rollback()
+        return None
+    search_index.unindex_book(db, book_id)
+    bump_books_version(db)
+    db.commit()
+    response_cache.invalidate(BOOKS)
     return book
 
-# Update book
+# Update book (replace every field)
 def update_book(db: Session, book_id: int, book_data: schemas.BookUpdate):
-    book = db.query(models.Book).filter(models.Book.id == book_id).first()
-    if not book:
+    return patch_book(db, book_id, book_data.model_dump())
+
+# Write only the given columns with a single UPDATE ... RETURNING; the stats
+# triggers move the book between summary rows in the same statement
+def patch_book(db: Session, book_id: int, changes: dict):
+    if not changes:
+        return get_book(db, book_id)
+    book = db.execute(
+        update(models.Book)
+        .where(models.Book.id == book_id)
+        .values(**changes)
+        .returning(models.Book)
+    ).scalar_one_or_none()
+    if book is None:
+        db.rollback()
         return None
-    book.title = book_data.title
-    book.author = book_data.author
-    book.year = book_data.year
+    if "title" in changes or "author" in changes:
+        search_index.reindex_book(db, book)
+    bump_books_version(db)
     db.commit()
-    db.refresh(book)
+    response_cache.invalidate(BOOKS)
     return book
 
-# Search books
-def search_books(db: Session, query: str):
-    return db.query(models.Book).filter(
-        models.Book.title.contains(query) |
-        models.Book.author.contains(query)
+# WHERE clause for a schemas.BookSelection; criteria are ANDed
+def selection_filter(selection: schemas.BookSelection) -> list:
+    conditions = []
+    if selection.ids is not None:
+        conditions.append(models.Book.id.in_(selection.ids))
+    if selection.title is not None:
+        conditions.append(models.Book.title == selection.title)
+    if selection.author is not None:
+        conditions.append(models.Book.author == selection.author)
+    if selection.year is not None:
+        conditions.append(models.Book.year == selection.year)
+    if selection.year_from is not None:
+        conditions.append(models.Book.year >= selection.year_from)
+    if selection.year_to is not None:
+        conditions.append(models.Book.year <= selection.year_to)
+    return conditions
+
+# Delete every selected book with one DELETE ... RETURNING; the returned
+# ids are all the search index needs. Returns the number deleted.
+def delete_books(db: Session, selection: schemas.BookSelection) -> int:
+    deleted = db.execute(
+        delete(models.Book)
+        .where(*selection_filter(selection))
+        .returning(models.Book.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not deleted:
+        db.rollback()
+        return 0
+    search_index.unindex_rows(db, [row.id for row in deleted])
+    bump_books_version(db)
+    db.commit()
+    response_cache.invalidate(BOOKS)
+    return len(deleted)
+
+# Write the same changes to every selected book with one UPDATE ... RETURNING.
+# Returns the number updated.
+def update_books(db: Session, selection: schemas.BookSelection, changes: dict) -> int:
+    updated = db.execute(
+        update(models.Book)
+        .where(*selection_filter(selection))
+        .values(**changes)
+        .returning(models.Book.id, models.Book.title, models.Book.author, models.Book.year)
+        .execution_options(synchronize_session=False)
     ).all()
+    if not updated:
+        db.rollback()
+        return 0
+    if "title" in changes or "author" in changes:
+        search_index.unindex_rows(db, [row.id for row in updated])
+        search_index.index_rows(db, [row._asdict() for row in updated])
+    bump_books_version(db)
+    db.commit()
+    response_cache.invalidate(BOOKS)
+    return len(updated)
+
+# Book counts per author, alphabetically
+def get_author_counts(db: Session, limit: int = 100, after: str | None = None):
+    return stats.author_counts(db, limit, after)
+
+# Authors with the most books
+def get_top_authors(db: Session, n: int = 10):
+    return stats.top_authors(db, n)
+
+# Book counts per decade
+def get_decade_counts(db: Session):
+    return stats.decade_counts(db)
+
+# Search books by title/author words (prefix match, best matches first)
+def search_books(db: Session, query: str, limit: int = 50):
+    return search_index.search(db, query, limit)
+
+# Same search, as row tuples in schemas.Book field order
+def search_book_rows(db: Session, query: str, limit: int = 50):
+    return search_index.search_rows(db, query, [column.key for column in BOOK_ROW_COLUMNS], limit)
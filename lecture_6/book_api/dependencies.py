@@ -1,4 +1,4 @@
-from database import SessionLocal
+from database import DB_MODE, AsyncSessionLocal, SessionLocal
 
 # Dependency: create DB session per request
 def get_db():
@@ -7,3 +7,11 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency: create async DB session per request
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependency used by the routes: async or sync session, depending on DB_MODE
+get_session = get_async_db if DB_MODE == "async" else get_db
@@ -0,0 +1,76 @@
+# Gunicorn settings for running book_api in production:
+#   gunicorn -c gunicorn.conf.py main:app
+#
+# Each worker is a uvicorn event loop (uvloop and httptools are used when
+# installed). Signals: HUP restarts workers gracefully with the current
+# code; USR2 starts a new master with new code, then WINCH/QUIT the old one.
+# Without gunicorn (e.g. on Windows) use: uvicorn main:app --workers N
+# (/metrics then only reports the worker that answers the scrape).
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# Async workers each use a whole core; SQLite allows a single writer, so more
+# processes than cores only adds lock contention
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Import the app once in the master, then fork
+preload_app = True
+
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+# Recycle workers now and then to bound memory growth
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv("ACCESS_LOG", "-") or None
+
+# Each worker keeps its own metrics; they share this directory so /metrics
+# reports the totals of all workers whichever one answers the scrape. Set
+# before the app is imported, since metrics.py reads it at import time.
+# A directory created here is removed again when the master exits.
+TEMP_METRICS_PREFIX = "book_api_metrics_"
+if not os.getenv("METRICS_DIR"):
+    os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix=TEMP_METRICS_PREFIX)
+
+
+# Start from zero when METRICS_DIR is a fixed directory reused across runs
+def on_starting(server):
+    import metrics
+
+    metrics.reset_dir()
+
+
+def on_exit(server):
+    metrics_dir = os.environ["METRICS_DIR"]
+    if os.path.basename(metrics_dir).startswith(TEMP_METRICS_PREFIX):
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+# Connections opened by the master while preloading must not be shared with
+# the forked workers: drop them from the pools without closing them
+def post_fork(server, worker):
+    from database import async_engine, engine
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+
+# Flush the requests served since the worker's last metrics write
+def worker_exit(server, worker):
+    import metrics
+
+    metrics.dump()
+
+
+# Keep an exited worker's counts in the totals (runs in the master)
+def child_exit(server, worker):
+    import metrics
+
+    metrics.collect_exited(worker.pid)
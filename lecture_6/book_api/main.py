@@ -1,49 +1,209 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 
-import models
 import schemas
-import crud
-from database import engine
-from dependencies import get_db
+import async_crud
+import bulk
+import conditional
+import metrics
+import migrations
+import serializers
+from cache import BOOKS, response_cache
+from database import async_engine, engine
+from dependencies import get_session
+
+# The schema is managed by `python migrations.py upgrade`; startup only reads
+# PRAGMA user_version and refuses to serve a database it does not match.
+# Close pooled connections on shutdown (aiosqlite connections each own a thread).
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    migrations.check(engine)
+    yield
+    await async_engine.dispose()
+    engine.dispose()
+
+app = FastAPI(
+    title="Book Collection API",
+    lifespan=lifespan,
+    default_response_class=serializers.DefaultJSONResponse,
+)
+
+# Book rows are serialized straight from tuples, in schemas.Book field order
+book_rows = serializers.RowSerializer(schemas.Book)
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
+# Request timing and per-request SQL usage, exposed on /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
 
-app = FastAPI(title="Book Collection API")
+# Rows fetched per round trip when streaming the whole collection
+STREAM_BATCH_SIZE = 1000
+
+# JSON response derived from the books table: 304 when the client's copy is
+# current, otherwise the cached body, built and cached on a miss. Only the
+# one-row table version is read before deciding, plus `check` (which raises
+# for a missing resource) when the validators cannot tell that it exists.
+async def books_response(request: Request, db, name: str, build, check=None, **params) -> Response:
+    version, updated_at = await async_crud.get_books_version(db)
+    headers = conditional.validator_headers(version, updated_at)
+    if check is not None:
+        await check()
+    if conditional.is_not_modified(request, version, updated_at):
+        return Response(status_code=304, headers=headers)
+
+    key = await response_cache.akey(BOOKS, name, version=version, **params)
+    body = await response_cache.aget(key)
+    if body is None:
+        body = await build()
+        await response_cache.aset(key, body)
+    return Response(body, media_type="application/json", headers=headers)
 
 # Add book
 @app.post("/books/", response_model=schemas.Book)
-def create_book(book: schemas.BookCreate, db: Session = Depends(get_db)):
-    return crud.create_book(db, book)
+async def create_book(book: schemas.BookCreate, db=Depends(get_session)):
+    return await async_crud.create_book(db, book)
+
+# Bulk import: JSON array or NDJSON body, written in batched transactions
+@app.post("/books/bulk", response_model=schemas.BulkImportResult)
+async def bulk_create_books(request: Request, upsert: bool = False, db=Depends(get_session)):
+    try:
+        return await bulk.import_books(request, db, upsert)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+# Serialize batches of book rows as newline-delimited JSON
+async def books_to_ndjson(batches):
+    async for batch in batches:
+        yield book_rows.dumps_ndjson(batch)
+
+# Batch delete: every book matching the ids and/or filters in the body, in one statement
+@app.delete("/books/", response_model=schemas.BookBatchResult)
+async def delete_books(selection: schemas.BookSelection, db=Depends(get_session)):
+    return {"affected": await async_crud.delete_books(db, selection)}
+
+# Batch update: the same field values for every matching book, in one statement
+@app.patch("/books/", response_model=schemas.BookBatchResult)
+async def update_books(batch: schemas.BookBatchUpdate, db=Depends(get_session)):
+    changes = batch.values.model_dump(exclude_unset=True)
+    return {"affected": await async_crud.update_books(db, batch.where, changes)}
+
+# List books: one page at a time, or the whole collection as an NDJSON stream
+@app.get("/books/", response_model=schemas.BookPage)
+async def get_books(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    after_id: int | None = Query(None, ge=0),
+    stream: bool = False,
+    db=Depends(get_session),
+):
+    if stream:
+        batches = async_crud.iter_book_rows(db, STREAM_BATCH_SIZE, after_id)
+        return StreamingResponse(books_to_ndjson(batches), media_type="application/x-ndjson")
+
+    async def build() -> bytes:
+        # Fetch one extra row to know whether another page exists
+        rows = await async_crud.get_book_rows(db, limit + 1, after_id)
+        return serializers.dumps({
+            "items": book_rows.to_dicts(rows[:limit]),
+            "next_after_id": rows[limit - 1].id if len(rows) > limit else None,
+        })
+
+    return await books_response(request, db, "list", build, limit=limit, after_id=after_id)
+
+# Book counts per author, alphabetically, from the author_counts summary table
+@app.get("/books/stats/authors", response_model=schemas.AuthorCountPage)
+async def author_counts(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    after: str | None = None,
+    db=Depends(get_session),
+):
+    async def build() -> bytes:
+        rows = await async_crud.get_author_counts(db, limit + 1, after)
+        return serializers.dumps({
+            "items": [row._asdict() for row in rows[:limit]],
+            "next_after": rows[limit - 1].author if len(rows) > limit else None,
+        })
 
-# List all books
-@app.get("/books/", response_model=list[schemas.Book])
-def get_books(db: Session = Depends(get_db)):
-    return crud.get_books(db)
+    return await books_response(request, db, "stats-authors", build, limit=limit, after=after)
+
+# Authors with the most books
+@app.get("/books/stats/authors/top", response_model=list[schemas.AuthorCount])
+async def top_authors(request: Request, n: int = Query(10, ge=1, le=1000), db=Depends(get_session)):
+    async def build() -> bytes:
+        return serializers.dumps([row._asdict() for row in await async_crud.get_top_authors(db, n)])
+
+    return await books_response(request, db, "stats-top-authors", build, n=n)
+
+# Histogram of books per decade; books without a year are counted under decade null
+@app.get("/books/stats/decades", response_model=list[schemas.DecadeCount])
+async def decade_counts(request: Request, db=Depends(get_session)):
+    async def build() -> bytes:
+        return serializers.dumps([row._asdict() for row in await async_crud.get_decade_counts(db)])
+
+    return await books_response(request, db, "stats-decades", build)
 
 # Delete book
 @app.delete("/books/{book_id}")
-def delete_book(book_id: int, db: Session = Depends(get_db)):
-    result = crud.delete_book(db, book_id)
+async def delete_book(book_id: int, db=Depends(get_session)):
+    result = await async_crud.delete_book(db, book_id)
     if result is None:
         raise HTTPException(status_code=404, detail="Book not found")
     return {"message": "Deleted"}
 
+# Get one book by id
+@app.get("/books/{book_id}", response_model=schemas.Book)
+async def get_book(request: Request, book_id: int, db=Depends(get_session)):
+    # The validators are table-wide, so a client's list ETag would match any
+    # id: look the book up before answering 304. build() then gets it from
+    # the session's identity map without a second query.
+    async def check():
+        if await async_crud.get_book(db, book_id) is None:
+            raise HTTPException(status_code=404, detail="Book not found")
+
+    async def build() -> bytes:
+        book = await async_crud.get_book(db, book_id)
+        return schemas.Book.model_validate(book).model_dump_json().encode()
+
+    return await books_response(request, db, "book", build, check, book_id=book_id)
+
 # Update book
 @app.put("/books/{book_id}", response_model=schemas.Book)
-def update_book(book_id: int, book: schemas.BookUpdate, db: Session = Depends(get_db)):
-    updated = crud.update_book(db, book_id, book)
+async def update_book(book_id: int, book: schemas.BookUpdate, db=Depends(get_session)):
+    updated = await async_crud.update_book(db, book_id, book)
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return updated
+
+# Partially update book
+@app.patch("/books/{book_id}", response_model=schemas.Book)
+async def patch_book(book_id: int, book: schemas.BookPatch, db=Depends(get_session)):
+    updated = await async_crud.patch_book(db, book_id, book.model_dump(exclude_unset=True))
     if updated is None:
         raise HTTPException(status_code=404, detail="Book not found")
     return updated
 
 # Search
 @app.get("/books/search/", response_model=list[schemas.Book])
-def search_books(query: str, db: Session = Depends(get_db)):
-    return crud.search_books(db, query)
+async def search_books(
+    request: Request,
+    query: str,
+    limit: int = Query(50, ge=1, le=500),
+    db=Depends(get_session),
+):
+    async def build() -> bytes:
+        return book_rows.dumps_list(await async_crud.search_book_rows(db, query, limit))
+
+    return await books_response(request, db, "search", build, query=query, limit=limit)
 
 # Healthcheck endpoint
 @app.get("/healthcheck")
 async def healthcheck() -> dict:
     return {"status": "ok"}
+
+# Prometheus metrics endpoint
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
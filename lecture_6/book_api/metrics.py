@@ -0,0 +1,359 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+# Log statements slower than this many milliseconds (unset = slow-query log off)
+SLOW_QUERY_MS = float(os.environ["SLOW_QUERY_MS"]) if os.getenv("SLOW_QUERY_MS") else None
+
+slow_query_log = logging.getLogger("book_api.slow_query")
+
+# Latency buckets in seconds, from sub-millisecond cache hits to multi-second imports
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# Directory shared by the worker processes of one server (set by
+# gunicorn.conf.py). Each worker writes its metrics there, and /metrics
+# reports the sum over all workers instead of the one that answered.
+METRICS_DIR = os.getenv("METRICS_DIR") or None
+
+# Seconds between writes of a worker's metrics file while it serves requests
+METRICS_DUMP_INTERVAL = 1.0
+
+
+def format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+# Monotonic counter with labels
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            for values, total in self._values.items():
+                yield f"{self.name}{format_labels(self.labels, values)} {total}"
+
+    # Same metric without samples
+    def empty(self):
+        return type(self)(self.name, self.help, self.labels)
+
+    # JSON-serializable samples, for merge() in another process
+    def state(self) -> list:
+        with self._lock:
+            return [[list(values), total] for values, total in self._values.items()]
+
+    def merge(self, state: list):
+        for values, total in state:
+            self.inc(*values, amount=total)
+
+
+# Value that goes up and down, e.g. requests in flight
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+
+# Cumulative histogram with fixed buckets, rendered the Prometheus way
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            for values, (counts, total, count) in self._series.items():
+                cumulative = 0
+                for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                    cumulative += bucket_count
+                    le = f'le="{bound}"'
+                    yield f"{self.name}_bucket{format_labels(self.labels, values, le)} {cumulative}"
+                yield f"{self.name}_sum{format_labels(self.labels, values)} {total}"
+                yield f"{self.name}_count{format_labels(self.labels, values)} {count}"
+
+    def empty(self):
+        return type(self)(self.name, self.help, self.labels, self.buckets)
+
+    def state(self) -> list:
+        with self._lock:
+            return [[list(values), list(counts), total, count] for values, (counts, total, count) in self._series.items()]
+
+    def merge(self, state: list):
+        with self._lock:
+            for values, counts, total, count in state:
+                series = self._series.setdefault(tuple(values), [[0] * (len(self.buckets) + 1), 0.0, 0])
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+                series[2] += count
+
+
+# All metrics of this process
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    # Prometheus text exposition format 0.0.4
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    # Metric name -> samples of every metric, as JSON-serializable lists
+    def state(self) -> dict:
+        return {metric.name: metric.state() for metric in self.metrics}
+
+    # New registry holding the sum of `states` (from Registry.state)
+    def merged(self, states) -> "Registry":
+        total = Registry()
+        for metric in self.metrics:
+            merged = total.register(metric.empty())
+            for state in states:
+                merged.merge(state.get(metric.name, []))
+        return total
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "book_api_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"),
+))
+REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "book_api_requests_in_flight", "HTTP requests currently being served",
+))
+REQUEST_DB_QUERIES = registry.register(Histogram(
+    "book_api_request_db_queries", "SQL statements executed per HTTP request", ("route",), QUERY_COUNT_BUCKETS,
+))
+REQUEST_DB_TIME = registry.register(Histogram(
+    "book_api_request_db_seconds", "Time per HTTP request spent executing SQL", ("route",),
+))
+DB_QUERIES = registry.register(Counter(
+    "book_api_db_queries_total", "SQL statements executed",
+))
+DB_QUERY_LATENCY = registry.register(Histogram(
+    "book_api_db_query_duration_seconds", "SQL statement execution time",
+))
+SLOW_QUERIES = registry.register(Counter(
+    "book_api_db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS",
+))
+
+
+# Per-process files in METRICS_DIR: one per live worker, written by the
+# worker, plus the counters of exited workers, folded in by the master
+EXITED_FILE = "exited.json"
+
+
+def worker_file(pid: int | None = None) -> str:
+    return os.path.join(METRICS_DIR, f"worker-{pid or os.getpid()}.json")
+
+
+def read_state(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+# Replace `path` in one step, so readers never see a partial file
+def write_state(path: str, state: dict):
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(temp, path)
+
+
+# Held exclusively while exited counters move between files, shared while
+# reading them. Only used with METRICS_DIR, i.e. under gunicorn (POSIX only).
+class DirLock:
+    def __init__(self, exclusive: bool):
+        self.exclusive = exclusive
+
+    def __enter__(self):
+        import fcntl
+
+        self.file = open(os.path.join(METRICS_DIR, ".lock"), "a")
+        fcntl.flock(self.file, fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+
+    def __exit__(self, *exc_info):
+        self.file.close()  # releases the lock
+
+
+_last_dump = 0.0
+_dump_scheduled = False
+
+
+# Write this worker's metrics file
+def dump():
+    global _last_dump, _dump_scheduled
+    _last_dump, _dump_scheduled = time.monotonic(), False
+    write_state(worker_file(), registry.state())
+
+
+# Write it after a request, at most once per METRICS_DUMP_INTERVAL; a later
+# write is scheduled rather than skipped, so an idle worker's file catches up
+def maybe_dump():
+    global _dump_scheduled
+    if METRICS_DIR is None or _dump_scheduled:
+        return
+    delay = _last_dump + METRICS_DUMP_INTERVAL - time.monotonic()
+    if delay <= 0:
+        dump()
+    else:
+        _dump_scheduled = True
+        asyncio.get_running_loop().call_later(delay, dump)
+
+
+# Remove the files of a previous server run
+def reset_dir():
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+        os.remove(path)
+
+
+# Called by the master once worker `pid` has exited: add its counters and
+# histograms to EXITED_FILE and remove its file, so totals survive worker
+# recycling and the files do not pile up. Its gauges are dropped.
+def collect_exited(pid: int):
+    with DirLock(exclusive=True):
+        state = read_state(worker_file(pid))
+        if not state:
+            return
+        exited_path = os.path.join(METRICS_DIR, EXITED_FILE)
+        total = registry.merged([read_state(exited_path), state])
+        write_state(exited_path, {metric.name: metric.state() for metric in total.metrics if metric.kind != "gauge"})
+        os.remove(worker_file(pid))
+
+
+# The /metrics body: this process's metrics, or with METRICS_DIR the sum
+# over every worker (the others as of their last dump)
+def render() -> str:
+    if METRICS_DIR is None:
+        return registry.render()
+    dump()
+    with DirLock(exclusive=False):
+        states = [read_state(path) for path in glob.glob(os.path.join(METRICS_DIR, "*.json"))]
+    return registry.merged(states).render()
+
+
+# Database work done on behalf of the current request
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# Set by the middleware; the value is shared with the threadpool and greenlets
+# the request runs SQL from, so they all add to the same counters
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+# Start times are keyed by DBAPI cursor; a statement that raises skips
+# after_cursor_execute, so handle_error drops its entry instead
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", {})[cursor] = time.perf_counter()
+
+
+def handle_error(exception_context):
+    conn, context = exception_context.connection, exception_context.execution_context
+    if conn is not None and context is not None:
+        conn.info.get("query_start", {}).pop(getattr(context, "cursor", None), None)
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop(cursor)
+    DB_QUERIES.inc()
+    DB_QUERY_LATENCY.observe(elapsed)
+
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+    if SLOW_QUERY_MS is not None and elapsed * 1000 >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc()
+        slow_query_log.warning("slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split()))
+
+
+# Time every statement run through `engine` (a sync Engine or AsyncEngine.sync_engine)
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+
+# Pure ASGI middleware recording latency, in-flight requests and per-request SQL
+# usage. Routes are labelled by their path template so ids don't explode cardinality.
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_FLIGHT.dec()
+            current_request.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.observe(elapsed, scope["method"], route, status)
+            REQUEST_DB_QUERIES.observe(stats.queries, route)
+            REQUEST_DB_TIME.observe(stats.db_seconds, route)
+            maybe_dump()
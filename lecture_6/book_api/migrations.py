@@ -0,0 +1,149 @@
+"""
+Versioned schema migrations for the book catalogue.
+
+The schema version is stored in SQLite's PRAGMA user_version. Each migration
+runs in its own BEGIN IMMEDIATE transaction together with the version bump,
+so a failed migration leaves the database at the previous version, and two
+upgrades started at once simply run one after the other.
+
+Usage:
+    python migrations.py upgrade   # apply pending migrations
+    python migrations.py status    # show current and latest version
+"""
+import sys
+
+from sqlalchemy import text
+
+import search_index
+import stats
+
+
+# 1: same layout the app used to create with metadata.create_all, so
+# existing books.db files are adopted as they are
+def create_base_tables(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS books ("
+        "id INTEGER NOT NULL, "
+        "title VARCHAR NOT NULL, "
+        "author VARCHAR NOT NULL, "
+        "year INTEGER, "
+        "PRIMARY KEY (id))"
+    ))
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS table_versions ("
+        "name VARCHAR NOT NULL, "
+        "version INTEGER NOT NULL, "
+        "updated_at DATETIME NOT NULL, "
+        "PRIMARY KEY (name))"
+    ))
+
+
+# 2: full-text index, filled from the books already in the table
+def create_search_index(conn):
+    search_index.create_index(conn)
+    indexed = conn.execute(text(f"SELECT COUNT(*) FROM {search_index.FTS_TABLE}")).scalar()
+    books = conn.execute(text("SELECT COUNT(*) FROM books")).scalar()
+    if indexed != books:
+        conn.execute(text(f"DELETE FROM {search_index.FTS_TABLE}"))
+        conn.execute(text(
+            f"INSERT INTO {search_index.FTS_TABLE} (rowid, title, author) SELECT id, title, author FROM books"
+        ))
+
+
+# 3: indexes for title lookups and author/year filters
+def add_query_indexes(conn):
+    # id is the rowid already; the extra index only slowed down writes
+    conn.execute(text("DROP INDEX IF EXISTS ix_books_id"))
+    # Natural-key lookups of bulk upserts
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_books_title ON books (title)"))
+    # Author filters, ordered by year
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_books_author_year ON books (author, year)"))
+    conn.execute(text("ANALYZE books"))
+
+
+# 4: per-author and per-year book counts, filled from the books already there
+def create_stats_tables(conn):
+    stats.create_tables(conn)
+    stats.rebuild(conn)
+
+
+# 5: triggers on books maintain the summary tables (crud.py used to adjust
+# them with a separate read), recounted once in case they drifted
+def create_stats_triggers(conn):
+    stats.create_triggers(conn)
+    stats.rebuild(conn)
+
+
+# (version, description, migration); versions are consecutive and never reused
+MIGRATIONS = [
+    (1, "books and table_versions tables", create_base_tables),
+    (2, "FTS5 search index with backfill", create_search_index),
+    (3, "title and (author, year) indexes", add_query_indexes),
+    (4, "author_counts and year_counts summary tables", create_stats_tables),
+    (5, "triggers maintaining author_counts and year_counts", create_stats_triggers),
+]
+
+HEAD = MIGRATIONS[-1][0]
+
+
+# Raised at startup when migrations are pending (or the code is older than the database)
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+# Schema version recorded in the database file (0 for a new database)
+def current_version(conn) -> int:
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+# Apply every pending migration; returns the versions applied
+def upgrade(engine) -> list[int]:
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            # Re-read under the write lock: another process may have got here first
+            if current_version(conn) >= version:
+                conn.rollback()
+                continue
+            migrate(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+            conn.commit()
+            applied.append(version)
+    return applied
+
+
+# Fail fast when the database is not at the version this code expects
+def check(engine) -> int:
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version != HEAD:
+        raise SchemaVersionError(
+            f"Database schema is at version {version}, this code needs version {HEAD}. "
+            "Run 'python migrations.py upgrade'."
+        )
+    return version
+
+
+def main() -> None:
+    from database import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "upgrade":
+        for version in upgrade(engine):
+            print(f"Applied migration {version}: {MIGRATIONS[version - 1][1]}")
+        print(f"Database schema is at version {HEAD}.")
+    elif command == "status":
+        with engine.connect() as conn:
+            version = current_version(conn)
+        print(f"Database schema is at version {version} (latest: {HEAD}).")
+        for number, description, _ in MIGRATIONS[version:]:
+            print(f"  pending {number}: {description}")
+    else:
+        print(__doc__)
+        sys.exit(2)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
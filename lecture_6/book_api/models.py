@@ -1,10 +1,22 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, DateTime, Index, Integer, String
 from database import Base
 
+# Indexes are created by migrations.py; they are declared here as well so the
+# models describe the schema the queries are written against
 class Book(Base):
     __tablename__ = "books"
+    __table_args__ = (Index("ix_books_author_year", "author", "year"),)
 
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, nullable=False)
+    id = Column(Integer, primary_key=True)
+    title = Column(String, nullable=False, index=True)
     author = Column(String, nullable=False)
     year = Column(Integer, nullable=True)
+
+
+# Write counter per table, used as a cheap validator for conditional GETs
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
@@ -0,0 +1,204 @@
+"""
+Query-plan audit for the SQL that crud.py generates.
+
+Runs every crud function once against a database, captures the statements
+they execute and asks SQLite for their EXPLAIN QUERY PLAN. Full table scans,
+temporary B-trees (sorts) and automatic indexes are reported unless the step
+expects them. Indexes declared on the models but missing from the database
+are listed with their DDL and can be created with --apply; add a migration
+for them as well, or the next fresh database will not have them.
+
+The workload writes, so by default it runs on a copy of the database.
+
+Usage:
+    python query_plans.py            # audit a copy of DATABASE_URL's database
+    python query_plans.py --apply    # also create missing model indexes in it
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from contextlib import closing
+
+from sqlalchemy import Index, create_engine, event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+import crud
+import models
+import schemas
+
+# Plan details that mean SQLite reads more rows than the query returns, or sorts them
+SCAN = "SCAN"
+TEMP_B_TREE = "USE TEMP B-TREE"
+AUTOMATIC_INDEX = "AUTOMATIC"
+
+# Statements worth explaining (PRAGMAs and transaction control are skipped)
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+# One call of each crud function; `book` is a row that exists at that point
+def workload():
+    book = {}
+
+    def create(db):
+        book["row"] = crud.create_book(db, schemas.BookCreate(title="Audit Title", author="Audit Author", year=2001))
+
+    def bulk_upsert(db):
+        crud.bulk_create_books(db, [schemas.BookCreate(title="Audit Title", author="Audit Author", year=2001)], upsert=True)
+
+    def patch(db):
+        crud.patch_book(db, book["row"].id, {"title": "Audit Title 2"})
+
+    def update(db):
+        crud.update_book(db, book["row"].id, schemas.BookUpdate(title="Audit Title", author="Audit Author", year=2002))
+
+    def stream(db):
+        for _ in crud.iter_book_rows(db):
+            pass
+
+    # (name, step, plan details the step is expected to have, why)
+    return [
+        ("get_books_version", crud.get_books_version, (), ""),
+        ("create_book", create, (), ""),
+        ("get_book", lambda db: crud.get_book(db, book["row"].id), (), ""),
+        ("get_books first page", lambda db: crud.get_books(db), (SCAN,), "walks the rowid in order and stops at LIMIT"),
+        ("get_books after_id", lambda db: crud.get_books(db, after_id=book["row"].id - 1), (), ""),
+        ("get_book_rows first page", lambda db: crud.get_book_rows(db), (SCAN,), "walks the rowid in order and stops at LIMIT"),
+        ("get_book_rows after_id", lambda db: crud.get_book_rows(db, after_id=book["row"].id - 1), (), ""),
+        ("iter_book_rows", stream, (SCAN,), "exports the whole table by design"),
+        ("bulk_create_books upsert", bulk_upsert, (), ""),
+        ("patch_book", patch, (), ""),
+        ("update_book", update, (), ""),
+        ("search_book_rows", lambda db: crud.search_book_rows(db, "audit"), (), ""),
+        ("search_books", lambda db: crud.search_books(db, "audit"), (), ""),
+        ("get_author_counts", lambda db: crud.get_author_counts(db), (SCAN,), "first page walks the author key in order"),
+        ("get_author_counts after", lambda db: crud.get_author_counts(db, after="Audit"), (), ""),
+        ("get_top_authors", lambda db: crud.get_top_authors(db), (SCAN,), "reads ix_author_counts_books in order up to LIMIT"),
+        ("get_decade_counts", lambda db: crud.get_decade_counts(db), (SCAN, TEMP_B_TREE), "one row per distinct year"),
+        ("update_books by author", lambda db: crud.update_books(db, schemas.BookSelection(author="Audit Author"), {"year": 2003}), (), ""),
+        ("update_books by ids", lambda db: crud.update_books(db, schemas.BookSelection(ids=[book["row"].id]), {"title": "Audit"}), (), ""),
+        ("delete_books by title", lambda db: crud.delete_books(db, schemas.BookSelection(title="No Such Title")), (), ""),
+        ("delete_book", lambda db: crud.delete_book(db, book["row"].id), (), ""),
+        ("delete_books by ids", lambda db: crud.delete_books(db, schemas.BookSelection(ids=[book["row"].id])), (), ""),
+    ]
+
+
+# Problems in one plan: (detail kind, plan line) for every line that scans or sorts.
+# Virtual tables (the FTS index) are always "scanned"; their own index does the work.
+def plan_problems(plan: list[str]) -> list[tuple[str, str]]:
+    problems = []
+    for line in plan:
+        if line.startswith(SCAN) and "VIRTUAL TABLE" not in line:
+            problems.append((SCAN, line))
+        elif line.startswith(TEMP_B_TREE):
+            problems.append((TEMP_B_TREE, line))
+        elif AUTOMATIC_INDEX in line:
+            problems.append((AUTOMATIC_INDEX, line))
+    return problems
+
+
+def explain(conn, statement: str, parameters) -> list[str]:
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return [row[3] for row in rows]
+
+
+# Run the workload on `engine` and explain each distinct statement it executed.
+# Returns one dict per (step, statement) with its plan and unexpected problems.
+def audit(engine) -> list[dict]:
+    captured = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        # executemany: every row has the same plan, explain with the first one
+        captured.setdefault(statement, parameters[0] if executemany else parameters)
+
+    reports = []
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with Session(engine, expire_on_commit=False) as db:
+            for name, step, expected, reason in workload():
+                captured.clear()
+                step(db)
+                db.commit()
+                # Start each step with an empty identity map so lookups reach the database
+                db.expunge_all()
+                for statement, parameters in list(captured.items()):
+                    if not statement.lstrip().upper().startswith(EXPLAINABLE):
+                        continue
+                    with engine.connect() as conn:
+                        plan = explain(conn, statement, parameters)
+                    reports.append({
+                        "step": name,
+                        "statement": " ".join(statement.split()),
+                        "plan": plan,
+                        "problems": [problem for problem in plan_problems(plan) if problem[0] not in expected],
+                        "expected": reason,
+                    })
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return reports
+
+
+# Indexes declared on the models that the database does not have
+def missing_indexes(engine) -> list[Index]:
+    inspector = inspect(engine)
+    missing = []
+    for table in models.Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in table.indexes if index.name not in existing)
+    return missing
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apply", action="store_true", help="create missing model indexes in the database")
+    parser.add_argument("--verbose", action="store_true", help="print every plan, not only the problems")
+    args = parser.parse_args()
+
+    import migrations
+    from database import engine
+
+    migrations.check(engine)
+    missing = missing_indexes(engine)
+    for index in missing:
+        print(f"Missing index declared on the model: {CreateIndex(index).compile(engine)}")
+    if missing and args.apply:
+        with engine.begin() as conn:
+            for index in missing:
+                index.create(conn)
+                print(f"Created {index.name}")
+        missing = []
+
+    # Audit a throwaway copy so the workload's writes never reach the real database
+    workdir = tempfile.mkdtemp()
+    copy = os.path.join(workdir, "audit.db")
+    with engine.connect() as conn, closing(sqlite3.connect(copy)) as target:
+        conn.connection.driver_connection.backup(target)
+    audit_engine = create_engine(f"sqlite:///{copy}")
+    try:
+        reports = audit(audit_engine)
+    finally:
+        audit_engine.dispose()
+        engine.dispose()
+        shutil.rmtree(workdir)
+
+    flagged = 0
+    for report in reports:
+        if report["problems"] or args.verbose:
+            print(f"\n[{report['step']}] {report['statement']}")
+            for line in report["plan"]:
+                print(f"    {line}")
+            if report["expected"] and not report["problems"]:
+                print(f"    (expected: {report['expected']})")
+        for kind, line in report["problems"]:
+            flagged += 1
+            print(f"  !! {kind}: {line}")
+
+    print(f"\n{len(reports)} statements audited, {flagged} problems, {len(missing)} missing indexes.")
+    sys.exit(1 if flagged or missing else 0)
+
+
+if __name__ == "__main__":
+    main()
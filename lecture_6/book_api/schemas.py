@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 class BookBase(BaseModel):
     title: str
@@ -11,8 +11,85 @@ class BookCreate(BookBase):
 class BookUpdate(BookBase):
     pass
 
+# Partial update: only the fields sent are written
+class BookPatch(BaseModel):
+    title: str | None = None
+    author: str | None = None
+    year: int | None = None
+
+    @model_validator(mode="after")
+    def required_fields_not_null(self):
+        for field in ("title", "author"):
+            if field in self.model_fields_set and getattr(self, field) is None:
+                raise ValueError(f"{field} cannot be null")
+        return self
+
+# Books targeted by a batch delete or update: an id list and/or filters, ANDed.
+# At least one criterion is required so an empty body cannot hit every book.
+class BookSelection(BaseModel):
+    ids: list[int] | None = Field(None, max_length=10000)
+    title: str | None = None
+    author: str | None = None
+    year: int | None = None
+    year_from: int | None = None
+    year_to: int | None = None
+
+    @model_validator(mode="after")
+    def has_criteria(self):
+        if all(getattr(self, name) is None for name in type(self).model_fields):
+            raise ValueError("select books by ids or at least one filter")
+        return self
+
+class BookBatchUpdate(BaseModel):
+    where: BookSelection
+    values: BookPatch
+
+    @model_validator(mode="after")
+    def has_values(self):
+        if not self.values.model_fields_set:
+            raise ValueError("values must set at least one field")
+        return self
+
+class BookBatchResult(BaseModel):
+    affected: int
+
 class Book(BookBase):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
 
-    class Config:
-        orm_mode = True
+class BookPage(BaseModel):
+    items: list[Book]
+    next_after_id: int | None = None
+
+
+class BulkRejectedRow(BaseModel):
+    index: int
+    error: str
+
+class BulkBatchResult(BaseModel):
+    batch: int
+    inserted: int
+    matched: int
+    rejected: int
+
+class BulkImportResult(BaseModel):
+    inserted: int = 0
+    matched: int = 0
+    rejected_count: int = 0
+    rejected: list[BulkRejectedRow] = []
+    batches: list[BulkBatchResult] = []
+
+
+class AuthorCount(BaseModel):
+    author: str
+    books: int
+
+class AuthorCountPage(BaseModel):
+    items: list[AuthorCount]
+    next_after: str | None = None
+
+# decade is None for books without a year
+class DecadeCount(BaseModel):
+    decade: int | None
+    books: int
@@ -0,0 +1,97 @@
+import re
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import models
+
+# FTS5 table mirroring books.title and books.author, keyed by book id (rowid)
+FTS_TABLE = "books_fts"
+
+# Create the full-text index if it does not exist yet
+def create_index(conn):
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        "USING fts5(title, author, tokenize = 'unicode61 remove_diacritics 2')"
+    ))
+
+# Add a book to the index (call inside the transaction that wrote the book)
+def index_book(db: Session, book: models.Book):
+    db.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, title, author) VALUES (:id, :title, :author)"),
+        {"id": book.id, "title": book.title, "author": book.author},
+    )
+
+# Add many books at once; rows are dicts with id, title and author
+def index_rows(db: Session, rows: list[dict]):
+    if rows:
+        db.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, title, author) VALUES (:id, :title, :author)"),
+            rows,
+        )
+
+# Remove a book from the index
+def unindex_book(db: Session, book_id: int):
+    db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": book_id})
+
+# Remove many books at once
+def unindex_rows(db: Session, book_ids: list[int]):
+    if book_ids:
+        db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), [{"id": book_id} for book_id in book_ids])
+
+# Re-index a book after its title or author changed
+def reindex_book(db: Session, book: models.Book):
+    unindex_book(db, book.id)
+    index_book(db, book)
+
+# Turn free text into an FTS5 query: every word must match as a prefix
+def match_expression(query: str) -> str | None:
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+# Best matches first (bm25 rank), at most `limit` books
+def search(db: Session, query: str, limit: int = 50):
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    stmt = text(
+        f"SELECT books.* FROM {FTS_TABLE} "
+        f"JOIN books ON books.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH :expression "
+        "ORDER BY rank LIMIT :limit"
+    )
+    return db.query(models.Book).from_statement(stmt).params(expression=expression, limit=limit).all()
+
+# Same search, returning only the given books columns as row tuples
+def search_rows(db: Session, query: str, columns: list[str], limit: int = 50):
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    stmt = text(
+        f"SELECT {', '.join(f'books.{column}' for column in columns)} FROM {FTS_TABLE} "
+        f"JOIN books ON books.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH :expression "
+        "ORDER BY rank LIMIT :limit"
+    )
+    return db.execute(stmt, {"expression": expression, "limit": limit}).all()
+
+# Rebuild the whole index from the books table; returns the number of indexed books
+def rebuild(db: Session) -> int:
+    db.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    result = db.execute(text(f"INSERT INTO {FTS_TABLE} (rowid, title, author) SELECT id, title, author FROM books"))
+    db.commit()
+    return result.rowcount
+
+
+# One-time backfill for databases created before the index existed:
+#   python search_index.py
+if __name__ == "__main__":
+    import migrations
+    from database import SessionLocal, engine
+
+    migrations.upgrade(engine)
+    with SessionLocal() as session:
+        count = rebuild(session)
+    print(f"Indexed {count} books into {FTS_TABLE}.")
@@ -0,0 +1,39 @@
+import json
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
+
+# Encode a JSON value to compact UTF-8 bytes (same output as Pydantic's model_dump_json)
+if orjson is not None:
+    def dumps(value) -> bytes:
+        return orjson.dumps(value)
+else:
+    def dumps(value) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+# Default response class. FastAPI's ORJSONResponse needs orjson (pinned in
+# requirements.txt); without it Starlette's JSONResponse renders the same bytes.
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+# Serializer for rows selected as plain tuples in a schema's field order.
+# No ORM object or Pydantic model is built per row. Rows come straight from
+# typed columns, so they are not re-validated.
+class RowSerializer:
+    def __init__(self, schema):
+        self.fields = tuple(schema.model_fields)
+
+    def to_dicts(self, rows) -> list[dict]:
+        fields = self.fields
+        return [dict(zip(fields, row)) for row in rows]
+
+    # JSON array of rows
+    def dumps_list(self, rows) -> bytes:
+        return dumps(self.to_dicts(rows))
+
+    # One JSON object per line
+    def dumps_ndjson(self, rows) -> bytes:
+        return b"".join(dumps(item) + b"\n" for item in self.to_dicts(rows))
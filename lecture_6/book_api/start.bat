@@ -3,6 +3,8 @@ echo Starting Book API...
 
 call venv\Scripts\activate
 
+python migrations.py upgrade
+
 uvicorn main:app --reload
 
 pause
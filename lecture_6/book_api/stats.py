@@ -0,0 +1,102 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Summary tables kept in step with books by triggers: number of books per
+# author and per publication year (NULL = unknown year). Dashboards read
+# these instead of aggregating the books table.
+AUTHOR_COUNTS = "author_counts"
+YEAR_COUNTS = "year_counts"
+TABLES = (AUTHOR_COUNTS, YEAR_COUNTS)
+
+# Create the summary tables if they do not exist yet. year_counts is not keyed
+# by year because the rowid alias could not hold the NULL year.
+def create_tables(conn):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {AUTHOR_COUNTS} ("
+        "author VARCHAR NOT NULL, books INTEGER NOT NULL, PRIMARY KEY (author))"
+    ))
+    # Top-N authors read this index in order and stop after N entries
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_author_counts_books ON {AUTHOR_COUNTS} (books DESC, author)"))
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {YEAR_COUNTS} (year INTEGER, books INTEGER NOT NULL)"))
+    conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS ix_year_counts_year ON {YEAR_COUNTS} (year)"))
+
+# Recompute both tables from books (one scan each); returns the number of books counted
+def rebuild(conn) -> int:
+    conn.execute(text(f"DELETE FROM {AUTHOR_COUNTS}"))
+    conn.execute(text(f"DELETE FROM {YEAR_COUNTS}"))
+    conn.execute(text(f"INSERT INTO {AUTHOR_COUNTS} (author, books) SELECT author, COUNT(*) FROM books GROUP BY author"))
+    conn.execute(text(f"INSERT INTO {YEAR_COUNTS} (year, books) SELECT year, COUNT(*) FROM books GROUP BY year"))
+    return conn.execute(text(f"SELECT COALESCE(SUM(books), 0) FROM {YEAR_COUNTS}")).scalar()
+
+# Triggers on books keep both summaries current, inside the statement that
+# writes the books, so no read-then-write race is possible. `IS` instead of
+# `=` so the NULL year matches its row (a unique index cannot be an ON
+# CONFLICT target for NULL). A decrement for a key without a row (the summary
+# drifted, e.g. books written before the triggers) is skipped; run
+# `python stats.py` to recount.
+COUNT_BOOK = """
+    INSERT INTO {table} ({column}, books) SELECT {row}.{column}, 0
+        WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {column} IS {row}.{column});
+    UPDATE {table} SET books = books + 1 WHERE {column} IS {row}.{column};
+"""
+UNCOUNT_BOOK = """
+    UPDATE {table} SET books = books - 1 WHERE {column} IS {row}.{column};
+    DELETE FROM {table} WHERE {column} IS {row}.{column} AND books <= 0;
+"""
+SUMMARIES = ((AUTHOR_COUNTS, "author"), (YEAR_COUNTS, "year"))
+
+def _trigger_body(steps, summaries=SUMMARIES):
+    return "".join(
+        step.format(table=table, column=column, row=row) for table, column in summaries for step, row in steps
+    )
+
+TRIGGERS = {
+    "books_stats_insert": "AFTER INSERT ON books BEGIN" + _trigger_body([(COUNT_BOOK, "NEW")]) + "END",
+    "books_stats_delete": "AFTER DELETE ON books BEGIN" + _trigger_body([(UNCOUNT_BOOK, "OLD")]) + "END",
+    # Title-only updates fire neither of these
+    **{
+        f"books_stats_update_{column}": (
+            f"AFTER UPDATE OF {column} ON books WHEN OLD.{column} IS NOT NEW.{column} BEGIN"
+            + _trigger_body([(UNCOUNT_BOOK, "OLD"), (COUNT_BOOK, "NEW")], [(table, column)]) + "END"
+        )
+        for table, column in SUMMARIES
+    },
+}
+
+# (Re)create the triggers that maintain the summaries
+def create_triggers(conn):
+    for name, body in TRIGGERS.items():
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        conn.execute(text(f"CREATE TRIGGER {name} {body}"))
+
+# Authors with their book counts, alphabetically, keyset-paginated on author
+def author_counts(db: Session, limit: int = 100, after: str | None = None):
+    where = "WHERE author > :after " if after is not None else ""
+    return db.execute(
+        text(f"SELECT author, books FROM {AUTHOR_COUNTS} {where}ORDER BY author LIMIT :limit"),
+        {"after": after, "limit": limit},
+    ).all()
+
+# The `n` authors with the most books (ties by name)
+def top_authors(db: Session, n: int = 10):
+    return db.execute(
+        text(f"SELECT author, books FROM {AUTHOR_COUNTS} ORDER BY books DESC, author LIMIT :n"), {"n": n}
+    ).all()
+
+# Books per decade (NULL decade = unknown year, listed last). Reads one row
+# per distinct year, however many books there are.
+def decade_counts(db: Session):
+    return db.execute(text(
+        f"SELECT year / 10 * 10 AS decade, SUM(books) AS books FROM {YEAR_COUNTS} "
+        "GROUP BY decade ORDER BY decade IS NULL, decade"
+    )).all()
+
+
+# Recompute the summaries, e.g. after editing books outside the API:
+#   python stats.py
+if __name__ == "__main__":
+    from database import engine
+
+    with engine.begin() as conn:
+        count = rebuild(conn)
+    print(f"Counted {count} books into {', '.join(TABLES)}.")
@@ -0,0 +1,45 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway database before any book_api module is imported
+TEST_DB_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DB_DIR, 'books.db')}"
+# The PRAGMA, cache and metrics tests assume the "performance" SQLite profile
+# without overrides and the in-memory cache, whatever the shell exports;
+# DB_MODE is left alone so the suite runs in both modes
+os.environ["SQLITE_PROFILE"] = "performance"
+os.environ["SQLITE_PRAGMAS"] = ""
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ.pop("METRICS_DIR", None)
+
+# Add the book_api directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "book_api"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import migrations
+import models
+import search_index
+import stats
+from cache import BOOKS, response_cache
+from database import engine
+
+
+@pytest.fixture
+def client():
+    """Test client backed by an empty books table."""
+    from main import app
+
+    models.Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        for table in (search_index.FTS_TABLE, *stats.TABLES):
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.exec_driver_sql("PRAGMA user_version = 0")
+    migrations.upgrade(engine)
+    response_cache.invalidate(BOOKS)
+    with TestClient(app) as test_client:
+        yield test_client
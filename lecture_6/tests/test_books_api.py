@@ -0,0 +1,823 @@
+import json
+import os
+import re
+
+import pytest
+
+import models
+import search_index
+
+
+def add_books(client, count):
+    """Create `count` books and return their ids."""
+    return [
+        client.post("/books/", json={"title": f"Book {i}", "author": "Author", "year": 2000 + i}).json()["id"]
+        for i in range(count)
+    ]
+
+
+class TestListBooks:
+    """Test cases for keyset-paginated GET /books/."""
+
+    def test_empty_collection(self, client):
+        """Test an empty table returns no items and no cursor."""
+        response = client.get("/books/")
+        assert response.status_code == 200
+        assert response.json() == {"items": [], "next_after_id": None}
+
+    def test_pages_follow_cursor(self, client):
+        """Test walking the cursor returns every book exactly once, in id order."""
+        ids = add_books(client, 5)
+
+        first = client.get("/books/", params={"limit": 2}).json()
+        assert [b["id"] for b in first["items"]] == ids[:2]
+        assert first["next_after_id"] == ids[1]
+
+        second = client.get("/books/", params={"limit": 2, "after_id": first["next_after_id"]}).json()
+        assert [b["id"] for b in second["items"]] == ids[2:4]
+
+        last = client.get("/books/", params={"limit": 2, "after_id": second["next_after_id"]}).json()
+        assert [b["id"] for b in last["items"]] == ids[4:]
+        assert last["next_after_id"] is None
+
+    def test_exact_page_has_no_cursor(self, client):
+        """Test a page that ends on the last row does not advertise another page."""
+        add_books(client, 3)
+        page = client.get("/books/", params={"limit": 3}).json()
+        assert len(page["items"]) == 3
+        assert page["next_after_id"] is None
+
+    def test_limit_is_bounded(self, client):
+        """Test out-of-range limits are rejected."""
+        assert client.get("/books/", params={"limit": 0}).status_code == 422
+        assert client.get("/books/", params={"limit": 100000}).status_code == 422
+
+    def test_stream_returns_ndjson(self, client):
+        """Test stream mode yields one JSON object per line for the whole table."""
+        ids = add_books(client, 3)
+        response = client.get("/books/", params={"stream": True, "after_id": ids[0]})
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["id"] for row in rows] == ids[1:]
+        assert rows[0]["title"] == "Book 1"
+
+
+class TestSearchBooks:
+    """Test cases for full-text GET /books/search/."""
+
+    def test_prefix_match_on_title_and_author(self, client):
+        """Test words match as prefixes in either title or author."""
+        client.post("/books/", json={"title": "Dune", "author": "Frank Herbert"})
+        client.post("/books/", json={"title": "Foundation", "author": "Isaac Asimov"})
+
+        assert [b["title"] for b in client.get("/books/search/", params={"query": "fou"}).json()] == ["Foundation"]
+        assert [b["title"] for b in client.get("/books/search/", params={"query": "herb"}).json()] == ["Dune"]
+        assert client.get("/books/search/", params={"query": "tolkien"}).json() == []
+
+    def test_all_words_must_match(self, client):
+        """Test a multi-word query only returns books matching every word."""
+        client.post("/books/", json={"title": "The Hobbit", "author": "J. R. R. Tolkien"})
+        client.post("/books/", json={"title": "The Road", "author": "Cormac McCarthy"})
+
+        results = client.get("/books/search/", params={"query": "the tolk"}).json()
+        assert [b["title"] for b in results] == ["The Hobbit"]
+
+    def test_limit(self, client):
+        """Test the result count is capped by limit."""
+        for i in range(5):
+            client.post("/books/", json={"title": f"Saga {i}", "author": "Someone"})
+        assert len(client.get("/books/search/", params={"query": "saga", "limit": 2}).json()) == 2
+
+    def test_punctuation_only_query(self, client):
+        """Test a query without words returns nothing instead of an FTS syntax error."""
+        client.post("/books/", json={"title": "Dune", "author": "Frank Herbert"})
+        response = client.get("/books/search/", params={"query": '"*('})
+        assert response.status_code == 200
+        assert response.json() == []
+
+    def test_index_follows_update_and_delete(self, client):
+        """Test the index is kept in sync with writes."""
+        book_id = client.post("/books/", json={"title": "Dune", "author": "Frank Herbert"}).json()["id"]
+
+        client.put(f"/books/{book_id}", json={"title": "Children of Dune", "author": "Frank Herbert"})
+        assert [b["title"] for b in client.get("/books/search/", params={"query": "children"}).json()] == ["Children of Dune"]
+
+        client.delete(f"/books/{book_id}")
+        assert client.get("/books/search/", params={"query": "dune"}).json() == []
+
+    def test_rebuild_backfills_existing_rows(self, client):
+        """Test rebuilding indexes rows that were written without going through crud."""
+        from database import SessionLocal
+
+        with SessionLocal() as db:
+            db.add(models.Book(title="Solaris", author="Stanislaw Lem"))
+            db.commit()
+            assert client.get("/books/search/", params={"query": "solaris"}).json() == []
+            assert search_index.rebuild(db) == 1
+
+        assert [b["title"] for b in client.get("/books/search/", params={"query": "lem"}).json()] == ["Solaris"]
+
+
+class TestBulkImport:
+    """Test cases for POST /books/bulk."""
+
+    def test_json_array(self, client):
+        """Test a JSON array is inserted and indexed for search."""
+        books = [{"title": f"Tome {i}", "author": "Scribe", "year": 1900 + i} for i in range(3)]
+        result = client.post("/books/bulk", json=books).json()
+
+        assert result["inserted"] == 3
+        assert result["rejected_count"] == 0
+        assert len(client.get("/books/").json()["items"]) == 3
+        assert len(client.get("/books/search/", params={"query": "tome"}).json()) == 3
+
+    def test_ndjson_with_rejected_rows(self, client):
+        """Test NDJSON lines are validated one by one and bad rows are reported."""
+        body = "\n".join([
+            json.dumps({"title": "Good", "author": "A"}),
+            "{not json",
+            json.dumps({"title": "No author"}),
+            json.dumps({"title": "Also good", "author": "B", "year": 1999}),
+        ])
+        result = client.post("/books/bulk", content=body, headers={"content-type": "application/x-ndjson"}).json()
+
+        assert result["inserted"] == 2
+        assert result["rejected_count"] == 2
+        assert [row["index"] for row in result["rejected"]] == [1, 2]
+        assert "author" in result["rejected"][1]["error"]
+
+    def test_batches_are_reported(self, client, monkeypatch):
+        """Test rows are written in batches with per-batch counts."""
+        import crud
+
+        monkeypatch.setattr(crud, "BULK_BATCH_SIZE", 2)
+        books = [{"title": f"T{i}", "author": "A"} for i in range(5)]
+        result = client.post("/books/bulk", json=books).json()
+
+        assert [b["inserted"] for b in result["batches"]] == [2, 2, 1]
+        assert result["inserted"] == 5
+
+    def test_upsert_skips_existing_books(self, client):
+        """Test upsert matches on (title, author, year) instead of inserting duplicates."""
+        client.post("/books/", json={"title": "Dune", "author": "Frank Herbert", "year": 1965})
+        books = [
+            {"title": "Dune", "author": "Frank Herbert", "year": 1965},
+            {"title": "Dune", "author": "Frank Herbert", "year": 1984},
+            {"title": "Dune", "author": "Frank Herbert", "year": 1984},
+        ]
+        result = client.post("/books/bulk", params={"upsert": True}, json=books).json()
+
+        assert result["inserted"] == 1
+        assert result["matched"] == 2
+        assert len(client.get("/books/").json()["items"]) == 2
+
+    def test_upsert_waits_for_a_concurrent_writer(self, client):
+        """Test an upsert checks for existing books only once it holds the write lock."""
+        import threading
+        import time
+
+        from sqlalchemy import text
+
+        import crud
+        import schemas
+        from database import SessionLocal, engine
+
+        book = schemas.BookCreate(title="Dune", author="Frank Herbert", year=None)
+        results = []
+
+        def upsert():
+            with SessionLocal() as db:
+                results.append(crud.bulk_create_books(db, [book], upsert=True))
+
+        with engine.connect() as writer:
+            writer.exec_driver_sql("BEGIN IMMEDIATE")
+            thread = threading.Thread(target=upsert)
+            thread.start()
+            time.sleep(0.2)
+            writer.execute(text("INSERT INTO books (title, author, year) VALUES ('Dune', 'Frank Herbert', NULL)"))
+            writer.commit()
+            thread.join()
+
+        assert results == [(0, 1)]
+        assert len(client.get("/books/").json()["items"]) == 1
+
+    def test_body_must_be_an_array(self, client):
+        """Test a JSON object body is rejected as a whole."""
+        assert client.post("/books/bulk", json={"title": "Dune"}).status_code == 400
+
+
+class TestAsyncCrud:
+    """Test cases for the async crud layer in both DB modes."""
+
+    def test_same_results_with_async_and_sync_sessions(self, client):
+        """Test async_crud gives the same answers through AsyncSession and Session."""
+        import anyio
+
+        import async_crud
+        import schemas
+        from database import AsyncSessionLocal, SessionLocal, async_engine
+
+        async def scenario(db):
+            book = await async_crud.create_book(db, schemas.BookCreate(title="Dune", author="Frank Herbert"))
+            page = await async_crud.get_books(db, 10)
+            streamed = [row.id async for batch in async_crud.iter_book_rows(db, 1) for row in batch]
+            found = await async_crud.search_books(db, "dune")
+            await async_crud.delete_book(db, book.id)
+            return [b.id for b in page], streamed, [b.id for b in found], book.id
+
+        async def run_async():
+            try:
+                async with AsyncSessionLocal() as db:
+                    return await scenario(db)
+            finally:
+                await async_engine.dispose()
+
+        async def run_sync():
+            with SessionLocal() as db:
+                return await scenario(db)
+
+        for runner in (run_async, run_sync):
+            page, streamed, found, book_id = anyio.run(runner)
+            assert page == streamed == found == [book_id]
+
+
+class TestSqliteProfile:
+    """Test cases for the SQLite tuning profile."""
+
+    def test_pragmas_applied_to_pooled_connections(self, client):
+        """Test every new connection gets the configured PRAGMAs."""
+        from sqlalchemy import text
+
+        from database import SQLITE_PRAGMAS, engine
+
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == SQLITE_PRAGMAS["journal_mode"].lower()
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == SQLITE_PRAGMAS["busy_timeout"]
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == SQLITE_PRAGMAS["cache_size"]
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for redis.Redis."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+class TestResponseCache:
+    """Test cases for the read-through response cache."""
+
+    def test_repeated_reads_skip_the_database(self, client, monkeypatch):
+        """Test a cached listing is served without calling crud again."""
+        import async_crud
+
+        client.post("/books/", json={"title": "Dune", "author": "Frank Herbert"})
+        first = client.get("/books/").json()
+        found = client.get("/books/search/", params={"query": "dune"}).json()
+
+        async def fail(*args, **kwargs):
+            raise AssertionError("cache miss")
+
+        monkeypatch.setattr(async_crud, "get_book_rows", fail)
+        monkeypatch.setattr(async_crud, "search_book_rows", fail)
+        assert client.get("/books/").json() == first
+        assert client.get("/books/search/", params={"query": "dune"}).json() == found
+
+    def test_writes_invalidate(self, client):
+        """Test create, update and delete are visible on the next read."""
+        client.get("/books/")
+        client.get("/books/search/", params={"query": "dune"})
+
+        book_id = client.post("/books/", json={"title": "Dune", "author": "Frank Herbert"}).json()["id"]
+        assert len(client.get("/books/").json()["items"]) == 1
+        assert len(client.get("/books/search/", params={"query": "dune"}).json()) == 1
+
+        client.put(f"/books/{book_id}", json={"title": "Dune Messiah", "author": "Frank Herbert"})
+        assert client.get("/books/").json()["items"][0]["title"] == "Dune Messiah"
+
+        client.delete(f"/books/{book_id}")
+        assert client.get("/books/").json()["items"] == []
+        assert client.get("/books/search/", params={"query": "dune"}).json() == []
+
+    def test_lru_evicts_and_expires(self, monkeypatch):
+        """Test the in-process backend honours maxsize and TTL."""
+        import cache
+
+        backend = cache.LRUCache(maxsize=2, ttl=10)
+        backend.set("a", b"1")
+        backend.set("b", b"2")
+        backend.get("a")
+        backend.set("c", b"3")
+        assert backend.get("b") is None
+        assert backend.get("a") == b"1"
+
+        now = cache.time.monotonic()
+        monkeypatch.setattr(cache.time, "monotonic", lambda: now + 11)
+        assert backend.get("a") is None
+
+    def test_redis_backend_generations(self):
+        """Test invalidation through a Redis-compatible client."""
+        import cache
+
+        response_cache = cache.ResponseCache(cache.RedisCache(FakeRedis()))
+        key = response_cache.key("books", "list", limit=10)
+        response_cache.set(key, b"[]")
+        assert response_cache.get(response_cache.key("books", "list", limit=10)) == b"[]"
+
+        response_cache.invalidate("books")
+        assert response_cache.get(response_cache.key("books", "list", limit=10)) is None
+
+    def test_redis_calls_leave_the_event_loop(self, client, monkeypatch):
+        """Test a blocking Redis client is never called on the event loop thread."""
+        import asyncio
+        import time
+
+        import cache
+
+        calls = []
+
+        class RecordingRedis(FakeRedis):
+            def record(self, name):
+                try:
+                    asyncio.get_running_loop()
+                    calls.append((name, True))
+                except RuntimeError:
+                    calls.append((name, False))
+
+            def get(self, key):
+                self.record("get")
+                return super().get(key)
+
+            def set(self, key, value, ex=None):
+                self.record("set")
+                super().set(key, value, ex)
+
+            def incr(self, key):
+                self.record("incr")
+                return super().incr(key)
+
+        monkeypatch.setattr(cache.response_cache, "backend", cache.RedisCache(RecordingRedis()))
+        client.get("/books/")
+        client.get("/books/")
+        client.post("/books/", json={"title": "Dune", "author": "Frank Herbert"})
+        assert len(client.get("/books/").json()["items"]) == 1
+
+        deadline = time.monotonic() + 2
+        while "incr" not in [name for name, _ in calls] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert {name for name, _ in calls} == {"get", "set", "incr"}
+        assert [name for name, on_loop in calls if on_loop] == []
+
+
+class TestConditionalGet:
+    """Test cases for ETag / Last-Modified on book listings."""
+
+    def test_if_none_match_returns_304(self, client):
+        """Test a matching ETag short-circuits to 304 for list and search."""
+        client.post("/books/", json={"title": "Dune", "author": "Frank Herbert"})
+        for url, params in (("/books/", {}), ("/books/search/", {"query": "dune"})):
+            first = client.get(url, params=params)
+            etag = first.headers["etag"]
+            assert etag.startswith('W/"')
+
+            again = client.get(url, params=params, headers={"If-None-Match": etag})
+            assert again.status_code == 304
+            assert again.content == b""
+            assert again.headers["etag"] == etag
+
+    def test_write_changes_etag(self, client):
+        """Test a write makes the old ETag stale."""
+        etag = client.get("/books/").headers["etag"]
+        client.post("/books/", json={"title": "Dune", "author": "Frank Herbert"})
+
+        response = client.get("/books/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert len(response.json()["items"]) == 1
+
+    def test_if_modified_since(self, client):
+        """Test Last-Modified round-trips through If-Modified-Since."""
+        client.post("/books/", json={"title": "Dune", "author": "Frank Herbert"})
+        last_modified = client.get("/books/").headers["last-modified"]
+
+        assert client.get("/books/", headers={"If-Modified-Since": last_modified}).status_code == 304
+        assert client.get("/books/", headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}).status_code == 200
+
+    def test_not_modified_skips_row_queries(self, client, monkeypatch):
+        """Test a 304 never reads or serializes book rows."""
+        import async_crud
+
+        etag = client.get("/books/").headers["etag"]
+
+        async def fail(*args, **kwargs):
+            raise AssertionError("rows queried")
+
+        monkeypatch.setattr(async_crud, "get_book_rows", fail)
+        assert client.get("/books/", params={"limit": 7}, headers={"If-None-Match": etag}).status_code == 304
+
+
+class TestSingleBook:
+    """Test cases for GET and PATCH /books/{id}."""
+
+    def test_get_by_id(self, client):
+        """Test a single book is returned with validators, or 404."""
+        book = client.post("/books/", json={"title": "Dune", "author": "Frank Herbert", "year": 1965}).json()
+
+        response = client.get(f"/books/{book['id']}")
+        assert response.json() == book
+        assert client.get(f"/books/{book['id']}", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+        assert client.get("/books/999").status_code == 404
+        assert client.get("/books/999", headers={"If-None-Match": "*"}).status_code == 404
+        # The table-wide validators of the list must not vouch for a missing book
+        listing = client.get("/books/")
+        assert client.get("/books/999", headers={"If-None-Match": listing.headers["etag"]}).status_code == 404
+        since = {"If-Modified-Since": listing.headers["last-modified"]}
+        assert client.get("/books/999", headers=since).status_code == 404
+
+    def test_patch_writes_only_sent_fields(self, client):
+        """Test PATCH leaves fields that were not sent untouched."""
+        book = client.post("/books/", json={"title": "Dune", "author": "Frank Herbert", "year": 1965}).json()
+
+        patched = client.patch(f"/books/{book['id']}", json={"year": 1966}).json()
+        assert patched == {**book, "year": 1966}
+        assert client.get(f"/books/{book['id']}").json() == patched
+
+        renamed = client.patch(f"/books/{book['id']}", json={"title": "Dune Messiah"}).json()
+        assert renamed["year"] == 1966
+        assert [b["id"] for b in client.get("/books/search/", params={"query": "messiah"}).json()] == [book["id"]]
+
+    def test_patch_validation_and_missing_book(self, client):
+        """Test PATCH rejects nulls for required fields and 404s on unknown ids."""
+        book = client.post("/books/", json={"title": "Dune", "author": "Frank Herbert"}).json()
+
+        assert client.patch(f"/books/{book['id']}", json={"title": None}).status_code == 422
+        assert client.patch(f"/books/{book['id']}", json={"year": None}).json()["year"] is None
+        assert client.patch("/books/999", json={"year": 2000}).status_code == 404
+        assert client.patch(f"/books/{book['id']}", json={}).json()["title"] == "Dune"
+
+    def test_patch_is_one_statement(self, client):
+        """Test PATCH issues a single UPDATE ... RETURNING, even when it moves the book between stats rows."""
+        from sqlalchemy import event
+
+        from database import DB_MODE, async_engine, engine
+
+        book_id = client.post("/books/", json={"title": "Dune", "author": "Frank Herbert"}).json()["id"]
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        target = async_engine.sync_engine if DB_MODE == "async" else engine
+        event.listen(target, "before_cursor_execute", record)
+        try:
+            client.patch(f"/books/{book_id}", json={"year": 1965})
+        finally:
+            event.remove(target, "before_cursor_execute", record)
+
+        book_statements = [" ".join(s.split()) for s in statements if re.search(r"\b(FROM|UPDATE|INTO) books\b", s)]
+        assert len(book_statements) == 1
+        assert book_statements[0].startswith("UPDATE books SET year") and "RETURNING" in book_statements[0]
+
+
+class TestMetrics:
+    """Test cases for request instrumentation and /metrics."""
+
+    def test_route_latency_and_db_usage_are_exported(self, client):
+        """Test a request shows up with its route template and SQL statement count."""
+        book_id = client.post("/books/", json={"title": "Dune", "author": "Frank Herbert"}).json()["id"]
+        client.get(f"/books/{book_id}")
+
+        response = client.get("/metrics")
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'book_api_request_duration_seconds_count{method="GET",route="/books/{book_id}",status="200"}' in body
+        assert 'book_api_request_db_queries_count{route="/books/"}' in body
+        assert "book_api_requests_in_flight" in body
+        assert "book_api_db_query_duration_seconds_bucket" in body
+
+    def test_metrics_are_summed_across_workers(self, client, monkeypatch, tmp_path):
+        """Test with METRICS_DIR /metrics adds the other workers' files, including exited ones, to its own."""
+        import metrics
+
+        monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+        other = metrics.registry.merged([])
+        other_metrics = {metric.name: metric for metric in other.metrics}
+        other_metrics[metrics.REQUEST_LATENCY.name].observe(0.01, "GET", "/books/", 200)
+        other_metrics[metrics.REQUESTS_IN_FLIGHT.name].inc()
+        metrics.write_state(metrics.worker_file(1), other.state())
+
+        def sample(name):
+            line = next(line for line in client.get("/metrics").text.splitlines() if line.startswith(name))
+            return float(line.rsplit(" ", 1)[1])
+
+        route_count = 'book_api_request_duration_seconds_count{method="GET",route="/books/",status="200"}'
+        client.get("/books/")
+        own = metrics.REQUEST_LATENCY.state()
+        own_count = next(count for values, _, _, count in own if values == ["GET", "/books/", 200])
+        assert sample(route_count) == own_count + 1
+        assert sample("book_api_requests_in_flight") == 2  # this scrape plus the other worker's gauge
+
+        # Worker 1 exits: its counts stay in the totals, its gauge goes
+        metrics.collect_exited(1)
+        assert sorted(path.name for path in tmp_path.glob("*.json")) == [metrics.EXITED_FILE, f"worker-{os.getpid()}.json"]
+        assert sample(route_count) == own_count + 1
+        assert sample("book_api_requests_in_flight") == 1
+
+    def test_request_stats_count_queries(self, client):
+        """Test SQL run from the request's session is attributed to the request."""
+        import metrics
+
+        seen = []
+        original = metrics.REQUEST_DB_QUERIES.observe
+
+        def spy(value, *labels):
+            seen.append((labels, value))
+            original(value, *labels)
+
+        metrics.REQUEST_DB_QUERIES.observe = spy
+        try:
+            client.get("/books/", params={"limit": 3})
+        finally:
+            metrics.REQUEST_DB_QUERIES.observe = original
+
+        assert seen == [(("/books/",), 2)]
+
+    def test_slow_query_log(self, client, monkeypatch, caplog):
+        """Test statements over the threshold are logged when the log is enabled."""
+        import metrics
+
+        monkeypatch.setattr(metrics, "SLOW_QUERY_MS", 0.0)
+        with caplog.at_level("WARNING", logger="book_api.slow_query"):
+            client.get("/books/")
+        assert any("slow query" in record.message for record in caplog.records)
+
+    def test_failed_statement_leaves_no_start_time(self, client):
+        """Test a statement that raises does not leave its start time on the connection."""
+        from sqlalchemy import text
+        from sqlalchemy.exc import OperationalError
+
+        from database import engine
+
+        client.get("/books/")
+        with engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    conn.execute(text("SELECT * FROM no_such_table"))
+            conn.execute(text("SELECT 1"))
+            assert conn.info["query_start"] == {}
+
+
+class TestSerialization:
+    """Test cases for the tuple-based JSON serialization path."""
+
+    def test_matches_pydantic_output(self, client):
+        """Test row serialization produces the same bytes as the schema would."""
+        import schemas
+        import serializers
+
+        book = schemas.Book(id=7, title="Война и мир", author='Lev "Leo" Tolstoy', year=None)
+        row = tuple(getattr(book, name) for name in schemas.Book.model_fields)
+
+        serializer = serializers.RowSerializer(schemas.Book)
+        assert serializer.dumps_list([row]) == b"[" + book.model_dump_json().encode() + b"]"
+        assert serializer.dumps_ndjson([row, row]) == (book.model_dump_json() + "\n").encode() * 2
+
+    def test_list_and_search_bodies(self, client):
+        """Test list and search responses keep the documented shape and field order."""
+        created = client.post("/books/", json={"title": "Dune", "author": "Frank Herbert", "year": 1965}).json()
+
+        assert client.get("/books/").json() == {"items": [created], "next_after_id": None}
+        assert list(client.get("/books/search/", params={"query": "dune"}).json()[0]) == ["title", "author", "year", "id"]
+
+
+class TestMigrations:
+    """Test cases for versioned schema migrations and the startup check."""
+
+    def test_upgrade_is_idempotent(self, client):
+        """Test a second upgrade applies nothing and the app reports the latest version."""
+        import migrations
+        from database import engine
+
+        assert migrations.upgrade(engine) == []
+        assert migrations.check(engine) == migrations.HEAD
+
+    def test_adopts_existing_database(self, client):
+        """Test upgrading a pre-migration database keeps its rows and backfills the search index."""
+        import migrations
+        from database import engine
+        from sqlalchemy import text
+
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO books (title, author, year) VALUES ('Dune', 'Frank Herbert', 1965)"))
+            conn.execute(text(f"DROP TABLE {search_index.FTS_TABLE}"))
+            conn.execute(text("DROP INDEX ix_books_author_year"))
+            conn.execute(text("DROP TABLE author_counts"))
+            conn.execute(text("DROP TABLE year_counts"))
+            conn.exec_driver_sql("PRAGMA user_version = 0")
+
+        assert migrations.upgrade(engine) == list(range(1, migrations.HEAD + 1))
+        assert [book["title"] for book in client.get("/books/search/", params={"query": "dune"}).json()] == ["Dune"]
+        assert client.get("/books/stats/authors/top").json() == [{"author": "Frank Herbert", "books": 1}]
+
+    def test_startup_refuses_outdated_schema(self, client):
+        """Test the lifespan check fails instead of serving an unmigrated database."""
+        from fastapi.testclient import TestClient
+
+        import migrations
+        from database import engine
+        from main import app
+
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"PRAGMA user_version = {migrations.HEAD - 1}")
+        with pytest.raises(migrations.SchemaVersionError, match="migrations.py upgrade"):
+            with TestClient(app):
+                pass
+
+
+class TestStats:
+    """Test cases for the /books/stats endpoints and their summary tables."""
+
+    def test_counts_follow_every_write(self, client):
+        """Test create, bulk import, update, patch and delete keep the summaries equal to a full recount."""
+        from sqlalchemy import text
+
+        from database import engine
+
+        first = client.post("/books/", json={"title": "Dune", "author": "Frank Herbert", "year": 1965}).json()
+        client.post("/books/bulk", json=[
+            {"title": "Children of Dune", "author": "Frank Herbert", "year": 1976},
+            {"title": "Solaris", "author": "Stanislaw Lem", "year": 1961},
+            {"title": "Untitled", "author": "Anonymous"},
+        ])
+        client.put(f"/books/{first['id']}", json={"title": "Dune", "author": "F. Herbert", "year": 1965})
+        client.patch(f"/books/{first['id']}", json={"year": 1966})
+        client.delete(f"/books/{first['id']}")
+
+        with engine.connect() as conn:
+            authors = dict(conn.execute(text("SELECT author, COUNT(*) FROM books GROUP BY author")).all())
+            decades = conn.execute(text(
+                "SELECT year / 10 * 10 AS decade, COUNT(*) FROM books GROUP BY decade ORDER BY decade IS NULL, decade"
+            )).all()
+
+        page = client.get("/books/stats/authors").json()
+        assert {item["author"]: item["books"] for item in page["items"]} == authors
+        assert "F. Herbert" not in authors  # rows that reach zero are removed
+        assert [(item["decade"], item["books"]) for item in client.get("/books/stats/decades").json()] == decades
+        assert decades[-1] == (None, 1)
+
+    def test_interleaved_sessions_keep_counts_exact(self, client):
+        """Test a book moved by one session while another holds a stale copy still counts once, under its final author."""
+        import crud
+        from database import SessionLocal
+
+        book_id = client.post("/books/", json={"title": "Dune", "author": "X", "year": 1965}).json()["id"]
+        with SessionLocal() as first, SessionLocal() as second:
+            assert crud.get_book(first, book_id).author == "X"
+            crud.patch_book(second, book_id, {"author": "Y"})
+            crud.patch_book(first, book_id, {"author": "Z"})
+
+        items = client.get("/books/stats/authors").json()["items"]
+        assert items == [{"author": "Z", "books": 1}]
+
+    def test_writes_outside_the_api_are_counted(self, client):
+        """Test raw SQL writes update the summaries, and a missing summary row does not fail a delete."""
+        from sqlalchemy import text
+
+        from database import engine
+
+        book_id = client.post("/books/", json={"title": "Dune", "author": "Frank Herbert", "year": 1965}).json()["id"]
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO books (title, author, year) VALUES ('Emma', 'Jane Austen', NULL)"))
+            conn.execute(text("UPDATE books SET year = 1966 WHERE id = :id"), {"id": book_id})
+        assert client.get("/books/stats/decades").json() == [{"decade": 1960, "books": 1}, {"decade": None, "books": 1}]
+
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM author_counts"))
+        assert client.delete(f"/books/{book_id}").status_code == 200
+        assert client.get("/books/stats/authors").json()["items"] == []
+
+    def test_author_pages_and_top_authors(self, client):
+        """Test author counts paginate alphabetically and top authors sort by count, then name."""
+        client.post("/books/bulk", json=[
+            {"title": f"Book {i}", "author": author, "year": 2000}
+            for i, author in enumerate(["Cleo", "Bea", "Bea", "Cleo", "Abe", "Cleo"])
+        ])
+
+        first = client.get("/books/stats/authors", params={"limit": 2}).json()
+        assert first == {"items": [{"author": "Abe", "books": 1}, {"author": "Bea", "books": 2}], "next_after": "Bea"}
+        rest = client.get("/books/stats/authors", params={"limit": 2, "after": first["next_after"]}).json()
+        assert rest == {"items": [{"author": "Cleo", "books": 3}], "next_after": None}
+
+        top = client.get("/books/stats/authors/top", params={"n": 2}).json()
+        assert top == [{"author": "Cleo", "books": 3}, {"author": "Bea", "books": 2}]
+
+    def test_stats_are_conditional(self, client):
+        """Test stats responses carry the books validator and go stale on writes."""
+        client.post("/books/", json={"title": "Dune", "author": "Frank Herbert", "year": 1965})
+        etag = client.get("/books/stats/decades").headers["etag"]
+        assert client.get("/books/stats/decades", headers={"If-None-Match": etag}).status_code == 304
+
+        client.post("/books/", json={"title": "Emma", "author": "Jane Austen", "year": 1815})
+        response = client.get("/books/stats/decades", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json() == [{"decade": 1810, "books": 1}, {"decade": 1960, "books": 1}]
+
+
+class TestBatchWrites:
+    """Test cases for set-based DELETE /books/ and PATCH /books/."""
+
+    def add_catalogue(self, client):
+        client.post("/books/bulk", json=[
+            {"title": "Dune", "author": "Frank Herbert", "year": 1965},
+            {"title": "Dune Messiah", "author": "Frank Herbert", "year": 1969},
+            {"title": "Solaris", "author": "Stanislaw Lem", "year": 1961},
+            {"title": "Emma", "author": "Jane Austen", "year": 1815},
+        ])
+        return {book["title"]: book["id"] for book in client.get("/books/").json()["items"]}
+
+    def test_delete_by_filter_and_ids(self, client):
+        """Test batch deletes remove matching books from the table, search and stats."""
+        ids = self.add_catalogue(client)
+
+        response = client.request("DELETE", "/books/", json={"author": "Frank Herbert", "year_from": 1966})
+        assert response.json() == {"affected": 1}
+        response = client.request("DELETE", "/books/", json={"ids": [ids["Solaris"], ids["Emma"], 999999]})
+        assert response.json() == {"affected": 2}
+
+        assert [book["title"] for book in client.get("/books/").json()["items"]] == ["Dune"]
+        assert client.get("/books/search/", params={"query": "solaris"}).json() == []
+        assert client.get("/books/stats/authors").json()["items"] == [{"author": "Frank Herbert", "books": 1}]
+
+    def test_update_by_filter(self, client):
+        """Test a batch update writes every match and moves them in search and stats."""
+        self.add_catalogue(client)
+
+        response = client.patch("/books/", json={"where": {"author": "Frank Herbert"}, "values": {"author": "F. Herbert"}})
+        assert response.json() == {"affected": 2}
+
+        assert {book["author"] for book in client.get("/books/search/", params={"query": "dune"}).json()} == {"F. Herbert"}
+        assert client.get("/books/stats/authors/top", params={"n": 1}).json() == [{"author": "F. Herbert", "books": 2}]
+        assert client.get("/books/stats/authors", params={"after": "F"}).json()["items"][0]["author"] == "F. Herbert"
+
+    def test_update_moving_groups_keeps_stats_exact(self, client):
+        """Test a batch update moving books to another author and year, including no year, matches a full recount."""
+        from sqlalchemy import text
+
+        from database import engine
+
+        self.add_catalogue(client)
+        client.patch("/books/", json={"where": {"year_from": 1960}, "values": {"author": "Jane Austen"}})
+        client.patch("/books/", json={"where": {"author": "Jane Austen", "year_to": 1962}, "values": {"year": None}})
+
+        with engine.connect() as conn:
+            authors = conn.execute(text("SELECT author, COUNT(*) FROM books GROUP BY author ORDER BY author")).all()
+            years = conn.execute(text("SELECT year, COUNT(*) FROM books GROUP BY year")).all()
+            stored_years = conn.execute(text("SELECT year, books FROM year_counts")).all()
+
+        assert [(item["author"], item["books"]) for item in client.get("/books/stats/authors").json()["items"]] == authors
+        assert authors == [("Jane Austen", 4)]
+        assert sorted(stored_years, key=repr) == sorted(years, key=repr)
+        assert (None, 2) in years
+
+    def test_one_statement_per_batch(self, client):
+        """Test a batch update or delete touches books with a single statement and loads no rows."""
+        from sqlalchemy import event
+
+        from database import DB_MODE, async_engine, engine
+
+        self.add_catalogue(client)
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        target = async_engine.sync_engine if DB_MODE == "async" else engine
+        event.listen(target, "before_cursor_execute", record)
+        try:
+            client.patch("/books/", json={"where": {"year_from": 1960}, "values": {"author": "Someone", "year": 2000}})
+            client.request("DELETE", "/books/", json={"author": "Someone"})
+        finally:
+            event.remove(target, "before_cursor_execute", record)
+
+        book_statements = [s for s in statements if re.search(r"\b(FROM|UPDATE|INTO) books\b", s)]
+        assert len(book_statements) == 2
+        assert book_statements[0].startswith("UPDATE books") and "RETURNING" in book_statements[0]
+        assert book_statements[1].startswith("DELETE FROM books") and "RETURNING" in book_statements[1]
+
+    def test_rejects_empty_selection(self, client):
+        """Test a selection without criteria, or an update without values, is refused."""
+        self.add_catalogue(client)
+
+        assert client.request("DELETE", "/books/", json={}).status_code == 422
+        assert client.patch("/books/", json={"where": {"author": "Jane Austen"}, "values": {}}).status_code == 422
+        assert client.patch("/books/", json={"where": {"ids": [1]}, "values": {"title": None}}).status_code == 422
+        assert len(client.get("/books/").json()["items"]) == 4
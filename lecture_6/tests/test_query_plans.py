@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import text
+
+import crud
+import query_plans
+import schemas
+from database import SessionLocal, engine
+
+
+@pytest.fixture
+def seeded(client):
+    """Books table with enough rows, and statistics, for SQLite to plan realistically."""
+    books = [
+        schemas.BookCreate(title=f"Title {i % 50}", author=f"Author {i % 20}", year=1900 + i % 120)
+        for i in range(2000)
+    ]
+    with SessionLocal() as db:
+        crud.bulk_create_books(db, books)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    return engine
+
+
+class TestQueryPlans:
+    """Test cases for the EXPLAIN QUERY PLAN audit of crud.py."""
+
+    def test_hot_queries_use_indexes(self, seeded):
+        """Test no crud query scans a table or sorts in a temp B-tree unless it is expected to."""
+        reports = query_plans.audit(seeded)
+        problems = [(report["step"], report["statement"], report["problems"]) for report in reports if report["problems"]]
+        assert problems == []
+        assert {report["step"] for report in reports} >= {"get_book", "patch_book", "delete_book", "bulk_create_books upsert"}
+
+    def test_dropped_index_is_reported(self, seeded):
+        """Test the audit catches a regression to a full scan and names the missing model index."""
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_books_title"))
+
+        flagged = {report["step"] for report in query_plans.audit(seeded) if report["problems"]}
+        assert flagged == {"bulk_create_books upsert", "delete_books by title"}
+        assert [index.name for index in query_plans.missing_indexes(seeded)] == ["ix_books_title"]
+
+    def test_plan_problems(self):
+        """Test scans of real tables and temp B-trees are flagged, FTS lookups are not."""
+        plan = [
+            "SCAN books",
+            "SCAN books_fts VIRTUAL TABLE INDEX 0:M1",
+            "SEARCH books USING INTEGER PRIMARY KEY (rowid=?)",
+            "USE TEMP B-TREE FOR ORDER BY",
+        ]
+        assert query_plans.plan_problems(plan) == [
+            ("SCAN", "SCAN books"),
+            ("USE TEMP B-TREE", "USE TEMP B-TREE FOR ORDER BY"),
+        ]